@@ -0,0 +1,98 @@
+"""
+Medición de consultas SQL por petición (opcional).
+
+Se activa con MEDICION_CONSULTAS=True. Cuenta las consultas, el tiempo
+en la base de datos y las sentencias repetidas (misma SQL con distintos
+parámetros, típico de un N+1) usando `execute_wrapper`. Los valores se
+envían en el encabezado `Server-Timing` (visible en las herramientas de
+desarrollo del navegador) y en una línea de log por petición. Las
+peticiones que superan MEDICION_UMBRAL_LENTO_MS registran además las
+sentencias más repetidas.
+
+Las respuestas en streaming solo cuentan lo ejecutado antes de enviar
+el primer bloque.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger('backend.consultas')
+
+
+class RegistroConsultas:
+    """`execute_wrapper` que acumula las consultas de una petición"""
+
+    def __init__(self):
+        self.total = 0
+        self.segundos = 0.0
+        self.sentencias = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.total += 1
+            self.sentencias[sql] += 1
+
+    @property
+    def repetidas(self):
+        """Ejecuciones de más de sentencias ya ejecutadas en la petición"""
+        return sum(veces - 1 for veces in self.sentencias.values() if veces > 1)
+
+    def mas_repetidas(self, limite):
+        """[(sql, veces)] de las sentencias ejecutadas más de una vez"""
+        return [(sql, veces) for sql, veces in self.sentencias.most_common(limite) if veces > 1]
+
+
+class MedicionConsultasMiddleware:
+    """Agrega Server-Timing y registra consultas y tiempos de cada petición"""
+
+    def __init__(self, get_response):
+        if not settings.MEDICION_CONSULTAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registro = RegistroConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as stack:
+            for conexion in connections.all():
+                stack.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        db_ms = registro.segundos * 1000
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.1f};desc="{registro.total} consultas"',
+            f'repetidas;desc="{registro.repetidas}"',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        datos = {
+            'metodo': request.method,
+            'ruta': request.get_full_path(),
+            'estado': response.status_code,
+            'consultas': registro.total,
+            'repetidas': registro.repetidas,
+            'db_ms': round(db_ms, 1),
+            'total_ms': round(total_ms, 1),
+        }
+        logger.info(' '.join(f'{clave}={valor}' for clave, valor in datos.items()), extra=datos)
+
+        if total_ms >= settings.MEDICION_UMBRAL_LENTO_MS:
+            repetidas = registro.mas_repetidas(settings.MEDICION_TOP_REPETIDAS)
+            detalle = ''.join(f'\n  {veces}x {sql}' for sql, veces in repetidas)
+            logger.warning(
+                'Petición lenta: %s %s (%.1f ms, %d consultas)%s',
+                request.method, request.get_full_path(), total_ms, registro.total, detalle,
+                extra={**datos, 'sentencias_repetidas': repetidas}
+            )
+        return response
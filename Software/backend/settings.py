@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'seguridad_social',
     'proyectos',
     'cronograma',
+    'tareas',
 ]
 
 MIDDLEWARE = [
@@ -52,6 +53,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Solo se usa con MEDICION_CONSULTAS=True
+    'backend.middleware.MedicionConsultasMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -125,6 +128,40 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Tamaño de página por defecto de /api/trabajadores/ (paginación por cursor)
+TRABAJADORES_PAGE_SIZE = int(os.getenv('TRABAJADORES_PAGE_SIZE', '100'))
+
+# Segundos que se guardan en caché las estadísticas del tablero
+ESTADISTICAS_CACHE_SEGUNDOS = int(os.getenv('ESTADISTICAS_CACHE_SEGUNDOS', '60'))
+
+# Libros exportados a Excel guardados en disco (se eliminan los menos usados al superar el tamaño)
+EXPORTACION_CACHE_DIR = os.getenv('EXPORTACION_CACHE_DIR', str(BASE_DIR / 'media' / 'exportaciones'))
+EXPORTACION_CACHE_MAX_MB = int(os.getenv('EXPORTACION_CACHE_MAX_MB', '200'))
+
+# Segundos sin reporte de avance tras los que una tarea en proceso se marca como fallida
+# (el proceso run_jobs que la ejecutaba se detuvo)
+TAREAS_SEGUNDOS_SIN_AVANCE = int(os.getenv('TAREAS_SEGUNDOS_SIN_AVANCE', '900'))
+
+# Medición de consultas SQL y tiempos por petición (encabezado Server-Timing y log)
+MEDICION_CONSULTAS = os.getenv('MEDICION_CONSULTAS', 'False') == 'True'
+MEDICION_UMBRAL_LENTO_MS = int(os.getenv('MEDICION_UMBRAL_LENTO_MS', '500'))
+MEDICION_TOP_REPETIDAS = int(os.getenv('MEDICION_TOP_REPETIDAS', '5'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'backend.consultas': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # CORS
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 
@@ -0,0 +1,60 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from trabajadores.models import Trabajador
+from .middleware import RegistroConsultas
+
+
+class MedicionConsultasTests(TestCase):
+    """Pruebas del middleware de medición de consultas"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('admin', password='admin')
+
+    def cliente(self):
+        # El cliente carga los middleware en su primera petición
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+        return client
+
+    def test_desactivado_por_defecto(self):
+        response = self.cliente().get('/api/trabajadores/')
+
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(MEDICION_CONSULTAS=True, MEDICION_UMBRAL_LENTO_MS=100000)
+    def test_agrega_server_timing_y_log(self):
+        with self.assertLogs('backend.consultas', 'INFO') as logs:
+            response = self.cliente().get('/api/trabajadores/', {'anio': 2025, 'fields': 'id'})
+
+        self.assertEqual(response.status_code, 200)
+        # Marca de modificación + listado
+        self.assertIn('desc="2 consultas"', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].consultas, 2)
+        self.assertIn('ruta=/api/trabajadores/?anio=2025&fields=id', logs.output[0])
+
+    @override_settings(MEDICION_CONSULTAS=True, MEDICION_UMBRAL_LENTO_MS=0)
+    def test_peticion_lenta_registra_sentencias_repetidas(self):
+        with self.assertLogs('backend.consultas', 'INFO') as logs:
+            self.cliente().get('/api/trabajadores/')
+
+        lenta = logs.records[-1]
+        self.assertEqual(lenta.levelname, 'WARNING')
+        self.assertIn('Petición lenta: GET /api/trabajadores/', lenta.getMessage())
+
+    def test_registro_cuenta_sentencias_repetidas(self):
+        registro = RegistroConsultas()
+        with connection.execute_wrapper(registro):
+            for numero in ('1', '2', '3'):
+                Trabajador.objects.filter(numero=numero).exists()
+            Trabajador.objects.count()
+
+        self.assertEqual(registro.total, 4)
+        self.assertEqual(registro.repetidas, 2)
+        (sql, veces), = registro.mas_repetidas(5)
+        self.assertEqual(veces, 3)
+        self.assertIn('"numero"', sql)
@@ -22,4 +22,6 @@ urlpatterns = [
     path('api/auth/', include('authentication.urls')),
     path('api/', include('trabajadores.urls')),
     path('api/', include('contratacion.urls')),
+    path('api/', include('cronograma.urls')),
+    path('api/', include('tareas.urls')),
 ]
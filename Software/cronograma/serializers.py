@@ -33,3 +33,30 @@ class CronogramaSerializer(serializers.ModelSerializer):
             9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'
         }
         return f"{meses[obj.mes.month]} {obj.mes.year}"
+
+
+class CronogramaLoteSerializer(serializers.ModelSerializer):
+    """
+    Registro de la carga masiva de cronograma.
+    Valida solo el contenido; la existencia del trabajador y los registros
+    repetidos se revisan para todo el lote en la vista.
+    """
+
+    trabajador = serializers.IntegerField()
+
+    class Meta:
+        model = Cronograma
+        fields = [
+            'trabajador',
+            'mes',
+            'municipio_ejecucion',
+            'salario_cotizacion',
+            'dias_laborados',
+            'sueldo_devengado'
+        ]
+        # La unicidad (trabajador, mes) la resuelve el upsert
+        validators = []
+
+    def validate_mes(self, value):
+        """El cronograma se guarda con el primer día del mes"""
+        return value.replace(day=1)
@@ -1,3 +1,150 @@
+import json
+from datetime import date
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from trabajadores.models import Trabajador
+from .models import Cronograma
+
+
+def crear_trabajador(numero, anio=2025, meses=()):
+    """Crea un trabajador con cronograma en los meses indicados"""
+    trabajador = Trabajador.objects.create(
+        tipo='CC',
+        numero=numero,
+        fecha_expedicion_cedula=date(2000, 1, 1),
+        fecha_nacimiento=date(1982, 1, 1),
+        primer_apellido='PEREZ',
+        primer_nombre=f'NOMBRE{numero}',
+        anio=anio,
+    )
+    for mes in meses:
+        Cronograma.objects.create(
+            trabajador=trabajador,
+            mes=date(anio, mes, 1),
+            municipio_ejecucion='PASTO',
+            salario_cotizacion=1423500,
+            dias_laborados=mes,
+            sueldo_devengado=47450,
+        )
+    return trabajador
+
+
+class MatrizCronogramaTests(TestCase):
+    """Pruebas de la matriz trabajador × mes (/api/cronograma/matriz/)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def obtener_matriz(self, **params):
+        response = self.client.get('/api/cronograma/matriz/', params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_matriz_ubica_cada_mes_en_su_posicion(self):
+        sin_cronograma = crear_trabajador('1')
+        con_cronograma = crear_trabajador('2', meses=[1, 6, 12])
+        crear_trabajador('3', anio=2024, meses=[2])
+
+        matriz = self.obtener_matriz(anio=2025)
+
+        self.assertEqual(matriz['meses'][0], '2025-01-01')
+        self.assertEqual(len(matriz['filas']), 2)
+        columnas = matriz['columnas']
+        vacia = dict(zip(columnas, matriz['filas'][0]))
+        self.assertEqual(vacia['id'], sin_cronograma.id)
+        self.assertEqual(vacia['dias_laborados'], [None] * 12)
+
+        fila = dict(zip(columnas, matriz['filas'][1]))
+        self.assertEqual(fila['id'], con_cronograma.id)
+        self.assertEqual(fila['nombre_completo'], 'NOMBRE2 PEREZ')
+        self.assertEqual(fila['dias_laborados'], [1, None, None, None, None, 6, None, None, None, None, None, 12])
+        self.assertEqual(fila['municipio_ejecucion'][5], 'PASTO')
+        self.assertEqual(fila['salario_cotizacion'][0], 1423500.0)
+        self.assertEqual(fila['sueldo_devengado'][11], 47450.0)
+
+    def test_matriz_usa_dos_consultas(self):
+        for numero in range(5):
+            crear_trabajador(str(numero), meses=range(1, 13))
+
+        with self.assertNumQueries(2):
+            matriz = self.obtener_matriz(anio=2025)
+        self.assertEqual(len(matriz['filas']), 5)
+
+    def test_anio_invalido(self):
+        response = self.client.get('/api/cronograma/matriz/', {'anio': 'x'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class LoteCronogramaTests(TestCase):
+    """Pruebas de la carga masiva de cronograma (/api/cronograma/lote/)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        self.trabajadores = [crear_trabajador(str(numero)) for numero in range(3)]
+
+    def registro(self, trabajador, mes='2025-10-01', **datos):
+        registro = {
+            'trabajador': trabajador.id,
+            'mes': mes,
+            'municipio_ejecucion': 'PASTO',
+            'salario_cotizacion': '1423500.00',
+            'dias_laborados': 30,
+            'sueldo_devengado': '1423500.00',
+        }
+        registro.update(datos)
+        return registro
+
+    def test_lote_crea_y_actualiza_por_trabajador_y_mes(self):
+        existente = crear_trabajador('9', meses=[10])
+        registros = [self.registro(t) for t in self.trabajadores]
+        registros.append(self.registro(existente, mes='2025-10-15', municipio_ejecucion='IPIALES', dias_laborados=12))
+
+        response = self.client.post('/api/cronograma/lote/', registros, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'procesados': 4, 'creados': 3, 'actualizados': 1})
+        self.assertEqual(Cronograma.objects.filter(mes=date(2025, 10, 1)).count(), 4)
+        actualizado = Cronograma.objects.get(trabajador=existente)
+        self.assertEqual(actualizado.municipio_ejecucion, 'IPIALES')
+        self.assertEqual(actualizado.dias_laborados, 12)
+        self.assertEqual(actualizado.anio, 2025)
+
+    def test_lote_con_errores_no_guarda_nada(self):
+        otro_anio = crear_trabajador('8', anio=2024)
+        registros = [
+            self.registro(self.trabajadores[0]),
+            self.registro(self.trabajadores[1], dias_laborados='treinta'),
+            self.registro(self.trabajadores[0], mes='2025-10-20'),
+            {**self.registro(self.trabajadores[2]), 'trabajador': 999999},
+            self.registro(otro_anio),
+        ]
+
+        response = self.client.post('/api/cronograma/lote/', registros, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        errores = {error['fila']: error['errores'] for error in response.data['errores']}
+        self.assertEqual(sorted(errores), [1, 2, 3, 4])
+        self.assertIn('dias_laborados', errores[1])
+        self.assertIn('mes', errores[2])
+        self.assertIn('trabajador', errores[3])
+        self.assertIn('mes', errores[4])
+        self.assertFalse(Cronograma.objects.exists())
+
+    def test_lote_usa_consultas_constantes(self):
+        for cantidad in (1, 3):
+            registros = [self.registro(t) for t in self.trabajadores[:cantidad]]
+            # Trabajadores + existentes + upsert (con su savepoint) + snapshot (6 lecturas y un upsert)
+            with self.assertNumQueries(12):
+                response = self.client.post('/api/cronograma/lote/', registros, format='json')
+            self.assertEqual(response.status_code, 200)
+
+    def test_lote_requiere_lista(self):
+        response = self.client.post('/api/cronograma/lote/', {'trabajador': 1}, format='json')
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 400)
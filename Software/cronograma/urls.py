@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import CronogramaViewSet
+
+router = DefaultRouter()
+router.register(r'cronograma', CronogramaViewSet, basename='cronograma')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -1,3 +1,209 @@
-from django.shortcuts import render
+import json
+from datetime import date
 
-# Create your views here.
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from trabajadores.models import Trabajador
+from trabajadores.snapshot import actualizar_snapshots
+from .models import Cronograma
+from .serializers import CronogramaLoteSerializer
+
+
+# Columnas de cada fila de la matriz; las 4 últimas son listas de 12 meses
+COLUMNAS_MATRIZ = [
+    'id',
+    'tipo',
+    'numero',
+    'nombre_completo',
+    'municipio_ejecucion',
+    'salario_cotizacion',
+    'dias_laborados',
+    'sueldo_devengado',
+]
+
+
+def _decimal(valor):
+    return float(valor) if valor is not None else None
+
+
+def filas_matriz(anio):
+    """
+    Genera una fila por trabajador del año: datos del trabajador y cuatro
+    listas de 12 posiciones (enero a diciembre, None si no hay registro).
+
+    Trabajadores y cronogramas se recorren ordenados por trabajador y se
+    combinan en un solo paso, así la memoria no depende del total de filas.
+    """
+    trabajadores = Trabajador.objects.filter(anio=anio).only(
+        'id', 'tipo', 'numero', 'primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido'
+    ).order_by('id')
+    cronogramas = Cronograma.objects.filter(anio=anio).order_by('trabajador_id', 'mes').values_list(
+        'trabajador_id', 'mes', 'municipio_ejecucion', 'salario_cotizacion', 'dias_laborados', 'sueldo_devengado'
+    )
+
+    cronogramas = cronogramas.iterator(chunk_size=2000)
+    siguiente = next(cronogramas, None)
+    for trabajador in trabajadores.iterator(chunk_size=2000):
+        municipios, salarios, dias, sueldos = [None] * 12, [None] * 12, [None] * 12, [None] * 12
+        # Cronogramas de trabajadores de otro año (no incluidos en el listado)
+        while siguiente is not None and siguiente[0] < trabajador.id:
+            siguiente = next(cronogramas, None)
+        while siguiente is not None and siguiente[0] == trabajador.id:
+            _, mes, municipio, salario, dias_laborados, sueldo = siguiente
+            indice = mes.month - 1
+            municipios[indice] = municipio
+            salarios[indice] = _decimal(salario)
+            dias[indice] = dias_laborados
+            sueldos[indice] = _decimal(sueldo)
+            siguiente = next(cronogramas, None)
+
+        yield [
+            trabajador.id,
+            trabajador.tipo,
+            trabajador.numero,
+            trabajador.nombre_completo,
+            municipios,
+            salarios,
+            dias,
+            sueldos,
+        ]
+
+
+def matriz_json(anio):
+    """Serializa la matriz como JSON en bloques (una fila por bloque)"""
+    meses = [date(anio, mes, 1).isoformat() for mes in range(1, 13)]
+    yield '{"anio": %d, "meses": %s, "columnas": %s, "filas": [' % (
+        anio, json.dumps(meses), json.dumps(COLUMNAS_MATRIZ)
+    )
+    separador = ''
+    for fila in filas_matriz(anio):
+        yield separador + json.dumps(fila, ensure_ascii=False)
+        separador = ', '
+    yield ']}'
+
+
+class CronogramaViewSet(viewsets.GenericViewSet):
+    """
+    ViewSet para consultas y carga masiva del cronograma de todos los trabajadores.
+    """
+    queryset = Cronograma.objects.all()
+
+    # Máximo de registros por petición de carga masiva
+    max_registros_lote = 5000
+
+    @action(detail=False, methods=['get'])
+    def matriz(self, request):
+        """
+        Matriz trabajador × mes del cronograma de un año
+        GET /api/cronograma/matriz/?anio=2025
+
+        Cada fila trae el trabajador y cuatro listas de 12 meses
+        (municipio, salario de cotización, días laborados y sueldo
+        devengado). La respuesta se envía por bloques.
+        """
+        try:
+            anio = int(request.query_params.get('anio', 2025))
+        except ValueError:
+            return Response(
+                {'error': 'El parámetro anio debe ser un número'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return StreamingHttpResponse(matriz_json(anio), content_type='application/json')
+
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Carga masiva de cronograma (crea o actualiza por trabajador y mes)
+        POST /api/cronograma/lote/
+        Body: [{trabajador, mes, municipio_ejecucion, salario_cotizacion,
+                dias_laborados, sueldo_devengado}, ...]
+
+        El lote se valida completo; si algún registro tiene errores no se
+        guarda nada y se responden los errores por fila (índice en la lista).
+        """
+        registros = request.data
+        if not isinstance(registros, list):
+            return Response(
+                {'error': 'Se espera una lista de registros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(registros) > self.max_registros_lote:
+            return Response(
+                {'error': f'Máximo {self.max_registros_lote} registros por lote'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        errores = {}
+        validos = []
+        for fila, registro in enumerate(registros):
+            serializer = CronogramaLoteSerializer(data=registro)
+            if serializer.is_valid():
+                validos.append((fila, serializer.validated_data))
+            else:
+                errores[fila] = serializer.errors
+
+        # Trabajadores del lote en una sola consulta
+        anios = dict(Trabajador.objects.filter(
+            id__in={datos['trabajador'] for _, datos in validos}
+        ).values_list('id', 'anio'))
+
+        vistos = set()
+        for fila, datos in validos:
+            trabajador_id, mes = datos['trabajador'], datos['mes']
+            if trabajador_id not in anios:
+                errores[fila] = {'trabajador': [f'El trabajador {trabajador_id} no existe']}
+            elif anios[trabajador_id] != mes.year:
+                errores[fila] = {'mes': [f'El trabajador {trabajador_id} pertenece al año {anios[trabajador_id]}']}
+            elif (trabajador_id, mes) in vistos:
+                errores[fila] = {'mes': ['Registro repetido en el lote para este trabajador y mes']}
+            vistos.add((trabajador_id, mes))
+
+        if errores:
+            return Response(
+                {'errores': [{'fila': fila, 'errores': errores[fila]} for fila in sorted(errores)]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        existentes = set(Cronograma.objects.filter(
+            trabajador_id__in=anios.keys(),
+            mes__in={mes for _, mes in vistos}
+        ).values_list('trabajador_id', 'mes'))
+
+        cronogramas = [
+            Cronograma(
+                trabajador_id=datos['trabajador'],
+                mes=datos['mes'],
+                anio=datos['mes'].year,
+                municipio_ejecucion=datos['municipio_ejecucion'],
+                salario_cotizacion=datos['salario_cotizacion'],
+                dias_laborados=datos['dias_laborados'],
+                sueldo_devengado=datos['sueldo_devengado'],
+            )
+            for _, datos in validos
+        ]
+        with transaction.atomic():
+            Cronograma.objects.bulk_create(
+                cronogramas,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['trabajador', 'mes'],
+                update_fields=[
+                    'anio', 'municipio_ejecucion', 'salario_cotizacion',
+                    'dias_laborados', 'sueldo_devengado', 'fecha_actualizacion'
+                ],
+            )
+            # bulk_create no envía señales: se recalcula el snapshot de los trabajadores del lote
+            actualizar_snapshots([
+                Trabajador(id=trabajador_id, anio=anio) for trabajador_id, anio in anios.items()
+            ])
+
+        actualizados = len(vistos & existentes)
+        return Response({
+            'procesados': len(cronogramas),
+            'creados': len(cronogramas) - actualizados,
+            'actualizados': actualizados,
+        })
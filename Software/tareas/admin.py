@@ -0,0 +1,34 @@
+from django.contrib import admin
+from .models import Tarea
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'tipo',
+        'estado',
+        'usuario',
+        'filas_procesadas',
+        'filas_totales',
+        'fecha_creacion',
+        'fecha_fin'
+    ]
+
+    list_filter = [
+        'tipo',
+        'estado'
+    ]
+
+    ordering = ['-fecha_creacion']
+
+    readonly_fields = [
+        'filas_procesadas',
+        'filas_totales',
+        'resultado',
+        'mensaje',
+        'fecha_creacion',
+        'fecha_inicio',
+        'fecha_fin',
+        'fecha_actualizacion'
+    ]
@@ -0,0 +1,111 @@
+"""
+Ejecución de las tareas en segundo plano.
+
+Cada tipo de tarea reporta su avance con `ReporteProgreso`, que guarda en
+la tabla las filas procesadas como máximo una vez por segundo para que el
+seguimiento no frene la importación o exportación.
+"""
+import os
+import time
+from datetime import datetime
+from io import StringIO
+
+from django.core.files import File
+from django.core.management import call_command
+from django.utils import timezone
+
+from trabajadores.exportacion import PLANTILLA_NOVEDADES, generar_libro_novedades
+from trabajadores.models import Trabajador
+from .models import Tarea
+
+
+# Segundos mínimos entre dos escrituras del avance en la base de datos
+INTERVALO_PROGRESO = 1.0
+
+
+class ErrorTarea(Exception):
+    """Error de negocio al ejecutar una tarea (se guarda como mensaje)"""
+
+
+class ReporteProgreso:
+    """Callback de avance: progreso(filas_procesadas, filas_totales=None)"""
+
+    def __init__(self, tarea):
+        self.tarea = tarea
+        self.ultima_escritura = None
+
+    def __call__(self, procesadas, totales=None):
+        self.tarea.filas_procesadas = procesadas
+        if totales is not None:
+            self.tarea.filas_totales = totales
+
+        ahora = time.monotonic()
+        if self.ultima_escritura is None or ahora - self.ultima_escritura >= INTERVALO_PROGRESO:
+            self.ultima_escritura = ahora
+            Tarea.objects.filter(pk=self.tarea.pk).update(
+                filas_procesadas=self.tarea.filas_procesadas,
+                filas_totales=self.tarea.filas_totales,
+                fecha_actualizacion=timezone.now()
+            )
+
+
+def _importar(tarea, progreso):
+    """Importa el libro subido con el comando importar_excel"""
+    from trabajadores.management.commands.importar_excel import Command as ImportarExcel
+
+    if not tarea.archivo_entrada:
+        raise ErrorTarea('La tarea no tiene archivo para importar')
+
+    parametros = tarea.parametros
+    comando = ImportarExcel()
+    comando.progreso = progreso
+    call_command(
+        comando,
+        file=tarea.archivo_entrada.path,
+        anio=parametros.get('anio', 2025),
+        sheet=parametros.get('sheet'),
+        batch_size=parametros.get('batch_size', 0),
+        forzar=parametros.get('forzar', False),
+        stdout=StringIO(),
+    )
+    if comando.error:
+        raise ErrorTarea(comando.error)
+
+    # Al terminar se conoce el total real de filas leídas
+    tarea.filas_totales = tarea.filas_procesadas
+    tarea.resultado = comando.resumen
+
+
+def _exportar(tarea, progreso):
+    """Genera el libro NOVEDADES de los años pedidos y lo guarda como resultado"""
+    anios = tarea.parametros.get('anios', [2024, 2025])
+    if not os.path.exists(PLANTILLA_NOVEDADES):
+        raise ErrorTarea(f'Plantilla no encontrada: {PLANTILLA_NOVEDADES}')
+
+    progreso(0, Trabajador.objects.filter(anio__in=anios).count())
+    archivo = generar_libro_novedades(anios, PLANTILLA_NOVEDADES, progreso=progreso)
+    try:
+        filename = f'RELACION_PERSONAL_EXPORT_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+        tarea.archivo_resultado.save(filename, File(archivo), save=False)
+    finally:
+        archivo.close()
+    tarea.resultado = {'anios': anios, 'trabajadores': tarea.filas_procesadas}
+
+
+EJECUTORES = {
+    Tarea.TIPO_IMPORTAR: _importar,
+    Tarea.TIPO_EXPORTAR: _exportar,
+}
+
+
+def ejecutar_tarea(tarea):
+    """Ejecuta una tarea ya reclamada y guarda su estado final"""
+    try:
+        EJECUTORES[tarea.tipo](tarea, ReporteProgreso(tarea))
+        tarea.estado = Tarea.ESTADO_COMPLETADA
+    except Exception as e:
+        tarea.estado = Tarea.ESTADO_FALLIDA
+        tarea.mensaje = str(e)
+    tarea.fecha_fin = timezone.now()
+    tarea.save()
+    return tarea
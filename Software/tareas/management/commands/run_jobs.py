@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from tareas.ejecucion import ejecutar_tarea
+from tareas.models import Tarea
+import time
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas en segundo plano (importaciones y exportaciones de Excel)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesar las tareas pendientes y terminar (sin esperar nuevas)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Segundos de espera cuando no hay tareas pendientes',
+            default=2.0
+        )
+
+    def handle(self, *args, **options):
+        una_vez = options['una_vez']
+        intervalo = options['intervalo']
+
+        self.stdout.write(self.style.SUCCESS('Esperando tareas...' if not una_vez else 'Procesando tareas pendientes...'))
+
+        try:
+            while True:
+                tarea = Tarea.objects.reclamar()
+                if tarea is None:
+                    if una_vez:
+                        break
+                    time.sleep(intervalo)
+                    continue
+
+                self.stdout.write(f'\n[>] {tarea}')
+                ejecutar_tarea(tarea)
+                if tarea.estado == Tarea.ESTADO_COMPLETADA:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'  [OK] {tarea.filas_procesadas} filas en {tarea.segundos_transcurridos:.1f} s'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f'  [X] {tarea.mensaje}'))
+
+        except KeyboardInterrupt:
+            self.stdout.write('\nDetenido')
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-18 01:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('IMPORTAR', 'Importar Excel'), ('EXPORTAR', 'Exportar Excel')], max_length=20, verbose_name='Tipo')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En Proceso'), ('COMPLETADA', 'Completada'), ('FALLIDA', 'Fallida')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('archivo_entrada', models.FileField(blank=True, upload_to='tareas/entradas/', verbose_name='Archivo de Entrada')),
+                ('archivo_resultado', models.FileField(blank=True, upload_to='tareas/resultados/', verbose_name='Archivo Resultado')),
+                ('filas_procesadas', models.PositiveIntegerField(default=0, verbose_name='Filas Procesadas')),
+                ('filas_totales', models.PositiveIntegerField(blank=True, help_text='Estimado; vacío si no se conoce', null=True, verbose_name='Filas Totales')),
+                ('resultado', models.JSONField(blank=True, default=dict, help_text='Resumen de la ejecución (ej: creados, actualizados, errores)', verbose_name='Resultado')),
+                ('mensaje', models.TextField(blank=True, default='', help_text='Detalle del error si la tarea falló', verbose_name='Mensaje')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Inicio')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tareas', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Tarea',
+                'verbose_name_plural': 'Tareas',
+                'db_table': 'tareas',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='tarea_estado_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,219 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+
+class TareaQuerySet(models.QuerySet):
+    """QuerySet con las operaciones de la cola de tareas"""
+
+    def sin_avance(self):
+        """
+        Tareas en proceso cuyo `fecha_actualizacion` (la renueva el reporte
+        de avance) tiene más de TAREAS_SEGUNDOS_SIN_AVANCE: el proceso que
+        las ejecutaba terminó sin guardar el estado final.
+        """
+        limite = timezone.now() - timedelta(seconds=settings.TAREAS_SEGUNDOS_SIN_AVANCE)
+        return self.filter(estado=Tarea.ESTADO_EN_PROCESO, fecha_actualizacion__lt=limite)
+
+    def marcar_sin_avance(self):
+        """
+        Marca como fallidas las tareas sin avance. No se reencolan: la tarea
+        pudo ser la causa de que el proceso terminara. Retorna cuántas marcó.
+        """
+        ahora = timezone.now()
+        return self.sin_avance().update(
+            estado=Tarea.ESTADO_FALLIDA,
+            mensaje=(
+                f'La tarea no reportó avance en {settings.TAREAS_SEGUNDOS_SIN_AVANCE} segundos: '
+                'el proceso que la ejecutaba se detuvo. Vuelva a encolarla.'
+            ),
+            fecha_fin=ahora,
+            fecha_actualizacion=ahora
+        )
+
+    def reclamar(self):
+        """
+        Toma la tarea pendiente más antigua y la marca en proceso.
+        SKIP LOCKED permite varios procesos `run_jobs` sin tomar la misma tarea.
+        Antes marca como fallidas las tareas en proceso sin avance.
+        Retorna la tarea o None si la cola está vacía.
+        """
+        self.marcar_sin_avance()
+        with transaction.atomic():
+            tarea = (
+                self.select_for_update(skip_locked=True)
+                .filter(estado=Tarea.ESTADO_PENDIENTE)
+                .order_by('fecha_creacion', 'id')
+                .first()
+            )
+            if tarea is None:
+                return None
+            tarea.estado = Tarea.ESTADO_EN_PROCESO
+            tarea.fecha_inicio = timezone.now()
+            tarea.save(update_fields=['estado', 'fecha_inicio', 'fecha_actualizacion'])
+        return tarea
+
+
+class Tarea(models.Model):
+    """
+    Tarea en segundo plano (importación o exportación de Excel).
+    La ejecuta el comando `run_jobs`; el estado y el avance quedan en la tabla.
+    """
+
+    TIPO_IMPORTAR = 'IMPORTAR'
+    TIPO_EXPORTAR = 'EXPORTAR'
+    TIPO_CHOICES = [
+        (TIPO_IMPORTAR, 'Importar Excel'),
+        (TIPO_EXPORTAR, 'Exportar Excel'),
+    ]
+
+    ESTADO_PENDIENTE = 'PENDIENTE'
+    ESTADO_EN_PROCESO = 'EN_PROCESO'
+    ESTADO_COMPLETADA = 'COMPLETADA'
+    ESTADO_FALLIDA = 'FALLIDA'
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_EN_PROCESO, 'En Proceso'),
+        (ESTADO_COMPLETADA, 'Completada'),
+        (ESTADO_FALLIDA, 'Fallida'),
+    ]
+
+    tipo = models.CharField(
+        max_length=20,
+        choices=TIPO_CHOICES,
+        verbose_name='Tipo'
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default=ESTADO_PENDIENTE,
+        verbose_name='Estado'
+    )
+
+    # Opciones de la tarea (año, hoja, años a exportar, etc.)
+    parametros = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Parámetros'
+    )
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='tareas',
+        verbose_name='Usuario'
+    )
+
+    archivo_entrada = models.FileField(
+        upload_to='tareas/entradas/',
+        blank=True,
+        verbose_name='Archivo de Entrada'
+    )
+
+    archivo_resultado = models.FileField(
+        upload_to='tareas/resultados/',
+        blank=True,
+        verbose_name='Archivo Resultado'
+    )
+
+    # Avance
+    filas_procesadas = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Filas Procesadas'
+    )
+
+    filas_totales = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Filas Totales',
+        help_text='Estimado; vacío si no se conoce'
+    )
+
+    resultado = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Resultado',
+        help_text='Resumen de la ejecución (ej: creados, actualizados, errores)'
+    )
+
+    mensaje = models.TextField(
+        blank=True,
+        default='',
+        verbose_name='Mensaje',
+        help_text='Detalle del error si la tarea falló'
+    )
+
+    # Campos de auditoría
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de Creación'
+    )
+
+    fecha_inicio = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de Inicio'
+    )
+
+    fecha_fin = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de Finalización'
+    )
+
+    fecha_actualizacion = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Última Actualización'
+    )
+
+    objects = TareaQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        ordering = ['-fecha_creacion']
+        db_table = 'tareas'
+        indexes = [
+            # Búsqueda de la siguiente tarea pendiente
+            models.Index(fields=['estado', 'fecha_creacion'], name='tarea_estado_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.id} ({self.get_estado_display()})"
+
+    @property
+    def segundos_transcurridos(self):
+        """Segundos desde el inicio hasta el fin (o hasta ahora si sigue en proceso)"""
+        if not self.fecha_inicio:
+            return None
+        return ((self.fecha_fin or timezone.now()) - self.fecha_inicio).total_seconds()
+
+    @property
+    def filas_por_segundo(self):
+        """Velocidad promedio de procesamiento"""
+        segundos = self.segundos_transcurridos
+        if not segundos or not self.filas_procesadas:
+            return None
+        return round(self.filas_procesadas / segundos, 1)
+
+    @property
+    def porcentaje(self):
+        """Porcentaje de avance (None si no se conoce el total)"""
+        if self.estado == self.ESTADO_COMPLETADA:
+            return 100
+        if not self.filas_totales:
+            return None
+        return min(round(self.filas_procesadas * 100 / self.filas_totales, 1), 100)
+
+    @property
+    def eta_segundos(self):
+        """Segundos estimados para terminar según la velocidad actual"""
+        velocidad = self.filas_por_segundo
+        if self.estado != self.ESTADO_EN_PROCESO or not velocidad or not self.filas_totales:
+            return None
+        return max(round((self.filas_totales - self.filas_procesadas) / velocidad), 0)
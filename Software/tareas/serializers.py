@@ -0,0 +1,72 @@
+from rest_framework import serializers
+from .models import Tarea
+
+
+class TareaSerializer(serializers.ModelSerializer):
+    """Serializer de una tarea con su avance"""
+
+    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    porcentaje = serializers.ReadOnlyField()
+    filas_por_segundo = serializers.ReadOnlyField()
+    eta_segundos = serializers.ReadOnlyField()
+    segundos_transcurridos = serializers.ReadOnlyField()
+    url_descarga = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Tarea
+        fields = [
+            'id',
+            'tipo',
+            'tipo_display',
+            'estado',
+            'estado_display',
+            'parametros',
+            'filas_procesadas',
+            'filas_totales',
+            'porcentaje',
+            'filas_por_segundo',
+            'eta_segundos',
+            'segundos_transcurridos',
+            'resultado',
+            'mensaje',
+            'url_descarga',
+            'fecha_creacion',
+            'fecha_inicio',
+            'fecha_fin',
+            'fecha_actualizacion'
+        ]
+        read_only_fields = fields
+
+    def get_url_descarga(self, obj):
+        """URL para descargar el archivo generado (solo exportaciones completadas)"""
+        if obj.estado != Tarea.ESTADO_COMPLETADA or not obj.archivo_resultado:
+            return None
+        url = f'/api/tareas/{obj.id}/descargar/'
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class ImportarTareaSerializer(serializers.Serializer):
+    """Datos para encolar una importación de Excel"""
+
+    archivo = serializers.FileField()
+    anio = serializers.IntegerField(default=2025)
+    sheet = serializers.CharField(required=False, allow_null=True, default=None)
+    batch_size = serializers.IntegerField(min_value=0, default=500)
+    forzar = serializers.BooleanField(default=False)
+
+    def validate_archivo(self, value):
+        if not value.name.lower().endswith('.xlsx'):
+            raise serializers.ValidationError('El archivo debe ser .xlsx')
+        return value
+
+
+class ExportarTareaSerializer(serializers.Serializer):
+    """Datos para encolar una exportación de Excel"""
+
+    anios = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        default=[2024, 2025]
+    )
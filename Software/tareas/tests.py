@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from openpyxl import load_workbook
+
+from trabajadores.models import Trabajador
+from trabajadores.tests import crear_libro_novedades, crear_trabajador, fila_novedades
+from .models import Tarea
+
+
+class TareasTests(TestCase):
+    """Pruebas de la cola de tareas en segundo plano"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.usuario = User.objects.create_user('admin', password='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def ejecutar_tareas(self):
+        call_command('run_jobs', una_vez=True, stdout=StringIO())
+
+    def test_importar_en_segundo_plano(self):
+        path = os.path.join(self.media, 'novedades.xlsx')
+        crear_libro_novedades(path, [fila_novedades(i) for i in range(1, 6)])
+
+        with open(path, 'rb') as archivo:
+            response = self.client.post(
+                '/api/tareas/importar/', {'archivo': archivo, 'anio': 2025, 'batch_size': 2}, format='multipart'
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['estado'], Tarea.ESTADO_PENDIENTE)
+        self.assertFalse(Trabajador.objects.exists())
+
+        self.ejecutar_tareas()
+
+        tarea = self.client.get(f"/api/tareas/{response.data['id']}/").data
+        self.assertEqual(tarea['estado'], Tarea.ESTADO_COMPLETADA)
+        self.assertEqual(tarea['filas_procesadas'], 5)
+        self.assertEqual(tarea['porcentaje'], 100)
+        self.assertEqual(tarea['resultado']['creados'], 5)
+        self.assertIsNotNone(tarea['filas_por_segundo'])
+        self.assertEqual(Trabajador.objects.filter(anio=2025).count(), 5)
+
+    def test_exportar_y_descargar(self):
+        for indice in range(3):
+            crear_trabajador(indice, anio=2025)
+
+        response = self.client.post('/api/tareas/exportar/', {'anios': [2025]}, format='json')
+        self.assertEqual(response.status_code, 202)
+        url = f"/api/tareas/{response.data['id']}/"
+
+        # Antes de ejecutarse no hay archivo
+        self.assertEqual(self.client.get(url + 'descargar/').status_code, 404)
+
+        self.ejecutar_tareas()
+
+        tarea = self.client.get(url).data
+        self.assertEqual(tarea['estado'], Tarea.ESTADO_COMPLETADA)
+        self.assertEqual((tarea['filas_procesadas'], tarea['filas_totales']), (3, 3))
+        self.assertTrue(tarea['url_descarga'].endswith(url + 'descargar/'))
+
+        response = self.client.get(url + 'descargar/')
+        self.assertEqual(response.status_code, 200)
+        wb = load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(wb.sheetnames, ['NOVEDADES 2025'])
+        self.assertEqual(wb['NOVEDADES 2025'].max_row, 5)
+
+    def test_tarea_fallida_guarda_el_error(self):
+        path = os.path.join(self.media, 'novedades.xlsx')
+        crear_libro_novedades(path, [fila_novedades(1)])
+
+        with open(path, 'rb') as archivo:
+            response = self.client.post(
+                '/api/tareas/importar/', {'archivo': archivo, 'sheet': 'NO EXISTE'}, format='multipart'
+            )
+        self.ejecutar_tareas()
+
+        tarea = Tarea.objects.get(id=response.data['id'])
+        self.assertEqual(tarea.estado, Tarea.ESTADO_FALLIDA)
+        self.assertIn('NO EXISTE', tarea.mensaje)
+        self.assertIsNotNone(tarea.fecha_fin)
+
+    def test_reclamar_toma_la_mas_antigua(self):
+        primera = Tarea.objects.create(tipo=Tarea.TIPO_EXPORTAR)
+        Tarea.objects.create(tipo=Tarea.TIPO_EXPORTAR)
+
+        tarea = Tarea.objects.reclamar()
+
+        self.assertEqual(tarea.id, primera.id)
+        self.assertEqual(tarea.estado, Tarea.ESTADO_EN_PROCESO)
+        self.assertIsNotNone(tarea.fecha_inicio)
+        self.assertEqual(Tarea.objects.filter(estado=Tarea.ESTADO_PENDIENTE).count(), 1)
+
+    @override_settings(TAREAS_SEGUNDOS_SIN_AVANCE=60)
+    def test_reclamar_marca_fallidas_las_tareas_sin_avance(self):
+        detenida = Tarea.objects.create(tipo=Tarea.TIPO_EXPORTAR)
+        Tarea.objects.reclamar()
+        activa = Tarea.objects.create(tipo=Tarea.TIPO_EXPORTAR)
+        Tarea.objects.reclamar()
+        pendiente = Tarea.objects.create(tipo=Tarea.TIPO_EXPORTAR)
+        # El proceso de la primera dejó de reportar avance hace dos minutos
+        Tarea.objects.filter(id=detenida.id).update(fecha_actualizacion=timezone.now() - timedelta(minutes=2))
+
+        tarea = Tarea.objects.reclamar()
+
+        self.assertEqual(tarea.id, pendiente.id)
+        detenida.refresh_from_db()
+        self.assertEqual(detenida.estado, Tarea.ESTADO_FALLIDA)
+        self.assertIn('60 segundos', detenida.mensaje)
+        self.assertIsNotNone(detenida.fecha_fin)
+        self.assertEqual(Tarea.objects.get(id=activa.id).estado, Tarea.ESTADO_EN_PROCESO)
+
+        # Sin tareas pendientes también se revisan las detenidas
+        Tarea.objects.filter(id=activa.id).update(fecha_actualizacion=timezone.now() - timedelta(minutes=2))
+        self.assertIsNone(Tarea.objects.reclamar())
+        self.assertEqual(Tarea.objects.get(id=activa.id).estado, Tarea.ESTADO_FALLIDA)
+
+    def test_usuario_solo_ve_sus_tareas(self):
+        otro = User.objects.create_user('otro', password='otro')
+        tarea = Tarea.objects.create(tipo=Tarea.TIPO_EXPORTAR, usuario=otro)
+
+        self.assertEqual(self.client.get(f'/api/tareas/{tarea.id}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/tareas/').data, [])
+
+    def test_importar_requiere_xlsx(self):
+        archivo = BytesIO(b'numero;nombre')
+        archivo.name = 'datos.csv'
+
+        response = self.client.post('/api/tareas/importar/', {'archivo': archivo}, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('archivo', response.data)
@@ -0,0 +1,83 @@
+import os
+
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.response import Response
+from django.http import FileResponse
+from .models import Tarea
+from .serializers import TareaSerializer, ImportarTareaSerializer, ExportarTareaSerializer
+
+
+class TareaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet de las tareas en segundo plano.
+    Permite encolar importaciones y exportaciones de Excel, consultar su
+    avance y descargar el resultado. Las ejecuta el comando `run_jobs`.
+    """
+    queryset = Tarea.objects.all()
+    serializer_class = TareaSerializer
+
+    def get_queryset(self):
+        """Cada usuario ve sus tareas; el staff ve todas"""
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(usuario=self.request.user)
+        return queryset
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def importar(self, request):
+        """
+        Encola la importación de un libro NOVEDADES
+        POST /api/tareas/importar/ (multipart: archivo, anio, sheet, batch_size, forzar)
+        """
+        serializer = ImportarTareaSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        datos = serializer.validated_data
+        archivo = datos.pop('archivo')
+        tarea = Tarea(tipo=Tarea.TIPO_IMPORTAR, parametros=datos, usuario=request.user)
+        tarea.archivo_entrada.save(archivo.name, archivo, save=False)
+        tarea.save()
+        return Response(
+            TareaSerializer(tarea, context=self.get_serializer_context()).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, FormParser])
+    def exportar(self, request):
+        """
+        Encola la exportación del libro NOVEDADES
+        POST /api/tareas/exportar/ Body: {"anios": [2024, 2025]}
+        """
+        serializer = ExportarTareaSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        tarea = Tarea.objects.create(
+            tipo=Tarea.TIPO_EXPORTAR,
+            parametros=serializer.validated_data,
+            usuario=request.user
+        )
+        return Response(
+            TareaSerializer(tarea, context=self.get_serializer_context()).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        """Descarga el archivo generado por una exportación completada"""
+        tarea = self.get_object()
+        if tarea.estado != Tarea.ESTADO_COMPLETADA or not tarea.archivo_resultado:
+            return Response(
+                {'error': 'La tarea no tiene un archivo disponible'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return FileResponse(
+            tarea.archivo_resultado.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(tarea.archivo_resultado.name),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class TrabajadoresConfig(AppConfig):
     name = 'trabajadores'
+
+    def ready(self):
+        # Mantenimiento del snapshot trabajador-año
+        from .signals import conectar
+        conectar()
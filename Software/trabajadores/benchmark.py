@@ -0,0 +1,206 @@
+"""
+Escenarios del comando `benchmark`.
+
+Cada escenario recorre una de las rutas más usadas (listado, detalle,
+búsqueda, contratos activos, exportación por API y por comando,
+importación, parseo de filas del libro, CSV por COPY) sobre los datos sintéticos de `generar_datos`. `medir`
+registra la mediana del tiempo, las consultas SQL y el pico de memoria
+de Python (tracemalloc); `comparar_resultados` detecta las regresiones
+frente a una línea base guardada en JSON.
+"""
+import os
+import shutil
+import time
+import tracemalloc
+from io import StringIO
+from statistics import median
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from .csv_novedades import exportar_csv, importar_csv
+from .exportacion import PLANTILLA_NOVEDADES
+from .management.commands.importar_excel import Command as ImportarExcel
+from .models import Trabajador
+
+
+# Año de los datos sintéticos que se miden
+ANIO = 2025
+
+# Diferencia mínima para considerar una regresión (evita falsos positivos por ruido)
+MARGEN_MINIMO = {'segundos': 0.01, 'memoria_mb': 0.5}
+
+
+class ErrorEscenario(Exception):
+    """Un escenario no respondió como se esperaba"""
+
+
+def preparar_datos(tamano, directorio):
+    """
+    Genera `tamano` trabajadores sintéticos del año (y su libro NOVEDADES
+    y su CSV para las importaciones). Retorna el contexto que reciben los
+    escenarios.
+    """
+    libro = os.path.join(directorio, f'novedades_{tamano}.xlsx')
+    csv_path = os.path.join(directorio, f'novedades_{tamano}.csv')
+    call_command(
+        'generar_datos', trabajadores=tamano, anios=str(ANIO), limpiar=True,
+        excel=libro, stdout=StringIO()
+    )
+    with open(csv_path, 'wb') as archivo:
+        exportar_csv(archivo, [ANIO])
+    # Filas del libro ya leídas: el escenario de parseo no mide openpyxl
+    wb = load_workbook(libro, read_only=True, data_only=True)
+    try:
+        filas = [fila for fila in wb.worksheets[0].iter_rows(values_only=True) if fila and isinstance(fila[0], int)]
+    finally:
+        wb.close()
+    usuario, _ = User.objects.get_or_create(username='benchmark')
+    client = APIClient()
+    client.force_authenticate(usuario)
+    return SimpleNamespace(
+        client=client,
+        directorio=directorio,
+        libro=libro,
+        csv=csv_path,
+        filas=filas,
+        trabajador_id=Trabajador.objects.filter(anio=ANIO).order_by('id').values_list('id', flat=True).first(),
+    )
+
+
+def _get(contexto, url, params=None):
+    response = contexto.client.get(url, params)
+    if response.status_code != 200:
+        raise ErrorEscenario(f'GET {url} respondió {response.status_code}')
+    # Consumir el cuerpo: en streaming el trabajo ocurre al iterarlo
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def listado(contexto):
+    """Listado completo del año con todas las relaciones (TrabajadorDetalleSerializer)"""
+    _get(contexto, '/api/trabajadores/', {'anio': ANIO, 'paginar': 'false'})
+
+
+def detalle(contexto):
+    _get(contexto, f'/api/trabajadores/{contexto.trabajador_id}/', {
+        'anio': ANIO, 'expand': 'contratacion,ingreso,retiro,seguridad_social,proyecto'
+    })
+
+
+def busqueda(contexto):
+    _get(contexto, '/api/trabajadores/buscar/', {'q': 'mu', 'anio': ANIO, 'limite': 100})
+
+
+def contratos_activos(contexto):
+    _get(contexto, '/api/contrataciones/contratos_activos/')
+
+
+def exportar_api(contexto):
+    # Sin el libro en caché: se mide la generación completa
+    shutil.rmtree(settings.EXPORTACION_CACHE_DIR, ignore_errors=True)
+    _get(contexto, '/api/trabajadores/exportar-excel/')
+
+
+def exportar_cli(contexto):
+    salida = os.path.join(contexto.directorio, 'exportacion_cli.xlsx')
+    if os.path.exists(salida):
+        os.remove(salida)
+    call_command(
+        'exportar_excel', output=salida, template=PLANTILLA_NOVEDADES, anio=ANIO, stdout=StringIO()
+    )
+
+
+def importar(contexto):
+    call_command(
+        'importar_excel', file=contexto.libro, anio=ANIO, batch_size=500, forzar=True, stdout=StringIO()
+    )
+
+
+def parsear_excel(contexto):
+    """Conversión de las filas del libro (fechas, montos, días, marcas) sin tocar la base de datos"""
+    comando = ImportarExcel()
+    for fila in contexto.filas:
+        comando._parse_row(fila, ANIO)
+
+
+def exportar_csv_copy(contexto):
+    with open(os.path.join(contexto.directorio, 'exportacion.csv'), 'wb') as archivo:
+        exportar_csv(archivo, [ANIO])
+
+
+def importar_csv_copy(contexto):
+    with open(contexto.csv, 'rb') as archivo:
+        importar_csv(archivo, ANIO)
+
+
+ESCENARIOS = {
+    'listado': listado,
+    'detalle': detalle,
+    'busqueda': busqueda,
+    'contratos_activos': contratos_activos,
+    'exportar_api': exportar_api,
+    'exportar_cli': exportar_cli,
+    'importar': importar,
+    'parsear_excel': parsear_excel,
+    'exportar_csv': exportar_csv_copy,
+    'importar_csv': importar_csv_copy,
+}
+
+
+def medir(escenario, contexto, repeticiones=3):
+    """
+    Ejecuta el escenario `repeticiones` veces y una más con tracemalloc.
+    Retorna {'segundos': mediana, 'consultas': de una ejecución, 'memoria_mb': pico}.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            escenario(contexto)
+            tiempos.append(time.perf_counter() - inicio)
+        # Contar aquí: las consultas capturadas se leen del registro de la conexión,
+        # que la siguiente petición limpia
+        consultas = len(capturadas)
+
+    # tracemalloc frena la ejecución: la memoria se mide aparte
+    tracemalloc.start()
+    try:
+        escenario(contexto)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'segundos': round(median(tiempos), 4),
+        'consultas': consultas,
+        'memoria_mb': round(pico / (1024 * 1024), 2),
+    }
+
+
+def comparar_resultados(actuales, baseline, umbral):
+    """
+    Lista de regresiones de `actuales` frente a `baseline` ({clave: métricas}).
+    Las consultas no pueden aumentar; tiempo y memoria pueden crecer hasta
+    `umbral` (0.25 = 25 %) más un margen mínimo contra el ruido.
+    """
+    regresiones = []
+    for clave, actual in actuales.items():
+        anterior = baseline.get(clave)
+        if not anterior:
+            continue
+        if actual['consultas'] > anterior['consultas']:
+            regresiones.append(f'{clave}: consultas {anterior["consultas"]} -> {actual["consultas"]}')
+        for metrica, margen in MARGEN_MINIMO.items():
+            limite = max(anterior[metrica] * (1 + umbral), anterior[metrica] + margen)
+            if actual[metrica] > limite:
+                regresiones.append(f'{clave}: {metrica} {anterior[metrica]} -> {actual[metrica]}')
+    return regresiones
@@ -0,0 +1,112 @@
+"""
+Caché en disco de los libros NOVEDADES exportados.
+
+Cada libro se guarda con una clave calculada a partir de los años
+exportados y una marca de agua de los datos (filas y última
+`fecha_actualizacion` de las siete tablas en esos años). Mientras los
+datos no cambien la clave es la misma, así que el libro se sirve desde
+disco sin regenerarlo; la clave también se usa como ETag. Cuando la
+carpeta supera `EXPORTACION_CACHE_MAX_MB` se eliminan los libros usados
+hace más tiempo.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from contratacion.models import Contratacion
+from ingreso.models import Ingreso
+from retiro.models import Retiro
+from seguridad_social.models import SeguridadSocial
+from proyectos.models import Proyecto
+from cronograma.models import Cronograma
+from .exportacion import generar_libro_novedades
+from .models import Trabajador
+
+
+# Tablas que alimentan el libro NOVEDADES
+MODELOS_EXPORTACION = (Trabajador, Contratacion, Ingreso, Retiro, SeguridadSocial, Proyecto, Cronograma)
+
+# Cambiar al modificar el formato del libro para invalidar lo ya generado
+VERSION_FORMATO = 1
+
+
+def marca_datos(anios):
+    """Filas y última modificación de cada tabla en los años indicados (una consulta por tabla)"""
+    marca = []
+    for model in MODELOS_EXPORTACION:
+        datos = model.objects.filter(anio__in=anios).aggregate(
+            total=Count('id'),
+            ultima=Max('fecha_actualizacion')
+        )
+        marca.append([model._meta.db_table, datos['total'], datos['ultima']])
+    return marca
+
+
+def clave_exportacion(anios, template_path):
+    """Clave del libro: cambia si cambian los años, los datos, la plantilla o el formato"""
+    contenido = json.dumps({
+        'anios': sorted(anios),
+        'marca': marca_datos(anios),
+        'plantilla': os.path.getmtime(template_path),
+        'version': VERSION_FORMATO,
+    }, default=str)
+    return hashlib.sha256(contenido.encode()).hexdigest()[:32]
+
+
+def abrir_exportacion(clave, anios, template_path):
+    """
+    Retorna el libro de la clave abierto en modo binario.
+    Si no está en disco lo genera y lo guarda; si está, lo marca como
+    usado recientemente.
+    """
+    directorio = settings.EXPORTACION_CACHE_DIR
+    ruta = os.path.join(directorio, f'{clave}.xlsx')
+    try:
+        archivo = open(ruta, 'rb')
+    except FileNotFoundError:
+        pass
+    else:
+        os.utime(ruta)
+        return archivo
+
+    os.makedirs(directorio, exist_ok=True)
+    generado = generar_libro_novedades(anios, template_path)
+    try:
+        # Se escribe a un temporal y se renombra para no servir libros a medias
+        with tempfile.NamedTemporaryFile(dir=directorio, suffix='.tmp', delete=False) as destino:
+            shutil.copyfileobj(generado, destino)
+    finally:
+        generado.close()
+    os.replace(destino.name, ruta)
+
+    # Abrirlo antes de purgar: el archivo abierto sigue disponible aunque se elimine
+    archivo = open(ruta, 'rb')
+    purgar_cache(directorio, settings.EXPORTACION_CACHE_MAX_MB * 1024 * 1024)
+    return archivo
+
+
+def purgar_cache(directorio, max_bytes):
+    """Elimina los libros usados hace más tiempo hasta que la carpeta ocupe como máximo `max_bytes`"""
+    libros = []
+    for entrada in os.scandir(directorio):
+        if entrada.name.endswith('.xlsx'):
+            info = entrada.stat()
+            libros.append((info.st_mtime, info.st_size, entrada.path))
+
+    total = sum(tamano for _, tamano, _ in libros)
+    eliminados = 0
+    for _, tamano, ruta in sorted(libros):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+        total -= tamano
+        eliminados += 1
+    return eliminados
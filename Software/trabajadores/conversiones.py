@@ -0,0 +1,87 @@
+"""
+Conversión de los textos de celda del formato NOVEDADES.
+
+Las celdas llegan como texto (ver `formato_novedades.texto_celda`) y
+sus valores se repiten mucho entre filas: fechas de inicio y corte,
+'N/A', salarios redondos, días laborados. Cada conversión se memoriza
+con `lru_cache`, y las fechas se reconocen con una sola expresión
+regular en lugar de probar `strptime` con cada formato.
+"""
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+
+# Valores distintos que recuerda cada conversión
+TAMANO_CACHE = 4096
+
+# Formatos de fecha aceptados, en el orden en que se prueban con strptime
+FORMATOS_FECHA = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d']
+
+# Los cuatro formatos en una expresión: año primero (2024-05-01, 2024/05/01)
+# o día primero (01/05/2024, 01-05-2024), con el mismo separador en ambos lados
+PATRON_FECHA = re.compile(
+    r'(?P<anio>[0-9]{4})(?P<sep>[-/])(?P<mes>[0-9]{1,2})(?P=sep)(?P<dia>[0-9]{1,2})'
+    r'|(?P<dia2>[0-9]{1,2})(?P<sep2>[-/])(?P<mes2>[0-9]{1,2})(?P=sep2)(?P<anio2>[0-9]{4})'
+)
+
+# Número sin separadores de miles ni coma decimal: 2850000, 1423500.5
+PATRON_NUMERO = re.compile(r'[0-9]+(\.[0-9]+)?')
+
+VALORES_VERDADEROS = frozenset(['SÍ', 'SI', 'YES', 'TRUE', '1', 'X', '✓'])
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def convertir_fecha(texto):
+    """Fecha de un texto en alguno de FORMATOS_FECHA, o None"""
+    coincidencia = PATRON_FECHA.fullmatch(texto)
+    if coincidencia:
+        if coincidencia['anio']:
+            anio, mes, dia = coincidencia['anio'], coincidencia['mes'], coincidencia['dia']
+        else:
+            anio, mes, dia = coincidencia['anio2'], coincidencia['mes2'], coincidencia['dia2']
+        try:
+            return date(int(anio), int(mes), int(dia))
+        except ValueError:
+            return None
+
+    # Variantes que strptime también admite (ej: día con espacio inicial)
+    for fmt in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def convertir_decimal(texto):
+    """Número de un texto en formato colombiano (1.234.567,89) o con punto decimal, o None"""
+    if PATRON_NUMERO.fullmatch(texto):
+        return float(texto)
+
+    # Quitar símbolos de moneda y espacios
+    texto = texto.replace('$', '').strip()
+
+    # Formato colombiano: 1.234.567,89 -> convertir a 1234567.89
+    if ',' in texto and '.' in texto:
+        # Tiene ambos: el punto es separador de miles, la coma es decimal
+        texto = texto.replace('.', '').replace(',', '.')
+    elif ',' in texto:
+        # Solo coma: es el decimal
+        texto = texto.replace(',', '.')
+    # Si solo tiene punto, dejarlo así (es el decimal)
+
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def convertir_entero(texto):
+    """Entero de un texto (se trunca la parte decimal), o None"""
+    try:
+        return int(float(texto))
+    except (ValueError, OverflowError):
+        return None
@@ -0,0 +1,488 @@
+"""
+Exportación e importación CSV del formato NOVEDADES con COPY de PostgreSQL.
+
+Las columnas siguen el orden de la hoja NOVEDADES (número de fila,
+identificación, contratación, ingreso, retiro, seguridad social,
+proyecto y los 12 meses del cronograma) con el año al final. Los valores
+van en su forma de base de datos: códigos, fechas ISO, decimales con
+punto y 'X' en las marcas de proyecto.
+
+- Exportación: `COPY (SELECT ...) TO STDOUT` sobre el trabajador unido a
+  su snapshot (trabajadores/snapshot.py; calculado al vuelo si falta).
+  PostgreSQL arma el CSV y Python solo copia los bytes al destino, o los
+  pasa por bloques a la respuesta del endpoint (`iterar_csv`).
+- Importación: `COPY FROM STDIN` a una tabla temporal de texto y un
+  `INSERT ... SELECT ... ON CONFLICT DO UPDATE` por tabla, en una sola
+  transacción. Los snapshots se recalculan también en SQL.
+
+La importación es una fusión: solo se actualizan las columnas presentes
+en el encabezado, y los bloques (tabla anual o mes) sin ningún valor en
+una fila no se crean ni se modifican.
+"""
+import csv
+import json
+import queue
+import threading
+
+from django.db import connection, transaction
+
+from contratacion.models import Contratacion
+from cronograma.models import Cronograma
+from .models import Trabajador, RELACIONES_ANIO
+from .snapshot import CAMPOS_RELACIONES, guardar_snapshots_sql, sql_snapshots_o_calculados
+
+
+CAMPOS_TRABAJADOR = [
+    'tipo', 'numero', 'fecha_expedicion_cedula', 'fecha_nacimiento',
+    'primer_apellido', 'segundo_apellido', 'primer_nombre', 'segundo_nombre',
+]
+
+# Columnas de cada mes en el CSV -> campo del cronograma
+CAMPOS_MES = {
+    'municipio': 'municipio_ejecucion',
+    'salario': 'salario_cotizacion',
+    'dias': 'dias_laborados',
+    'sueldo': 'sueldo_devengado',
+}
+
+
+def columna_mes(campo, numero):
+    return f'{campo}_{numero:02d}'
+
+
+COLUMNAS_MES = [columna_mes(campo, numero) for numero in range(1, 13) for campo in CAMPOS_MES]
+
+COLUMNAS_CSV = ['fila'] + CAMPOS_TRABAJADOR + [
+    campo for campos in CAMPOS_RELACIONES.values() for campo in campos
+] + COLUMNAS_MES + ['anio']
+
+_SIN_TILDES = str.maketrans('ÁÉÍÓÚ', 'AEIOU')
+
+
+def _codigos(choices):
+    """Textos aceptados -> código: el código y la etiqueta en mayúsculas, con y sin tildes"""
+    codigos = {}
+    for codigo, etiqueta in choices:
+        etiqueta = etiqueta.upper()
+        codigos.update({codigo: codigo, etiqueta: codigo, etiqueta.translate(_SIN_TILDES): codigo})
+    return codigos
+
+
+TIPOS_DOCUMENTO = _codigos(Trabajador.TIPO_IDENTIFICACION_CHOICES)
+TIPOS_CONTRATO = _codigos(Contratacion.TIPO_CONTRATO_CHOICES)
+
+# Marcas que cuentan como verdadero en las columnas de proyecto
+MARCAS_VERDADERO = ['X', 'SI', 'SÍ', 'YES', 'TRUE', '1', '✓']
+
+# Textos que se guardan en mayúsculas (como en importar_excel)
+CAMPOS_MAYUSCULAS = {'municipio_base', 'arl', 'municipio_ejecucion'}
+
+# Trabajadores nuevos a partir de los cuales se actualizan las estadísticas
+# de las tablas antes de recalcular el snapshot (p. ej. al restaurar un
+# respaldo en tablas vacías, donde el planificador elegiría recorridos completos)
+UMBRAL_ANALYZE = 1000
+
+# Bytes por bloque enviado en la exportación por streaming y bloques que
+# pueden esperar en cola a que el cliente los lea
+TAMANO_BLOQUE = 64 * 1024
+BLOQUES_EN_COLA = 16
+
+TABLA_CSV = 'novedades_csv'
+TABLA_IMPORTADAS = 'novedades_importadas'
+
+
+class ErrorFormatoCSV(Exception):
+    """El encabezado del CSV no corresponde al formato NOVEDADES"""
+
+
+def _modelo_relacion(nombre):
+    return Trabajador._meta.get_field(RELACIONES_ANIO[nombre]).related_model
+
+
+# ---------------------------------------------------------------------------
+# Exportación
+# ---------------------------------------------------------------------------
+
+def _sql_exportacion(anios):
+    expresiones = ['row_number() OVER (ORDER BY t.anio, t.id) AS fila']
+    expresiones += [f't.{campo}' for campo in CAMPOS_TRABAJADOR]
+    for nombre, campos in CAMPOS_RELACIONES.items():
+        for campo in campos:
+            if nombre == 'proyecto':
+                expresiones.append(f"CASE WHEN s.{campo} THEN 'X' END AS {campo}")
+            else:
+                expresiones.append(f's.{campo}')
+    for indice in range(12):
+        for posicion, campo in enumerate(CAMPOS_MES):
+            expresiones.append(f's.meses -> {indice} ->> {posicion} AS {columna_mes(campo, indice + 1)}')
+    expresiones.append('t.anio')
+
+    filtro = 'WHERE t.anio = ANY(%s)' if anios is not None else ''
+    sql = f'''
+        SELECT {', '.join(expresiones)}
+        FROM {Trabajador._meta.db_table} t
+        JOIN {sql_snapshots_o_calculados()} s ON s.trabajador_id = t.id
+        {filtro}
+        ORDER BY t.anio, t.id
+    '''
+    return sql, [list(anios)] if anios is not None else []
+
+
+def _copiar(cursor, anios, destino):
+    sql, params = _sql_exportacion(anios)
+    consulta = cursor.mogrify(sql, params).decode()
+    cursor.copy_expert(
+        f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv, HEADER true, ENCODING 'UTF8')", destino
+    )
+
+
+def exportar_csv(destino, anios=None):
+    """
+    Escribe en `destino` (archivo binario) el CSV NOVEDADES de los años
+    indicados (todos si es None). Retorna la cantidad de filas exportadas.
+    """
+    with connection.cursor() as cursor:
+        _copiar(cursor, anios, destino)
+        return cursor.rowcount
+
+
+class _CopiaCancelada(Exception):
+    """El generador se cerró antes de terminar: interrumpe el COPY"""
+
+
+class _ColaBloques:
+    """Destino del COPY que agrupa las filas en bloques y los pasa a una cola acotada"""
+
+    def __init__(self):
+        self.cola = queue.Queue(maxsize=BLOQUES_EN_COLA)
+        self.cancelada = threading.Event()
+        self.pendiente = bytearray()
+
+    def poner(self, valor):
+        """Espera lugar en la cola; si el generador se cerró, interrumpe"""
+        while not self.cancelada.is_set():
+            try:
+                self.cola.put(valor, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise _CopiaCancelada
+
+    def write(self, datos):
+        self.pendiente += datos
+        if len(self.pendiente) >= TAMANO_BLOQUE:
+            self.poner(bytes(self.pendiente))
+            self.pendiente.clear()
+        return len(datos)
+
+    def cerrar(self, error=None):
+        """Último bloque y fin de la copia (None) o el error que la detuvo"""
+        try:
+            if error is None and self.pendiente:
+                self.poner(bytes(self.pendiente))
+            self.poner(error)
+        except _CopiaCancelada:
+            pass
+
+
+def iterar_csv(anios=None):
+    """
+    Bloques de bytes del CSV NOVEDADES de los años indicados (todos si es
+    None) a medida que PostgreSQL los genera, para un StreamingHttpResponse.
+
+    psycopg2 solo copia a un archivo, así que el COPY corre en un hilo
+    sobre la misma conexión (psycopg2 permite compartirla entre hilos y
+    así ve la misma transacción) y escribe en una cola acotada: la memoria
+    no crece con el archivo y, si el cliente deja de leer, el COPY se
+    interrumpe al cerrar el generador. La copia empieza con el primer
+    bloque pedido y la conexión queda ocupada hasta que el generador
+    termina o se cierra.
+    """
+    bloques = _ColaBloques()
+
+    with connection.cursor() as cursor:
+        def copiar():
+            try:
+                _copiar(cursor, anios, bloques)
+            except _CopiaCancelada:
+                return
+            except Exception as error:
+                bloques.cerrar(error)
+            else:
+                bloques.cerrar()
+
+        hilo = threading.Thread(target=copiar, name='exportar-csv', daemon=True)
+        hilo.start()
+        try:
+            while (bloque := bloques.cola.get()) is not None:
+                if isinstance(bloque, Exception):
+                    raise bloque
+                yield bloque
+        finally:
+            bloques.cancelada.set()
+            hilo.join()
+
+
+# ---------------------------------------------------------------------------
+# Importación
+# ---------------------------------------------------------------------------
+
+def leer_encabezado(origen):
+    """
+    Lee la primera línea de `origen` (archivo binario, admite BOM) y
+    retorna las columnas. El archivo queda posicionado en la primera fila
+    de datos.
+    """
+    linea = origen.readline().decode('utf-8-sig')
+    columnas = [columna.strip().lower() for columna in next(csv.reader([linea]), [])]
+    desconocidas = [columna for columna in columnas if columna not in COLUMNAS_CSV]
+    if desconocidas:
+        raise ErrorFormatoCSV(f'Columnas desconocidas: {", ".join(desconocidas)}')
+    repetidas = sorted({columna for columna in columnas if columnas.count(columna) > 1})
+    if repetidas:
+        raise ErrorFormatoCSV(f'Columnas repetidas: {", ".join(repetidas)}')
+    if 'numero' not in columnas:
+        raise ErrorFormatoCSV('Falta la columna "numero"')
+    return columnas
+
+
+def _texto(columna):
+    """
+    Texto sin espacios y con 'N/A' como NULL. COPY distingue la celda
+    vacía (NULL) de la cadena vacía entre comillas, así que un texto
+    vacío exportado vuelve a importarse igual.
+    """
+    return f"NULLIF(trim({columna}), 'N/A')"
+
+
+def _valor(columna):
+    """Texto limpio de una columna no textual: vacío también es NULL"""
+    return f"NULLIF({_texto(columna)}, '')"
+
+
+def _conversion(columna, field):
+    """Expresión SQL que convierte la columna de texto al tipo del campo (NULL si viene vacía)"""
+    tipo = field.get_internal_type()
+    if tipo == 'DateField':
+        return f'{_valor(columna)}::date'
+    if tipo == 'DecimalField':
+        return f'{_valor(columna)}::numeric'
+    if tipo == 'IntegerField':
+        return f'{_valor(columna)}::numeric::int'
+    if tipo == 'BooleanField':
+        return f'upper({_valor(columna)}) = ANY(%(marcas)s)'
+    if field.name in CAMPOS_MAYUSCULAS:
+        return f'upper({_texto(columna)})'
+    return _texto(columna)
+
+
+def _por_defecto(expresion, field):
+    """Valor a guardar: los campos NOT NULL reciben el valor por defecto que usa importar_excel"""
+    if field.null:
+        return expresion
+    tipo = field.get_internal_type()
+    if tipo == 'BooleanField':
+        defecto = 'false'
+    elif tipo in ('DecimalField', 'IntegerField'):
+        defecto = '0'
+    else:
+        defecto = "''"
+    return f'COALESCE({expresion}, {defecto})'
+
+
+def _sql_importadas():
+    """
+    Filas del CSV convertidas a los tipos de cada tabla, una por documento
+    y año (si se repite, prevalece la última fila, como en importar_excel).
+    """
+    expresiones = [
+        "COALESCE(%(tipos_documento)s::jsonb ->> upper(trim(tipo)), 'CC') AS tipo",
+        'trim(numero) AS numero',
+        f'COALESCE({_valor("anio")}::int, %(anio)s) AS anio',
+    ]
+    for campo in CAMPOS_TRABAJADOR[2:]:
+        expresiones.append(f'{_conversion(campo, Trabajador._meta.get_field(campo))} AS {campo}')
+    for nombre, campos in CAMPOS_RELACIONES.items():
+        model = _modelo_relacion(nombre)
+        for campo in campos:
+            if campo == 'tipo_contrato':
+                # Los tipos desconocidos quedan vacíos (se guardan como prestación de servicios)
+                expresion = f'%(tipos_contrato)s::jsonb ->> upper({_valor(campo)})'
+            else:
+                expresion = _conversion(campo, model._meta.get_field(campo))
+            expresiones.append(f'{expresion} AS {campo}')
+    for numero in range(1, 13):
+        for campo, campo_cronograma in CAMPOS_MES.items():
+            columna = columna_mes(campo, numero)
+            expresion = _conversion(columna, Cronograma._meta.get_field(campo_cronograma))
+            if campo == 'municipio':
+                # importar_excel trata 'X' en el municipio como vacío
+                expresion = f"NULLIF({expresion}, 'X')"
+            expresiones.append(f'{expresion} AS {columna}')
+
+    return f'''
+        CREATE TEMP TABLE {TABLA_IMPORTADAS} ON COMMIT DROP AS
+        SELECT DISTINCT ON (tipo, numero, anio) * FROM (
+            SELECT orden, {', '.join(expresiones)}
+            FROM {TABLA_CSV}
+            WHERE NULLIF(trim(numero), '') IS NOT NULL
+        ) filas
+        ORDER BY tipo, numero, anio, orden DESC
+    '''
+
+
+def _actualizar(tabla, columnas, extra=()):
+    """
+    Cláusula ON CONFLICT que reescribe `columnas` (y `extra`) solo en las
+    filas que cambian: reimportar los mismos datos no escribe nada.
+    """
+    if not columnas:
+        return 'DO NOTHING'
+    asignaciones = ', '.join(
+        f'{columna} = EXCLUDED.{columna}' for columna in [*columnas, *extra, 'fecha_actualizacion']
+    )
+    actuales = ', '.join(f'{tabla}.{columna}' for columna in columnas)
+    nuevos = ', '.join(f'EXCLUDED.{columna}' for columna in columnas)
+    return f'DO UPDATE SET {asignaciones} WHERE ({actuales}) IS DISTINCT FROM ({nuevos})'
+
+
+def _union_trabajador():
+    return (
+        f'FROM {TABLA_IMPORTADAS} n JOIN {Trabajador._meta.db_table} t '
+        'ON t.tipo = n.tipo AND t.numero = n.numero AND t.anio = n.anio'
+    )
+
+
+def _sql_trabajadores(presentes):
+    """Upsert de los trabajadores; retorna (creados, guardados, filas únicas)"""
+    campos = CAMPOS_TRABAJADOR[2:]
+    valores = [
+        "COALESCE(fecha_expedicion_cedula, (fecha_nacimiento + interval '18 years')::date, DATE '2000-01-01')",
+        "COALESCE(fecha_nacimiento, (fecha_expedicion_cedula - interval '18 years')::date, DATE '1982-01-01')",
+    ] + [_por_defecto(campo, Trabajador._meta.get_field(campo)) for campo in campos[2:]]
+    actualizar = [campo for campo in campos if campo in presentes]
+    # huella_importacion se vacía al cambiar: la de importar_excel deja de corresponder a los datos
+    tabla = Trabajador._meta.db_table
+    return f'''
+        WITH guardados AS (
+            INSERT INTO {tabla} (
+                tipo, numero, anio, {', '.join(campos)}, huella_importacion, fecha_creacion, fecha_actualizacion
+            )
+            SELECT tipo, numero, anio, {', '.join(valores)}, '', now(), now()
+            FROM {TABLA_IMPORTADAS}
+            ON CONFLICT (tipo, numero, anio) {_actualizar(tabla, actualizar, extra=['huella_importacion'])}
+            RETURNING xmax = 0 AS creado
+        )
+        SELECT count(*) FILTER (WHERE creado), count(*), (SELECT count(*) FROM {TABLA_IMPORTADAS})
+        FROM guardados
+    '''
+
+
+def _sql_relacion(nombre, presentes):
+    """Upsert de una tabla anual con las filas que traen algún valor del bloque"""
+    model = _modelo_relacion(nombre)
+    campos = CAMPOS_RELACIONES[nombre]
+    valores = []
+    for campo in campos:
+        field = model._meta.get_field(campo)
+        if campo == 'tipo_contrato':
+            valores.append(f"COALESCE(n.{campo}, 'PRESTACION_SERVICIOS')")
+        else:
+            valores.append(_por_defecto(f'n.{campo}', field))
+    actualizar = [campo for campo in campos if campo in presentes]
+    return f'''
+        INSERT INTO {model._meta.db_table} (
+            trabajador_id, anio, {', '.join(campos)}, fecha_creacion, fecha_actualizacion
+        )
+        SELECT t.id, n.anio, {', '.join(valores)}, now(), now()
+        {_union_trabajador()}
+        WHERE num_nonnulls({', '.join(f'n.{campo}' for campo in campos)}) > 0
+        ON CONFLICT (trabajador_id, anio) {_actualizar(model._meta.db_table, actualizar)}
+    '''
+
+
+def _sql_cronograma(presentes):
+    """Upsert de los meses que traen algún valor, un registro por trabajador y mes"""
+    meses = ', '.join(
+        f'({numero}, ' + ', '.join(f'n.{columna_mes(campo, numero)}' for campo in CAMPOS_MES) + ')'
+        for numero in range(1, 13)
+    )
+    valores = [
+        _por_defecto(f'm.{campo}', Cronograma._meta.get_field(campo_cronograma))
+        for campo, campo_cronograma in CAMPOS_MES.items()
+    ]
+    actualizar = [
+        campo_cronograma for campo, campo_cronograma in CAMPOS_MES.items()
+        if any(columna_mes(campo, numero) in presentes for numero in range(1, 13))
+    ]
+    return f'''
+        INSERT INTO {Cronograma._meta.db_table} (
+            trabajador_id, mes, anio, {', '.join(CAMPOS_MES.values())}, fecha_creacion, fecha_actualizacion
+        )
+        SELECT t.id, make_date(n.anio, m.numero, 1), n.anio, {', '.join(valores)}, now(), now()
+        {_union_trabajador()}
+        CROSS JOIN LATERAL (VALUES {meses}) AS m(numero, {', '.join(CAMPOS_MES)})
+        WHERE num_nonnulls({', '.join(f'm.{campo}' for campo in CAMPOS_MES)}) > 0
+        ON CONFLICT (trabajador_id, mes) {_actualizar(Cronograma._meta.db_table, actualizar)}
+    '''
+
+
+def importar_csv(origen, anio=2025):
+    """
+    Importa el CSV NOVEDADES de `origen` (archivo binario). Las filas sin
+    columna o valor de año usan `anio`. Todo ocurre en una transacción:
+    un valor inválido (fecha, número) cancela la importación completa.
+    Retorna {'filas', 'creados', 'actualizados', 'sin_cambios'}: filas
+    leídas y trabajadores según su propia fila (las tablas anuales y el
+    cronograma se fusionan aparte).
+    """
+    columnas = leer_encabezado(origen)
+    presentes = set(columnas)
+    params = {
+        'anio': anio,
+        'marcas': MARCAS_VERDADERO,
+        'tipos_documento': json.dumps(TIPOS_DOCUMENTO),
+        'tipos_contrato': json.dumps(TIPOS_CONTRATO),
+    }
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE {TABLA_CSV} (orden bigserial, '
+            + ', '.join(f'{columna} text' for columna in COLUMNAS_CSV)
+            + ') ON COMMIT DROP'
+        )
+        cursor.copy_expert(
+            f"COPY {TABLA_CSV} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv, ENCODING 'UTF8')", origen
+        )
+        filas = cursor.rowcount
+
+        cursor.execute(_sql_importadas(), params)
+        # Estadísticas de las columnas de unión para el planificador
+        cursor.execute(f'ANALYZE {TABLA_IMPORTADAS} (tipo, numero, anio)')
+        cursor.execute(_sql_trabajadores(presentes))
+        creados, guardados, unicos = cursor.fetchone()
+
+        escritas = [Trabajador._meta.db_table]
+        for nombre, campos in CAMPOS_RELACIONES.items():
+            if presentes.intersection(campos):
+                cursor.execute(_sql_relacion(nombre, presentes))
+                escritas.append(_modelo_relacion(nombre)._meta.db_table)
+        if presentes.intersection(COLUMNAS_MES):
+            cursor.execute(_sql_cronograma(presentes))
+            escritas.append(Cronograma._meta.db_table)
+
+        if creados >= UMBRAL_ANALYZE:
+            cursor.execute(f'ANALYZE {", ".join(escritas)}')
+
+        # Las escrituras directas no envían señales: el snapshot se recalcula aquí
+        guardar_snapshots_sql(f'SELECT t.id {_union_trabajador()}')
+
+        # ON COMMIT DROP no alcanza si la importación corre dentro de otra transacción
+        cursor.execute(f'DROP TABLE {TABLA_CSV}, {TABLA_IMPORTADAS}')
+
+    return {
+        'filas': filas,
+        'creados': creados,
+        'actualizados': guardados - creados,
+        'sin_cambios': unicos - guardados,
+    }
@@ -0,0 +1,105 @@
+"""
+Estadísticas del tablero calculadas con agregados SQL.
+
+Cada cifra es una consulta COUNT/GROUP BY sobre la base de datos; no se
+cargan trabajadores en memoria salvo los pocos de la actividad reciente.
+"""
+from datetime import date
+
+from django.db.models import Count, Q
+
+from contratacion.models import Contratacion
+from seguridad_social.models import SeguridadSocial
+from proyectos.models import Proyecto
+from .models import Trabajador
+
+
+CAMPOS_PROYECTO = [
+    'administrativo',
+    'construccion_instalaciones',
+    'construccion_redes',
+    'servicios',
+    'mantenimiento_redes',
+]
+
+# Cantidad de registros en la actividad reciente
+TOTAL_ACTIVIDAD_RECIENTE = 3
+
+
+def _conteo_por(queryset, campo, choices):
+    """[{campo, nombre, total}] ordenado de mayor a menor"""
+    nombres = dict(choices)
+    filas = (
+        queryset.exclude(**{f'{campo}__isnull': True}).exclude(**{campo: ''})
+        .values(campo)
+        .annotate(total=Count('id'))
+        .order_by('-total', campo)
+    )
+    return [
+        {campo: fila[campo], 'nombre': nombres.get(fila[campo], fila[campo]), 'total': fila['total']}
+        for fila in filas
+    ]
+
+
+def calcular_estadisticas(anio=None):
+    """
+    Calcula las cifras del tablero. Si se indica `anio` las cifras se
+    limitan a ese año; si no, cubren todos los años registrados.
+    """
+    trabajadores = Trabajador.objects.order_by()
+    contrataciones = Contratacion.objects.order_by()
+    seguridad_social = SeguridadSocial.objects.order_by()
+    proyectos = Proyecto.objects.order_by()
+    if anio:
+        trabajadores = trabajadores.filter(anio=anio)
+        contrataciones = contrataciones.filter(anio=anio)
+        seguridad_social = seguridad_social.filter(anio=anio)
+        proyectos = proyectos.filter(anio=anio)
+
+    por_anio = list(trabajadores.values('anio').annotate(total=Count('id')).order_by('anio'))
+
+    # Un trabajador puede estar registrado en varios años: se cuenta por documento
+    total_empleados = trabajadores.values('tipo', 'numero').distinct().count()
+
+    hoy = date.today()
+    contratos = contrataciones.aggregate(
+        total=Count('id'),
+        activos=Count('id', filter=Q(fecha_inicio_contrato__lte=hoy) & (
+            Q(fecha_final_contrato__isnull=True) | Q(fecha_final_contrato__gte=hoy)
+        )),
+    )
+
+    por_proyecto = proyectos.aggregate(**{
+        campo: Count('id', filter=Q(**{campo: True})) for campo in CAMPOS_PROYECTO
+    })
+
+    recientes = (
+        trabajadores.only('id', 'anio', 'primer_nombre', 'segundo_nombre',
+                          'primer_apellido', 'segundo_apellido', 'fecha_creacion')
+        .order_by('-fecha_creacion', '-id')[:TOTAL_ACTIVIDAD_RECIENTE]
+    )
+
+    return {
+        'anio': anio,
+        'total_empleados': total_empleados,
+        'total_registros': sum(fila['total'] for fila in por_anio),
+        'por_anio': por_anio,
+        'contratos': contratos,
+        'por_tipo_contrato': _conteo_por(
+            contrataciones, 'tipo_contrato', Contratacion.TIPO_CONTRATO_CHOICES
+        ),
+        'por_municipio_base': _conteo_por(
+            contrataciones, 'municipio_base', Contratacion.MUNICIPIOS_NARINO
+        ),
+        'por_arl': _conteo_por(seguridad_social, 'arl', SeguridadSocial.ARL_CHOICES),
+        'por_proyecto': por_proyecto,
+        'actividad_reciente': [
+            {
+                'id': trabajador.id,
+                'nombre_completo': trabajador.nombre_completo,
+                'anio': trabajador.anio,
+                'fecha_creacion': trabajador.fecha_creacion,
+            }
+            for trabajador in recientes
+        ],
+    }
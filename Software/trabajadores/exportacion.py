@@ -0,0 +1,176 @@
+"""
+Motor de exportación al formato NOVEDADES.
+
+Las filas se arman desde el snapshot trabajador-año (ver
+trabajadores/snapshot.py) con el codificador del esquema del formato
+(trabajadores/formato_novedades.py): cada trabajador se lee junto con
+su snapshot en una sola consulta recorrida con un cursor, así que la
+memoria no crece con el total de filas. Lo usan tanto el endpoint
+`/api/trabajadores/exportar-excel/` como el comando `exportar_excel`.
+"""
+import os
+import tempfile
+from functools import lru_cache
+from itertools import islice
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+
+from .formato_novedades import codificar_fila
+from .models import Trabajador
+from .snapshot import TAMANO_LOTE, completar_en_memoria
+
+
+# Plantilla de la que se copian los encabezados del formato
+PLANTILLA_NOVEDADES = 'excel/1. FORMATO RELACION DE PERSONAL_OCTUBRE.xlsx'
+
+
+def filas_novedades(trabajadores, tamano_lote=TAMANO_LOTE):
+    """
+    Genera las filas NOVEDADES de los trabajadores (un QuerySet), cada uno
+    con los datos de su año. Todo se lee en una sola consulta con el
+    snapshot unido por su clave, de a `tamano_lote` filas; a los que no
+    tienen snapshot se les calcula por lote, sin guardarlo.
+    """
+    filas = trabajadores.select_related('snapshot').iterator(chunk_size=tamano_lote)
+    numero = 0
+    for lote in iter(lambda: list(islice(filas, tamano_lote)), []):
+        completar_en_memoria(lote)
+        for trabajador in lote:
+            numero += 1
+            yield codificar_fila(trabajador, trabajador.snapshot, numero)
+
+
+def escribir_hoja(ws, trabajadores, fila_inicio, progreso=None):
+    """
+    Escribe las filas NOVEDADES en la hoja desde `fila_inicio` con
+    `ws.append` (la hoja no debe tener datos desde esa fila).
+    `progreso` (opcional) se llama con el total de filas escritas.
+    Retorna la cantidad de trabajadores exportados.
+    """
+    if ws.max_row >= fila_inicio:
+        raise ValueError(f'La hoja "{ws.title}" ya tiene datos desde la fila {fila_inicio}')
+    # ws.append escribe después de la última fila: completar hasta fila_inicio
+    for _ in range(fila_inicio - 1 - ws.max_row):
+        ws.append([])
+
+    count = 0
+    for fila in filas_novedades(trabajadores):
+        ws.append(fila)
+        count += 1
+        if progreso:
+            progreso(count)
+    return count
+
+
+class EncabezadoPlantilla:
+    """
+    Encabezados del formato NOVEDADES precalculados desde la plantilla:
+    valores y estilos de las filas 3-4, celdas combinadas, anchos de
+    columna y alturas de fila. Se aplican a hojas write-only.
+    """
+
+    FILAS_PLANTILLA = (3, 4)
+
+    def __init__(self, template_path):
+        wb = load_workbook(template_path)
+        ws = wb.active
+        desplazamiento = self.FILAS_PLANTILLA[0] - 1
+
+        self.filas = []
+        for fila in self.FILAS_PLANTILLA:
+            celdas = []
+            for col_idx in range(1, ws.max_column + 1):
+                celda = ws.cell(row=fila, column=col_idx)
+                estilo = None
+                if celda.has_style:
+                    estilo = {
+                        'font': celda.font.copy(),
+                        'border': celda.border.copy(),
+                        'fill': celda.fill.copy(),
+                        'number_format': celda.number_format,
+                        'protection': celda.protection.copy(),
+                        'alignment': celda.alignment.copy(),
+                    }
+                celdas.append((celda.value, estilo))
+            self.filas.append(celdas)
+
+        # Celdas combinadas de las filas 3-4, movidas a las filas 1-2
+        self.combinadas = []
+        for rango in ws.merged_cells.ranges:
+            if rango.min_row >= self.FILAS_PLANTILLA[0] and rango.max_row <= self.FILAS_PLANTILLA[-1]:
+                self.combinadas.append(
+                    f"{get_column_letter(rango.min_col)}{rango.min_row - desplazamiento}:"
+                    f"{get_column_letter(rango.max_col)}{rango.max_row - desplazamiento}"
+                )
+
+        self.anchos = {}
+        for col_idx in range(1, ws.max_column + 1):
+            col_letter = get_column_letter(col_idx)
+            self.anchos[col_letter] = ws.column_dimensions[col_letter].width
+
+        self.altos = [ws.row_dimensions[fila].height for fila in self.FILAS_PLANTILLA]
+        wb.close()
+
+    def aplicar(self, ws):
+        """Escribe los encabezados en una hoja write-only (antes de cualquier fila de datos)"""
+        for col_letter, ancho in self.anchos.items():
+            ws.column_dimensions[col_letter].width = ancho
+        for fila, alto in enumerate(self.altos, start=1):
+            if alto:
+                ws.row_dimensions[fila].height = alto
+        for rango in self.combinadas:
+            ws.merged_cells.add(rango)
+
+        # Congelar paneles: columnas A-I y filas 1-2 (headers)
+        ws.freeze_panes = 'J3'
+
+        for celdas in self.filas:
+            fila = []
+            for valor, estilo in celdas:
+                celda = WriteOnlyCell(ws, value=valor)
+                if estilo:
+                    for atributo, valor_estilo in estilo.items():
+                        setattr(celda, atributo, valor_estilo)
+                fila.append(celda)
+            ws.append(fila)
+
+
+@lru_cache(maxsize=4)
+def _encabezado_plantilla(template_path, mtime):
+    return EncabezadoPlantilla(template_path)
+
+
+def obtener_encabezado(template_path):
+    """Encabezado de la plantilla, calculado una vez mientras el archivo no cambie"""
+    return _encabezado_plantilla(template_path, os.path.getmtime(template_path))
+
+
+def generar_libro_novedades(anios, template_path, progreso=None):
+    """
+    Genera un libro con una hoja "NOVEDADES <año>" por cada año usando hojas
+    write-only: las filas se vuelcan a disco a medida que se agregan, así la
+    memoria no crece con el número de trabajadores.
+    `progreso` (opcional) se llama con el total de filas escritas.
+    Retorna un archivo temporal abierto, posicionado al inicio.
+    """
+    encabezado = obtener_encabezado(template_path)
+    wb = Workbook(write_only=True)
+
+    count = 0
+    for anio in anios:
+        ws = wb.create_sheet(f'NOVEDADES {anio}')
+        encabezado.aplicar(ws)
+        trabajadores = Trabajador.objects.filter(anio=anio).order_by('id')
+        for fila in filas_novedades(trabajadores):
+            ws.append(fila)
+            count += 1
+            if progreso:
+                progreso(count)
+
+    archivo = tempfile.TemporaryFile()
+    wb.save(archivo)
+    archivo.seek(0)
+    return archivo
+
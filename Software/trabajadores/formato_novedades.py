@@ -0,0 +1,322 @@
+"""
+Esquema del formato NOVEDADES y codificación de sus filas.
+
+El formato tiene 85 columnas: número de fila, identificación (2-9),
+contratación (10-15), ingreso (16-19), retiro (20-23), seguridad social
+(24-30), proyecto (33-37) y el cronograma de los 12 meses (38-85, cuatro
+columnas por mes). `BLOQUES` y `COLUMNAS_MES` lo declaran una sola vez,
+con el tipo de cada columna, y de ahí se compilan:
+
+- `decodificar_fila`: valores de una fila de la hoja (ws.iter_rows) ->
+  datos por tabla, como los guarda importar_excel.
+- `codificar_fila`: trabajador y su snapshot -> valores de la fila para
+  `ws.append`, como los escriben el endpoint y el comando de exportación.
+"""
+from datetime import date, datetime
+
+from contratacion.models import Contratacion
+from .conversiones import VALORES_VERDADEROS, convertir_decimal, convertir_entero, convertir_fecha
+
+
+class Tipo:
+    """
+    Conversión de una columna en cada sentido: `leer` recibe el texto de
+    la celda (ver `texto_celda`) y retorna el valor a guardar; `escribir`
+    recibe el valor del trabajador o del snapshot y retorna el de la celda.
+    """
+
+    def __init__(self, leer, escribir):
+        self.leer = leer
+        self.escribir = escribir
+
+
+def texto_celda(valor):
+    """Valor de una celda como lo leen los tipos: datetime o texto sin espacios ('' si está vacía)"""
+    if isinstance(valor, datetime):
+        return valor
+    return str(valor).strip() if valor else ''
+
+
+def leer_fecha(valor):
+    if not valor or valor == 'N/A':
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    # Texto en alguno de los formatos comunes
+    if isinstance(valor, str):
+        return convertir_fecha(valor)
+    return None
+
+
+def leer_decimal(valor):
+    if not valor or valor == 'N/A':
+        return None
+    # Texto con formato colombiano (1.234.567,89) o punto decimal
+    if isinstance(valor, str):
+        return convertir_decimal(valor)
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def leer_entero(valor):
+    if not valor or valor == 'N/A':
+        return None
+    return convertir_entero(str(valor))
+
+
+def leer_marca(valor):
+    if not valor:
+        return False
+    return str(valor).upper().strip() in VALORES_VERDADEROS
+
+
+# Tipo de identificación: texto del formato completo -> código
+TIPOS_DOCUMENTO = {
+    'CÉDULA DE CIUDADANÍA': 'CC',
+    'CEDULA DE CIUDADANIA': 'CC',
+    'CÉDULA CIUDADANÍA': 'CC',
+    'CEDULA': 'CC',
+    'CC': 'CC',
+    'CÉDULA DE EXTRANJERÍA': 'CE',
+    'CEDULA DE EXTRANJERIA': 'CE',
+    'CE': 'CE',
+    'PASAPORTE': 'PA',
+    'PA': 'PA',
+    'TARJETA DE IDENTIDAD': 'TI',
+    'TI': 'TI',
+}
+
+# Tipo de contrato: texto del formato -> código
+TIPOS_CONTRATO = {
+    'PRESTACION DE SERVICIOS': 'PRESTACION_SERVICIOS',
+    'PRESTACIÓN DE SERVICIOS': 'PRESTACION_SERVICIOS',
+    'TERMINO INDEFINIDO': 'TERMINO_INDEFINIDO',
+    'TÉRMINO INDEFINIDO': 'TERMINO_INDEFINIDO',
+    'TERMINO FIJO': 'TERMINO_FIJO',
+    'TÉRMINO FIJO': 'TERMINO_FIJO',
+    'OBRA O LABOR': 'OBRA_LABOR',
+    'APRENDIZAJE': 'APRENDIZAJE',
+}
+
+# Código -> etiqueta que se exporta
+ETIQUETAS_CONTRATO = dict(Contratacion.TIPO_CONTRATO_CHOICES)
+
+
+def _igual(valor):
+    return valor
+
+
+def _o_nulo(valor):
+    # Texto vacío: sin celda, como la exportación por comando anterior
+    return valor or None
+
+
+def _o_cero(valor):
+    return valor or 0
+
+
+def _mayusculas(texto):
+    return texto.upper() if texto else ''
+
+
+def _tipo_documento(texto):
+    return TIPOS_DOCUMENTO.get(str(texto).upper().strip(), 'CC') if texto else 'CC'
+
+
+def _tipo_contrato(texto):
+    return TIPOS_CONTRATO.get(texto.upper(), 'PRESTACION_SERVICIOS') if texto else 'PRESTACION_SERVICIOS'
+
+
+def _etiqueta_contrato(codigo):
+    return ETIQUETAS_CONTRATO.get(codigo, codigo) or None
+
+
+def _monto(texto):
+    return leer_decimal(texto) or 0
+
+
+def _dias(texto):
+    return leer_entero(texto) or 0
+
+
+def _o_municipio(valor):
+    # Los meses con cronograma siempre escriben su municipio
+    return valor or ''
+
+
+def _municipio_mes(texto):
+    # N/A y X en el municipio del mes significan "sin municipio"
+    if texto and texto.upper() in ['N/A', 'X']:
+        return ''
+    return texto.upper() if texto else ''
+
+
+def _decimal(valor):
+    return float(valor) if valor else 0
+
+
+def _decimal_opcional(valor):
+    return float(valor) if valor else None
+
+
+def _marca(valor):
+    return 'X' if valor else ''
+
+
+TEXTO = Tipo(_igual, _o_nulo)
+MAYUSCULAS = Tipo(_mayusculas, _o_nulo)
+# EPS, caja, fondo y ARL se exportan tal cual (pueden ser nulos)
+ENTIDAD = Tipo(_igual, _igual)
+ARL = Tipo(_mayusculas, _igual)
+DOCUMENTO = Tipo(_tipo_documento, _o_nulo)
+CONTRATO = Tipo(_tipo_contrato, _etiqueta_contrato)
+FECHA = Tipo(leer_fecha, _igual)
+MONTO = Tipo(_monto, _decimal)
+MONTO_OPCIONAL = Tipo(leer_decimal, _decimal_opcional)
+DIAS = Tipo(_dias, _o_cero)
+MARCA = Tipo(leer_marca, _marca)
+MUNICIPIO_MES = Tipo(_municipio_mes, _o_municipio)
+
+# Bloques de columnas: (bloque, primera columna (1-based), [(campo, tipo), ...]).
+# El bloque es la clave de sus datos en importar_excel y, salvo 'trabajador',
+# la tabla anual del snapshot (tiene_<bloque>). La columna 1 es el número de
+# fila y las columnas 31-32 no se usan.
+BLOQUES = [
+    ('trabajador', 2, [
+        ('tipo', DOCUMENTO),
+        ('numero', TEXTO),
+        ('fecha_expedicion_cedula', FECHA),
+        ('fecha_nacimiento', FECHA),
+        ('primer_apellido', TEXTO),
+        ('segundo_apellido', TEXTO),
+        ('primer_nombre', TEXTO),
+        ('segundo_nombre', TEXTO),
+    ]),
+    ('contratacion', 10, [
+        ('tipo_contrato', CONTRATO),
+        ('cargo', TEXTO),
+        ('salario_contratado', MONTO),
+        ('municipio_base', MAYUSCULAS),
+        ('fecha_inicio_contrato', FECHA),
+        ('fecha_final_contrato', FECHA),
+    ]),
+    ('ingreso', 16, [
+        ('fecha_ingreso', FECHA),
+        ('examen_ingreso', FECHA),
+        ('fecha_entrega_epp', FECHA),
+        ('fecha_entrega_dotacion', FECHA),
+    ]),
+    ('retiro', 20, [
+        ('fecha_retiro', FECHA),
+        ('fecha_liquidacion', FECHA),
+        ('valor_liquidacion', MONTO_OPCIONAL),
+        ('fecha_examen_retiro', FECHA),
+    ]),
+    ('seguridad_social', 24, [
+        ('eps', ENTIDAD),
+        ('fecha_afiliacion_eps', FECHA),
+        ('caja_compensacion', ENTIDAD),
+        ('fecha_afiliacion_caja', FECHA),
+        ('fondo_pension', ENTIDAD),
+        ('fecha_afiliacion_pension', FECHA),
+        ('arl', ARL),
+    ]),
+    ('proyecto', 33, [
+        ('administrativo', MARCA),
+        ('construccion_instalaciones', MARCA),
+        ('construccion_redes', MARCA),
+        ('servicios', MARCA),
+        ('mantenimiento_redes', MARCA),
+    ]),
+]
+
+# Cronograma: las columnas de cada mes, de enero a diciembre desde COL_CRONOGRAMA
+COL_CRONOGRAMA = 38
+COLUMNAS_MES = [
+    ('municipio_ejecucion', MUNICIPIO_MES),
+    ('salario_cotizacion', MONTO),
+    ('dias_laborados', DIAS),
+    ('sueldo_devengado', MONTO),
+]
+TOTAL_COLUMNAS = COL_CRONOGRAMA + 12 * len(COLUMNAS_MES) - 1
+
+
+def _compilar(sentido):
+    """
+    Índices 0-based y conversiones de un sentido ('leer' o 'escribir'):
+    ([(bloque, [(indice, campo, conversion), ...]), ...], [(desplazamiento, campo, conversion), ...])
+    """
+    bloques = [
+        (bloque, [
+            (inicio - 1 + desplazamiento, campo, getattr(tipo, sentido))
+            for desplazamiento, (campo, tipo) in enumerate(columnas)
+        ])
+        for bloque, inicio, columnas in BLOQUES
+    ]
+    mes = [
+        (desplazamiento, campo, getattr(tipo, sentido))
+        for desplazamiento, (campo, tipo) in enumerate(COLUMNAS_MES)
+    ]
+    return bloques, mes
+
+
+_LECTORES, _LECTORES_MES = _compilar('leer')
+_ESCRITORES, _ESCRITORES_MES = _compilar('escribir')
+# Inicio (0-based) de cada mes del cronograma
+_INICIOS_MES = [COL_CRONOGRAMA - 1 + indice * len(COLUMNAS_MES) for indice in range(12)]
+
+
+def decodificar_fila(fila, anio):
+    """
+    Datos de una fila de la hoja (tupla de valores de ws.iter_rows): un
+    dict por bloque ('trabajador', 'contratacion', ...) y 'cronogramas'
+    ({mes: valores}) con los 12 meses del año. Las columnas que faltan al
+    final de la fila se leen vacías.
+    """
+    # texto_celda en línea: se aplica a las 85 celdas de cada fila
+    celdas = [
+        valor if isinstance(valor, datetime) else (str(valor).strip() if valor else '')
+        for valor in fila
+    ]
+    if len(celdas) < TOTAL_COLUMNAS:
+        celdas += [''] * (TOTAL_COLUMNAS - len(celdas))
+
+    datos = {
+        bloque: {campo: leer(celdas[indice]) for indice, campo, leer in lectores}
+        for bloque, lectores in _LECTORES
+    }
+    datos['cronogramas'] = {
+        date(anio, numero, 1): {campo: leer(celdas[inicio + desplazamiento]) for desplazamiento, campo, leer in _LECTORES_MES}
+        for numero, inicio in enumerate(_INICIOS_MES, start=1)
+    }
+    return datos
+
+
+def codificar_fila(trabajador, snapshot, numero):
+    """
+    Valores de la fila NOVEDADES de un trabajador a partir de su snapshot,
+    listos para `ws.append` (columna 1 = índice 0). Las tablas anuales que
+    no existen y los meses sin cronograma quedan en None.
+    """
+    fila = [None] * TOTAL_COLUMNAS
+    fila[0] = numero
+
+    for bloque, escritores in _ESCRITORES:
+        if bloque == 'trabajador':
+            origen = trabajador
+        elif getattr(snapshot, f'tiene_{bloque}'):
+            origen = snapshot
+        else:
+            continue
+        for indice, campo, escribir in escritores:
+            fila[indice] = escribir(getattr(origen, campo))
+
+    # snapshot.meses: [municipio, salario, días, sueldo] por mes, en el orden de COLUMNAS_MES
+    for inicio, mes in zip(_INICIOS_MES, snapshot.meses):
+        if mes:
+            for (desplazamiento, _, escribir), valor in zip(_ESCRITORES_MES, mes):
+                fila[inicio + desplazamiento] = escribir(valor)
+
+    return fila
@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+)
+from datetime import datetime
+from trabajadores.benchmark import ESCENARIOS, comparar_resultados, medir, preparar_datos
+import json
+import os
+import tempfile
+import shutil
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo, consultas y memoria de listado, detalle, búsqueda, contratos activos, exportación e importación'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos',
+            type=str,
+            help='Cantidades de trabajadores a medir, separadas por coma',
+            default='100,1000'
+        )
+        parser.add_argument(
+            '--escenarios',
+            type=str,
+            help=f'Escenarios a ejecutar, separados por coma ({", ".join(ESCENARIOS)})',
+            default=','.join(ESCENARIOS)
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            help='Ejecuciones por escenario (se reporta la mediana del tiempo)',
+            default=3
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            help='Archivo JSON con la línea base',
+            default='benchmarks/baseline.json'
+        )
+        parser.add_argument(
+            '--guardar',
+            action='store_true',
+            help='Guardar los resultados como nueva línea base en lugar de compararlos'
+        )
+        parser.add_argument(
+            '--umbral',
+            type=float,
+            help='Aumento máximo permitido de tiempo y memoria frente a la línea base (0.25 = 25%%)',
+            default=0.25
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Conservar la base de datos de pruebas entre ejecuciones'
+        )
+
+    def handle(self, *args, **options):
+        escenarios = [nombre.strip() for nombre in options['escenarios'].split(',') if nombre.strip()]
+        desconocidos = [nombre for nombre in escenarios if nombre not in ESCENARIOS]
+        if desconocidos:
+            raise CommandError(f'Escenarios desconocidos: {", ".join(desconocidos)}')
+        try:
+            tamanos = [int(tamano) for tamano in options['tamanos'].split(',') if tamano.strip()]
+        except ValueError:
+            raise CommandError(f'Tamaños inválidos: {options["tamanos"]}')
+
+        # Se mide sobre una base de datos de pruebas (test_<nombre>), nunca sobre la real
+        # y con DEBUG=False, como en las pruebas, para no medir el registro de consultas de depuración
+        directorio = tempfile.mkdtemp(prefix='benchmark_')
+        setup_test_environment(debug=False)
+        configuracion = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            with override_settings(EXPORTACION_CACHE_DIR=os.path.join(directorio, 'cache')):
+                resultados = self._ejecutar(escenarios, tamanos, options['repeticiones'], directorio)
+        finally:
+            teardown_databases(configuracion, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        baseline_path = options['baseline']
+        if options['guardar']:
+            directorio_baseline = os.path.dirname(baseline_path)
+            if directorio_baseline:
+                os.makedirs(directorio_baseline, exist_ok=True)
+            with open(baseline_path, 'w', encoding='utf-8') as archivo:
+                json.dump({'fecha': datetime.now().isoformat(), 'resultados': resultados}, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'\nLínea base guardada en {baseline_path}'))
+            return
+
+        if not os.path.exists(baseline_path):
+            self.stdout.write(self.style.WARNING(f'\nSin línea base en {baseline_path} (usar --guardar para crearla)'))
+            return
+
+        with open(baseline_path, encoding='utf-8') as archivo:
+            baseline = json.load(archivo)['resultados']
+        regresiones = comparar_resultados(resultados, baseline, options['umbral'])
+        if regresiones:
+            for regresion in regresiones:
+                self.stdout.write(self.style.ERROR(f'  [X] {regresion}'))
+            raise CommandError(f'{len(regresiones)} regresión(es) frente a {baseline_path}')
+        self.stdout.write(self.style.SUCCESS(f'\n[OK] Sin regresiones frente a {baseline_path}'))
+
+    def _ejecutar(self, escenarios, tamanos, repeticiones, directorio):
+        resultados = {}
+        self.stdout.write(f'{"escenario":<28}{"segundos":>10}{"consultas":>11}{"memoria MB":>12}')
+        for tamano in tamanos:
+            self.stdout.write(f'\nPreparando {tamano} trabajadores...')
+            contexto = preparar_datos(tamano, directorio)
+            for nombre in escenarios:
+                clave = f'{nombre}@{tamano}'
+                resultados[clave] = medir(ESCENARIOS[nombre], contexto, repeticiones)
+                metricas = resultados[clave]
+                self.stdout.write(
+                    f'{clave:<28}{metricas["segundos"]:>10.4f}{metricas["consultas"]:>11}{metricas["memoria_mb"]:>12.2f}'
+                )
+        return resultados
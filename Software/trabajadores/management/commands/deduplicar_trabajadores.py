@@ -0,0 +1,143 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import Count
+from contratacion.models import Contratacion
+from ingreso.models import Ingreso
+from retiro.models import Retiro
+from seguridad_social.models import SeguridadSocial
+from proyectos.models import Proyecto
+from cronograma.models import Cronograma
+from trabajadores.models import Trabajador, TrabajadorAnioSnapshot
+from trabajadores.snapshot import reconstruir_snapshots
+import csv
+import os
+
+# Tablas que cuelgan del trabajador y su clave junto con él
+# (un registro por año, un cronograma por mes)
+RELACIONES = [
+    (Contratacion, 'anio'),
+    (Ingreso, 'anio'),
+    (Retiro, 'anio'),
+    (SeguridadSocial, 'anio'),
+    (Proyecto, 'anio'),
+    (Cronograma, 'mes'),
+]
+
+COLUMNAS_REPORTE = [
+    'tipo', 'numero', 'anio', 'id_conservado', 'id_eliminado', 'filas_movidas', 'filas_descartadas',
+]
+
+
+def grupos_duplicados():
+    """(tipo, numero, anio, [ids de mayor a menor]) de cada documento repetido en un año"""
+    return [
+        (grupo['tipo'], grupo['numero'], grupo['anio'], sorted(grupo['ids'], reverse=True))
+        for grupo in Trabajador.objects.order_by()
+        .values('tipo', 'numero', 'anio')
+        .annotate(total=Count('id'), ids=ArrayAgg('id'))
+        .filter(total__gt=1)
+        .order_by('tipo', 'numero', 'anio')
+    ]
+
+
+def _borrar(modelo, ids):
+    """
+    DELETE directo por id: sin señales ni cascada del ORM, que leerían
+    columnas que una base anterior a la migración 0006 aún no tiene.
+    """
+    if ids:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {modelo._meta.db_table} WHERE id = ANY(%s)', [list(ids)])
+
+
+def fusionar(conservado_id, eliminado_id):
+    """
+    Mueve al trabajador conservado los registros del eliminado cuya clave
+    (año o mes) el conservado no tiene; los demás se descartan. Retorna
+    (filas movidas, filas descartadas).
+    """
+    movidas = descartadas = 0
+    for modelo, clave in RELACIONES:
+        ocupadas = set(modelo.objects.filter(trabajador_id=conservado_id).values_list(clave, flat=True))
+        mover, descartar = [], []
+        for registro_id, valor in modelo.objects.filter(trabajador_id=eliminado_id).values_list('id', clave):
+            if valor in ocupadas:
+                descartar.append(registro_id)
+            else:
+                ocupadas.add(valor)
+                mover.append(registro_id)
+        if mover:
+            modelo.objects.filter(id__in=mover).update(trabajador_id=conservado_id)
+        _borrar(modelo, descartar)
+        movidas += len(mover)
+        descartadas += len(descartar)
+    return movidas, descartadas
+
+
+class Command(BaseCommand):
+    help = (
+        'Fusiona los trabajadores con el mismo documento en el mismo año (requisito de la '
+        'migración 0006): conserva el registro más reciente y le mueve las relaciones de los demás'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--aplicar',
+            action='store_true',
+            help='Aplicar la fusión (por defecto solo se reporta lo que se haría)'
+        )
+        parser.add_argument(
+            '--reporte',
+            type=str,
+            help='Archivo CSV con una fila por trabajador eliminado',
+            default=None
+        )
+
+    def handle(self, *args, **options):
+        aplicar = options['aplicar']
+        grupos = grupos_duplicados()
+        if not grupos:
+            self.stdout.write(self.style.SUCCESS('[OK] No hay documentos repetidos en un mismo año'))
+            return
+
+        self.stdout.write(self.style.WARNING(
+            f'{len(grupos)} documentos repetidos en un mismo año' + ('' if aplicar else ' (sin aplicar: use --aplicar)')
+        ))
+
+        filas = []
+        tiene_snapshot = TrabajadorAnioSnapshot._meta.db_table in connection.introspection.table_names()
+        with transaction.atomic():
+            for tipo, numero, anio, ids in grupos:
+                conservado_id, eliminados = ids[0], ids[1:]
+                self.stdout.write(f'  {tipo} {numero} ({anio}): se conserva {conservado_id}, se eliminan {eliminados}')
+                for eliminado_id in eliminados:
+                    movidas, descartadas = fusionar(conservado_id, eliminado_id)
+                    filas.append([tipo, numero, anio, conservado_id, eliminado_id, movidas, descartadas])
+
+                if tiene_snapshot:
+                    TrabajadorAnioSnapshot.objects.filter(trabajador_id__in=eliminados).delete()
+                _borrar(Trabajador, eliminados)
+
+            if tiene_snapshot:
+                # Las relaciones movidas con update() no pasan por las señales
+                reconstruir_snapshots(Trabajador.objects.filter(id__in=[ids[0] for *_, ids in grupos]))
+
+            if not aplicar:
+                transaction.set_rollback(True)
+
+        if options['reporte']:
+            directorio = os.path.dirname(options['reporte'])
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            with open(options['reporte'], 'w', newline='', encoding='utf-8') as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(COLUMNAS_REPORTE)
+                escritor.writerows(filas)
+            self.stdout.write(f'  - Reporte: {options["reporte"]}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n[OK] {len(filas)} trabajadores ' + ('eliminados' if aplicar else 'por eliminar') +
+            f', {sum(fila[5] for fila in filas)} registros movidos, '
+            f'{sum(fila[6] for fila in filas)} descartados por clave repetida'
+        ))
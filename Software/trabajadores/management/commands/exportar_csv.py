@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from trabajadores.csv_novedades import exportar_csv
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Exporta el formato NOVEDADES a CSV con COPY de PostgreSQL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Archivo CSV de salida',
+            default='export/NOVEDADES.csv'
+        )
+        parser.add_argument(
+            '--anio',
+            type=str,
+            help='Años a exportar, separados por coma (ej: 2024,2025). Si no se especifica, todos',
+            default=None
+        )
+
+    def handle(self, *args, **options):
+        output_path = options['output']
+        anios = None
+        if options['anio']:
+            try:
+                anios = [int(anio) for anio in options['anio'].split(',') if anio.strip()]
+            except ValueError:
+                raise CommandError(f'Años inválidos: {options["anio"]}')
+
+        directorio = os.path.dirname(output_path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self.stdout.write(self.style.SUCCESS(f'Exportando CSV a: {output_path}'))
+        inicio = time.perf_counter()
+        with open(output_path, 'wb') as archivo:
+            total = exportar_csv(archivo, anios)
+        segundos = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS('\n[OK] Exportación completada!'))
+        self.stdout.write(f'  - Filas exportadas: {total}')
+        self.stdout.write(f'  - Tiempo: {segundos:.2f} s ({total / segundos if segundos else 0:,.0f} filas/s)')
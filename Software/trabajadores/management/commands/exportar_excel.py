@@ -1,14 +1,9 @@
 from django.core.management.base import BaseCommand
 from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from datetime import datetime
-from trabajadores.models import Trabajador
 from contratacion.models import Contratacion
-from ingreso.models import Ingreso
-from retiro.models import Retiro
-from seguridad_social.models import SeguridadSocial
-from proyectos.models import Proyecto
-from cronograma.models import Cronograma
+from trabajadores.models import Trabajador
+from trabajadores.exportacion import escribir_hoja
 import os
 
 
@@ -99,125 +94,26 @@ class Command(BaseCommand):
             if ws.max_row > 4:
                 ws.delete_rows(5, ws.max_row - 4)
 
-            # Obtener solo los trabajadores que tienen contratación para el año específico
-            contrataciones_ids = Contratacion.objects.filter(anio=anio).values_list('trabajador_id', flat=True)
-            trabajadores = Trabajador.objects.filter(id__in=contrataciones_ids).order_by('id')
+            # Trabajadores del año (Trabajador.anio) con contratación en el año. La
+            # fila sale del snapshot de cada trabajador-año: una contratación de
+            # --anio en un trabajador de otro año no lo incluye en esta hoja
+            trabajadores = Trabajador.objects.filter(anio=anio, contrataciones__anio=anio).order_by('id')
             total = trabajadores.count()
+            omitidas = Contratacion.objects.filter(anio=anio).exclude(trabajador__anio=anio).count()
+            if omitidas:
+                self.stdout.write(self.style.WARNING(
+                    f'  [!] {omitidas} contrataciones de {anio} son de trabajadores registrados en otro año '
+                    'y no se exportan en esta hoja'
+                ))
 
             self.stdout.write(f'\n  Exportando {total} trabajadores con datos del año {anio}...\n')
 
+            def reportar_progreso(count):
+                if count % 20 == 0:
+                    self.stdout.write(f'  Exportados {count}/{total} trabajadores...')
+
             # Escribir datos empezando en la fila 5 (los headers están en 3-4)
-            row_idx = 5
-            count = 0
-
-            for trabajador in trabajadores:
-                try:
-                    # Columna 0: Número secuencial
-                    ws.cell(row=row_idx, column=1, value=count + 1)
-
-                    # Columnas 1-8: Identificación
-                    ws.cell(row=row_idx, column=2, value=trabajador.tipo)
-                    ws.cell(row=row_idx, column=3, value=trabajador.numero)
-                    ws.cell(row=row_idx, column=4, value=trabajador.fecha_expedicion_cedula)
-                    ws.cell(row=row_idx, column=5, value=trabajador.fecha_nacimiento)
-                    ws.cell(row=row_idx, column=6, value=trabajador.primer_apellido)
-                    ws.cell(row=row_idx, column=7, value=trabajador.segundo_apellido)
-                    ws.cell(row=row_idx, column=8, value=trabajador.primer_nombre)
-                    ws.cell(row=row_idx, column=9, value=trabajador.segundo_nombre)
-
-                    # Columnas 9-14: Contratación
-                    try:
-                        contratacion = trabajador.contrataciones.get(anio=anio)
-                        ws.cell(row=row_idx, column=10, value=contratacion.get_tipo_contrato_display())
-                        ws.cell(row=row_idx, column=11, value=contratacion.cargo)
-                        ws.cell(row=row_idx, column=12, value=float(contratacion.salario_contratado))
-                        ws.cell(row=row_idx, column=13, value=contratacion.municipio_base)
-                        ws.cell(row=row_idx, column=14, value=contratacion.fecha_inicio_contrato)
-                        ws.cell(row=row_idx, column=15, value=contratacion.fecha_final_contrato)
-                    except Contratacion.DoesNotExist:
-                        pass
-
-                    # Columnas 15-18: Ingreso
-                    try:
-                        ingreso = trabajador.ingresos.get(anio=anio)
-                        ws.cell(row=row_idx, column=16, value=ingreso.fecha_ingreso)
-                        ws.cell(row=row_idx, column=17, value=ingreso.examen_ingreso)
-                        ws.cell(row=row_idx, column=18, value=ingreso.fecha_entrega_epp)
-                        ws.cell(row=row_idx, column=19, value=ingreso.fecha_entrega_dotacion)
-                    except Ingreso.DoesNotExist:
-                        pass
-
-                    # Columnas 19-22: Retiro
-                    try:
-                        retiro = trabajador.retiros.get(anio=anio)
-                        ws.cell(row=row_idx, column=20, value=retiro.fecha_retiro)
-                        ws.cell(row=row_idx, column=21, value=retiro.fecha_liquidacion)
-                        ws.cell(row=row_idx, column=22, value=float(retiro.valor_liquidacion) if retiro.valor_liquidacion else None)
-                        ws.cell(row=row_idx, column=23, value=retiro.fecha_examen_retiro)
-                    except Retiro.DoesNotExist:
-                        pass
-
-                    # Columnas 23-29: Seguridad Social
-                    try:
-                        seguridad = trabajador.seguridad_social_registros.get(anio=anio)
-                        ws.cell(row=row_idx, column=24, value=seguridad.eps)
-                        ws.cell(row=row_idx, column=25, value=seguridad.fecha_afiliacion_eps)
-                        ws.cell(row=row_idx, column=26, value=seguridad.caja_compensacion)
-                        ws.cell(row=row_idx, column=27, value=seguridad.fecha_afiliacion_caja)
-                        ws.cell(row=row_idx, column=28, value=seguridad.fondo_pension)
-                        ws.cell(row=row_idx, column=29, value=seguridad.fecha_afiliacion_pension)
-                        ws.cell(row=row_idx, column=30, value=seguridad.arl)
-                    except SeguridadSocial.DoesNotExist:
-                        pass
-
-                    # Columnas 32-36: Proyecto
-                    try:
-                        proyecto = trabajador.proyectos_asignados.get(anio=anio)
-                        ws.cell(row=row_idx, column=33, value='X' if proyecto.administrativo else '')
-                        ws.cell(row=row_idx, column=34, value='X' if proyecto.construccion_instalaciones else '')
-                        ws.cell(row=row_idx, column=35, value='X' if proyecto.construccion_redes else '')
-                        ws.cell(row=row_idx, column=36, value='X' if proyecto.servicios else '')
-                        ws.cell(row=row_idx, column=37, value='X' if proyecto.mantenimiento_redes else '')
-                    except Proyecto.DoesNotExist:
-                        pass
-
-                    # Columnas 37-84: Cronogramas (12 meses × 4 columnas)
-                    meses_config = [
-                        {'mes': datetime(anio, 1, 1).date(), 'col': 38},   # Enero
-                        {'mes': datetime(anio, 2, 1).date(), 'col': 42},   # Febrero
-                        {'mes': datetime(anio, 3, 1).date(), 'col': 46},   # Marzo
-                        {'mes': datetime(anio, 4, 1).date(), 'col': 50},   # Abril
-                        {'mes': datetime(anio, 5, 1).date(), 'col': 54},   # Mayo
-                        {'mes': datetime(anio, 6, 1).date(), 'col': 58},   # Junio
-                        {'mes': datetime(anio, 7, 1).date(), 'col': 62},   # Julio
-                        {'mes': datetime(anio, 8, 1).date(), 'col': 66},   # Agosto
-                        {'mes': datetime(anio, 9, 1).date(), 'col': 70},   # Septiembre
-                        {'mes': datetime(anio, 10, 1).date(), 'col': 74},  # Octubre
-                        {'mes': datetime(anio, 11, 1).date(), 'col': 78},  # Noviembre
-                        {'mes': datetime(anio, 12, 1).date(), 'col': 82},  # Diciembre
-                    ]
-
-                    for mes_info in meses_config:
-                        try:
-                            cronograma = Cronograma.objects.get(trabajador=trabajador, mes=mes_info['mes'])
-                            col_base = mes_info['col']
-
-                            ws.cell(row=row_idx, column=col_base, value=cronograma.municipio_ejecucion or '')
-                            ws.cell(row=row_idx, column=col_base + 1, value=float(cronograma.salario_cotizacion) if cronograma.salario_cotizacion else 0)
-                            ws.cell(row=row_idx, column=col_base + 2, value=cronograma.dias_laborados or 0)
-                            ws.cell(row=row_idx, column=col_base + 3, value=float(cronograma.sueldo_devengado) if cronograma.sueldo_devengado else 0)
-                        except Cronograma.DoesNotExist:
-                            # Si no existe el cronograma, dejar las celdas vacías
-                            pass
-
-                    count += 1
-                    row_idx += 1
-
-                    if count % 20 == 0:
-                        self.stdout.write(f'  Exportados {count}/{total} trabajadores...')
-
-                except Exception as e:
-                    self.stdout.write(self.style.WARNING(f'  [!] Error exportando trabajador ID={trabajador.id}: {str(e)}'))
+            count = escribir_hoja(ws, trabajadores, fila_inicio=5, progreso=reportar_progreso)
 
             # Guardar el archivo
             wb.save(output_path)
@@ -0,0 +1,316 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from openpyxl import Workbook
+from datetime import date, timedelta
+from trabajadores.exportacion import PLANTILLA_NOVEDADES, obtener_encabezado
+from trabajadores.formato_novedades import codificar_fila
+from trabajadores.models import Trabajador
+from trabajadores.snapshot import construir_snapshot, guardar_snapshots
+from contratacion.models import Contratacion
+from ingreso.models import Ingreso
+from retiro.models import Retiro
+from seguridad_social.models import SeguridadSocial
+from proyectos.models import Proyecto
+from cronograma.models import Cronograma
+import os
+import random
+import re
+import time
+
+
+class Command(BaseCommand):
+    help = 'Genera trabajadores sintéticos con todas sus tablas (y opcionalmente un libro NOVEDADES) para pruebas de carga'
+
+    # Los documentos sintéticos empiezan por este prefijo para no chocar con los reales
+    PREFIJO_DOCUMENTO = '99'
+
+    NOMBRES = [
+        'ANDRES', 'CARLOS', 'JUAN', 'LUIS', 'JORGE', 'DIEGO', 'OSCAR', 'EDWIN', 'JAIRO', 'FABIO',
+        'MARIA', 'ANA', 'LUZ', 'CLAUDIA', 'SANDRA', 'PAOLA', 'DIANA', 'CAROLINA', 'LILIANA', 'MARCELA',
+    ]
+    APELLIDOS = [
+        'BURBANO', 'ORDOÑEZ', 'GUERRERO', 'MUÑOZ', 'ROSERO', 'BENAVIDES', 'ERAZO', 'CHAVES', 'DELGADO',
+        'PANTOJA', 'CORAL', 'INSUASTY', 'ZAMBRANO', 'MORA', 'LOPEZ', 'MARTINEZ', 'ARTEAGA', 'OBANDO',
+    ]
+    CARGOS = [
+        'OPERARIO', 'AUXILIAR DE OBRA', 'TECNICO ELECTRICISTA', 'LINIERO', 'CONDUCTOR',
+        'INGENIERO RESIDENTE', 'AUXILIAR ADMINISTRATIVO', 'SUPERVISOR', 'ALMACENISTA',
+    ]
+    # (tipo de contrato, peso)
+    TIPOS_CONTRATO = [
+        ('PRESTACION_SERVICIOS', 70), ('TERMINO_FIJO', 15), ('TERMINO_INDEFINIDO', 8),
+        ('OBRA_LABOR', 5), ('APRENDIZAJE', 2),
+    ]
+    EPS = ['NUEVA EPS', 'SANITAS S.A.S.', 'EMSSANAR', 'MALLAMAS', 'SURA EPS']
+    CAJAS = ['COMFAMILIAR DE NARIÑO']
+    FONDOS = ['PORVENIR', 'PROTECCION', 'COLPENSIONES', 'COLFONDOS']
+    ARL = [('POSITIVA', 80), ('SURA', 10), ('BOLIVAR', 10)]
+    PROYECTOS = ['administrativo', 'construccion_instalaciones', 'construccion_redes', 'servicios', 'mantenimiento_redes']
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trabajadores',
+            type=int,
+            help='Cantidad de trabajadores por año',
+            default=1000
+        )
+        parser.add_argument(
+            '--anios',
+            type=str,
+            help='Años a generar: rango (2023-2026) o lista separada por comas (2024,2025)',
+            default='2024-2025'
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            help='Semilla aleatoria (la misma semilla genera los mismos datos)',
+            default=42
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Trabajadores generados y guardados por lote',
+            default=1000
+        )
+        parser.add_argument(
+            '--excel',
+            type=str,
+            help='Escribir también un libro NOVEDADES (una hoja por año) en esta ruta',
+            default=None
+        )
+        parser.add_argument(
+            '--solo-excel',
+            action='store_true',
+            help='Solo escribir el libro, sin guardar en la base de datos'
+        )
+        parser.add_argument(
+            '--limpiar',
+            action='store_true',
+            help='Eliminar los trabajadores sintéticos existentes antes de generar'
+        )
+
+    def handle(self, *args, **options):
+        cantidad = options['trabajadores']
+        anios = self._parse_anios(options['anios'])
+        semilla = options['semilla']
+        batch_size = options['batch_size']
+        excel_path = options['excel']
+        solo_excel = options['solo_excel']
+
+        if cantidad < 1 or batch_size < 1:
+            raise CommandError('--trabajadores y --batch-size deben ser mayores que 0')
+        if solo_excel and not excel_path:
+            raise CommandError('--solo-excel requiere --excel')
+
+        if options['limpiar'] and not solo_excel:
+            eliminados, _ = self._sinteticos().delete()
+            self.stdout.write(f'Registros sintéticos eliminados: {eliminados}')
+
+        wb = Workbook(write_only=True) if excel_path else None
+        encabezado = obtener_encabezado(PLANTILLA_NOVEDADES) if wb and os.path.exists(PLANTILLA_NOVEDADES) else None
+
+        inicio = time.monotonic()
+        for anio in anios:
+            ws = None
+            if wb:
+                ws = wb.create_sheet(f'NOVEDADES {anio}')
+                if encabezado:
+                    encabezado.aplicar(ws)
+                else:
+                    ws.append(['#', 'IDENTIFICACIÓN'])
+                    ws.append(['N°', 'TIPO', 'NUMERO'])
+
+            for desde in range(0, cantidad, batch_size):
+                indices = range(desde, min(desde + batch_size, cantidad))
+                lote = [self._generar(indice, anio, semilla) for indice in indices]
+                if solo_excel:
+                    # Sin base de datos: ids ficticios para relacionar las tablas al escribir
+                    for indice, registros in zip(indices, lote):
+                        registros['trabajador'].id = indice + 1
+                else:
+                    self._guardar_lote(lote)
+                if ws is not None:
+                    self._escribir_lote(ws, lote, numero_inicial=desde)
+
+                self.stdout.write(f'  {anio}: {indices[-1] + 1}/{cantidad} trabajadores')
+
+        if wb:
+            directorio = os.path.dirname(excel_path)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            wb.save(excel_path)
+            self.stdout.write(self.style.SUCCESS(f'Libro escrito: {excel_path}'))
+
+        total = cantidad * len(anios)
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {total} trabajadores-año generados ({total * 18} filas) en {time.monotonic() - inicio:.1f} s'
+        ))
+
+    def _parse_anios(self, valor):
+        """'2023-2026' o '2024,2025' -> lista de años"""
+        rango = re.fullmatch(r'\s*(\d{4})\s*-\s*(\d{4})\s*', valor)
+        if rango:
+            desde, hasta = int(rango.group(1)), int(rango.group(2))
+            if desde > hasta:
+                raise CommandError(f'Rango de años inválido: {valor}')
+            return list(range(desde, hasta + 1))
+        try:
+            return sorted({int(parte) for parte in valor.split(',') if parte.strip()})
+        except ValueError:
+            raise CommandError(f'Años inválidos: {valor}')
+
+    def _sinteticos(self):
+        return Trabajador.objects.filter(tipo='CC', numero__startswith=self.PREFIJO_DOCUMENTO)
+
+    def _generar(self, indice, anio, semilla):
+        """
+        Registros sin guardar de un trabajador en un año. La identidad solo
+        depende de `indice` (la misma persona en todos los años); los datos
+        del año cambian con `anio`.
+        """
+        persona = random.Random(f'{semilla}-{indice}')
+        fecha_nacimiento = date(1960, 1, 1) + timedelta(days=persona.randint(0, 45 * 365))
+        trabajador = Trabajador(
+            tipo='CC',
+            numero=f'{self.PREFIJO_DOCUMENTO}{indice:08d}',
+            fecha_nacimiento=fecha_nacimiento,
+            fecha_expedicion_cedula=fecha_nacimiento + timedelta(days=18 * 365 + persona.randint(5, 400)),
+            primer_apellido=persona.choice(self.APELLIDOS),
+            segundo_apellido=persona.choice(self.APELLIDOS),
+            primer_nombre=persona.choice(self.NOMBRES),
+            segundo_nombre=persona.choice(self.NOMBRES + [''] * 10),
+            anio=anio,
+        )
+        municipio_base = persona.choice(['PASTO'] * 15 + [codigo for codigo, _ in Contratacion.MUNICIPIOS_NARINO])
+
+        rnd = random.Random(f'{semilla}-{indice}-{anio}')
+        tipo_contrato = self._ponderado(rnd, self.TIPOS_CONTRATO)
+        salario = rnd.randrange(1_300_000, 6_000_000, 50_000)
+        fecha_inicio = date(anio, rnd.randint(1, 6), 1)
+        retirado = rnd.random() < 0.1
+        fecha_retiro = date(anio, rnd.randint(fecha_inicio.month + 1, 12), 15) if retirado else None
+
+        contratacion = Contratacion(
+            anio=anio,
+            tipo_contrato=tipo_contrato,
+            cargo=rnd.choice(self.CARGOS),
+            salario_contratado=salario,
+            municipio_base=municipio_base,
+            fecha_inicio_contrato=fecha_inicio,
+            fecha_final_contrato=None if tipo_contrato == 'TERMINO_INDEFINIDO' else date(anio, 12, 31),
+        )
+        ingreso = Ingreso(
+            anio=anio,
+            fecha_ingreso=fecha_inicio,
+            examen_ingreso=fecha_inicio - timedelta(days=rnd.randint(1, 10)),
+            fecha_entrega_epp=fecha_inicio + timedelta(days=rnd.randint(0, 5)),
+            fecha_entrega_dotacion=fecha_inicio + timedelta(days=rnd.randint(0, 30)),
+        )
+        retiro = Retiro(
+            anio=anio,
+            fecha_retiro=fecha_retiro,
+            fecha_liquidacion=fecha_retiro + timedelta(days=10) if retirado else None,
+            valor_liquidacion=salario * rnd.randint(1, 3) if retirado else None,
+            fecha_examen_retiro=fecha_retiro + timedelta(days=3) if retirado else None,
+        )
+        seguridad_social = SeguridadSocial(
+            anio=anio,
+            eps=persona.choice(self.EPS),
+            fecha_afiliacion_eps=fecha_inicio,
+            caja_compensacion=rnd.choice(self.CAJAS),
+            fecha_afiliacion_caja=fecha_inicio,
+            fondo_pension=persona.choice(self.FONDOS),
+            fecha_afiliacion_pension=fecha_inicio,
+            arl=self._ponderado(rnd, self.ARL),
+            riesgo=rnd.choice(['1', '2', '3', '4', '5']),
+            fecha_afiliacion_arl=fecha_inicio,
+        )
+        asignados = set(rnd.sample(self.PROYECTOS, rnd.choice([1, 1, 1, 2])))
+        proyecto = Proyecto(anio=anio, **{campo: campo in asignados for campo in self.PROYECTOS})
+
+        # 12 meses como los crea importar_excel: los meses fuera del contrato quedan en cero
+        cronogramas = []
+        for mes in range(1, 13):
+            activo = mes >= fecha_inicio.month and (not retirado or mes <= fecha_retiro.month)
+            dias = (15 if retirado and mes == fecha_retiro.month else 30) if activo else 0
+            cronogramas.append(Cronograma(
+                mes=date(anio, mes, 1),
+                anio=anio,
+                municipio_ejecucion=(municipio_base if rnd.random() < 0.8 else rnd.choice(Cronograma.MUNICIPIOS_NARINO)[0]) if activo else '',
+                salario_cotizacion=salario if activo else 0,
+                dias_laborados=dias,
+                sueldo_devengado=round(salario * dias / 30),
+            ))
+
+        return {
+            'trabajador': trabajador,
+            'contratacion': contratacion,
+            'ingreso': ingreso,
+            'retiro': retiro,
+            'seguridad_social': seguridad_social,
+            'proyecto': proyecto,
+            'cronogramas': cronogramas,
+        }
+
+    def _ponderado(self, rnd, opciones):
+        valores, pesos = zip(*opciones)
+        return rnd.choices(valores, weights=pesos)[0]
+
+    def _campos_actualizables(self, model, claves):
+        return [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in claves + ['fecha_creacion']
+        ]
+
+    def _guardar_lote(self, lote):
+        """
+        Guarda el lote con un bulk_create por tabla. Es un upsert sobre la
+        clave única de cada tabla, así que volver a ejecutar el comando con
+        la misma semilla reescribe los mismos registros.
+        """
+        with transaction.atomic():
+            trabajadores = Trabajador.objects.bulk_create(
+                [registros['trabajador'] for registros in lote],
+                update_conflicts=True,
+                unique_fields=['tipo', 'numero', 'anio'],
+                update_fields=self._campos_actualizables(Trabajador, ['tipo', 'numero', 'anio', 'huella_importacion', 'busqueda']),
+            )
+
+            for clave, model in [
+                ('contratacion', Contratacion), ('ingreso', Ingreso), ('retiro', Retiro),
+                ('seguridad_social', SeguridadSocial), ('proyecto', Proyecto),
+            ]:
+                registros_tabla = []
+                for trabajador, registros in zip(trabajadores, lote):
+                    registros[clave].trabajador = trabajador
+                    registros_tabla.append(registros[clave])
+                model.objects.bulk_create(
+                    registros_tabla,
+                    update_conflicts=True,
+                    unique_fields=['trabajador', 'anio'],
+                    update_fields=self._campos_actualizables(model, ['trabajador', 'anio']),
+                )
+
+            cronogramas = []
+            for trabajador, registros in zip(trabajadores, lote):
+                for cronograma in registros['cronogramas']:
+                    cronograma.trabajador = trabajador
+                    cronogramas.append(cronograma)
+            Cronograma.objects.bulk_create(
+                cronogramas,
+                batch_size=5000,
+                update_conflicts=True,
+                unique_fields=['trabajador', 'mes'],
+                update_fields=self._campos_actualizables(Cronograma, ['trabajador', 'mes']),
+            )
+
+            # bulk_create no envía señales: el snapshot se guarda con los mismos registros
+            guardar_snapshots([self._snapshot(registros) for registros in lote])
+
+    def _snapshot(self, registros):
+        return construir_snapshot(registros['trabajador'], registros, registros['cronogramas'])
+
+    def _escribir_lote(self, ws, lote, numero_inicial):
+        """Agrega las filas NOVEDADES del lote con el mismo formato de la exportación"""
+        for numero, registros in enumerate(lote, start=numero_inicial + 1):
+            ws.append(codificar_fila(registros['trabajador'], self._snapshot(registros), numero))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+from trabajadores.csv_novedades import ErrorFormatoCSV, importar_csv
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Importa un CSV con el formato NOVEDADES usando COPY de PostgreSQL y upsert por tabla'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            help='Ruta al archivo CSV a importar (encabezado con los nombres de columna de exportar_csv)',
+            default='export/NOVEDADES.csv'
+        )
+        parser.add_argument(
+            '--anio',
+            type=int,
+            help='Año de las filas sin columna "anio" (ej: 2024, 2025)',
+            default=2025
+        )
+
+    def handle(self, *args, **options):
+        file_path = options['file']
+
+        # Resultado de la ejecución, disponible para quien invoca el comando
+        self.resumen = None
+        self.error = None
+
+        if not os.path.exists(file_path):
+            self.error = f'El archivo {file_path} no existe'
+            self.stdout.write(self.style.ERROR(self.error))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Leyendo archivo: {file_path}'))
+        inicio = time.perf_counter()
+        try:
+            with open(file_path, 'rb') as archivo:
+                self.resumen = importar_csv(archivo, anio=options['anio'])
+        except (ErrorFormatoCSV, DatabaseError) as e:
+            # Todo ocurre en una transacción: no queda nada a medias
+            self.error = f'Error al importar: {str(e).strip()}'
+            self.stdout.write(self.style.ERROR(self.error))
+            return
+        segundos = time.perf_counter() - inicio
+
+        self.stdout.write('\n' + '='*60)
+        self.stdout.write(self.style.SUCCESS('\n[OK] Importacion completada!'))
+        self.stdout.write(f'  - Filas leídas: {self.resumen["filas"]}')
+        self.stdout.write(f'  - Trabajadores creados: {self.resumen["creados"]}')
+        self.stdout.write(f'  - Trabajadores actualizados: {self.resumen["actualizados"]}')
+        self.stdout.write(f'  - Trabajadores sin cambios: {self.resumen["sin_cambios"]}')
+        self.stdout.write(f'  - Tiempo: {segundos:.2f} s ({self.resumen["filas"] / segundos if segundos else 0:,.0f} filas/s)')
+        self.stdout.write('='*60 + '\n')
@@ -1,20 +1,108 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connections, transaction
 from openpyxl import load_workbook
 from datetime import datetime
+from functools import partial
+from io import StringIO
+from trabajadores.formato_novedades import decodificar_fila, texto_celda
 from trabajadores.models import Trabajador
+from trabajadores.snapshot import actualizar_snapshots
 from contratacion.models import Contratacion
 from ingreso.models import Ingreso
 from retiro.models import Retiro
 from seguridad_social.models import SeguridadSocial
 from proyectos.models import Proyecto
 from cronograma.models import Cronograma
+import django
+import hashlib
+import json
+import multiprocessing
 import os
+import re
+
+
+# Hojas de un año en el libro: "NOVEDADES 2024", "NOVEDADES 2024 (2)" o "NOVEDADES 24"
+PATRON_HOJA_NOVEDADES = re.compile(r'^NOVEDADES\s+(\d{4}|\d{2})(\s*\(\d+\))?$', re.IGNORECASE)
+
+
+def nombres_hoja(anio):
+    """Nombres de la hoja de un año, en orden de preferencia"""
+    return [
+        f'NOVEDADES {anio}',
+        f'NOVEDADES {anio} (2)',
+        f'NOVEDADES {str(anio)[-2:]}',  # Ej: "NOVEDADES 24"
+    ]
+
+
+def hojas_novedades(sheetnames):
+    """
+    Hojas NOVEDADES del libro: {año: hoja}, ordenado por año. Si un año
+    tiene varias hojas se elige como en la auto-detección (`nombres_hoja`).
+    """
+    candidatas = {}
+    for nombre in sheetnames:
+        coincidencia = PATRON_HOJA_NOVEDADES.match(nombre.strip())
+        if coincidencia:
+            anio = int(coincidencia.group(1))
+            candidatas.setdefault(anio + 2000 if anio < 100 else anio, []).append(nombre)
+
+    hojas = {}
+    for anio, encontradas in sorted(candidatas.items()):
+        preferidas = [nombre for nombre in nombres_hoja(anio) if nombre in encontradas]
+        hojas[anio] = (preferidas or encontradas)[0]
+    return hojas
+
+
+def _importar_hoja(file_path, anio, sheet_name, batch_size, forzar):
+    """
+    Importa la hoja de un año en una sola transacción: si la hoja no se
+    puede leer, el año no queda a medias. Retorna (anio, hoja, resumen,
+    error, salida del comando).
+    """
+    salida = StringIO()
+    comando = Command(stdout=salida, stderr=salida)
+    with transaction.atomic():
+        call_command(
+            comando, file=file_path, anio=anio, sheet=sheet_name, batch_size=batch_size, forzar=forzar
+        )
+        if comando.error:
+            transaction.set_rollback(True)
+    return anio, sheet_name, comando.resumen, comando.error, salida.getvalue()
+
+
+def _importar_hoja_en_proceso(*args):
+    """`_importar_hoja` en un proceso del pool, que cierra su conexión al terminar"""
+    try:
+        return _importar_hoja(*args)
+    finally:
+        connections.close_all()
 
 
 class Command(BaseCommand):
     help = 'Importa trabajadores desde un archivo Excel'
 
+    # Tablas con un registro por trabajador y año: (clave en los datos, modelo, etiqueta)
+    TABLAS_ANUALES = [
+        ('contratacion', Contratacion, 'Contratacion'),
+        ('ingreso', Ingreso, 'Ingreso'),
+        ('retiro', Retiro, 'Retiro'),
+        ('seguridad_social', SeguridadSocial, 'Seguridad Social'),
+        ('proyecto', Proyecto, 'Proyecto'),
+    ]
+
+    CAMPOS_TRABAJADOR = [
+        'primer_apellido', 'segundo_apellido', 'primer_nombre', 'segundo_nombre',
+        'fecha_nacimiento', 'fecha_expedicion_cedula',
+    ]
+
+    CAMPOS_CRONOGRAMA = ['municipio_ejecucion', 'salario_cotizacion', 'dias_laborados', 'sueldo_devengado']
+
+    # Callback opcional progreso(filas_procesadas, filas_totales); lo asigna el
+    # ejecutor de tareas en segundo plano (tareas.ejecucion)
+    progreso = None
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--file',
@@ -34,33 +122,64 @@ class Command(BaseCommand):
             help='Nombre de la hoja a importar (ej: "NOVEDADES 2024"). Si no se especifica, se auto-detecta',
             default=None
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Importar por lotes de N filas con bulk_create (0 = fila por fila)',
+            default=0
+        )
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Reescribir también las filas sin cambios desde la última importación'
+        )
+        parser.add_argument(
+            '--all-sheets',
+            action='store_true',
+            help='Importar todas las hojas "NOVEDADES <año>" del libro, cada año en su propio proceso '
+                 'y transacción (se ignoran --anio y --sheet)'
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            help='Procesos en paralelo con --all-sheets (0 = uno por hoja, hasta el número de CPU)',
+            default=0
+        )
 
     def handle(self, *args, **options):
         file_path = options['file']
         anio = options['anio']
         sheet_name = options['sheet']
+        batch_size = options['batch_size']
+        forzar = options['forzar']
+
+        # Resultado de la ejecución, disponible para quien invoca el comando
+        self.resumen = None
+        self.error = None
 
         # Verificar que el archivo existe
         if not os.path.exists(file_path):
-            self.stdout.write(self.style.ERROR(f'El archivo {file_path} no existe'))
+            self.error = f'El archivo {file_path} no existe'
+            self.stdout.write(self.style.ERROR(self.error))
+            return
+
+        if options['all_sheets']:
+            self._importar_todas(file_path, batch_size, forzar, options['procesos'])
             return
 
         self.stdout.write(self.style.SUCCESS(f'Leyendo archivo: {file_path}'))
         self.stdout.write(self.style.SUCCESS(f'Año a importar: {anio}'))
 
+        wb = None
         try:
-            wb = load_workbook(file_path)
+            # Modo solo lectura: las filas se leen del XML a medida que se iteran,
+            # sin cargar estilos ni las demás hojas del libro
+            wb = load_workbook(file_path, read_only=True, data_only=True)
 
             # Auto-detectar la hoja si no se especificó
             if not sheet_name:
                 # Buscar hojas con el patrón "NOVEDADES {año}"
-                possible_names = [
-                    f'NOVEDADES {anio}',
-                    f'NOVEDADES {anio} (2)',
-                    f'NOVEDADES {str(anio)[-2:]}',  # Ej: "NOVEDADES 24"
-                ]
-
-                for name in possible_names:
+                for name in nombres_hoja(anio):
                     if name in wb.sheetnames:
                         sheet_name = name
                         break
@@ -72,7 +191,8 @@ class Command(BaseCommand):
 
             # Cargar la hoja específica
             if sheet_name not in wb.sheetnames:
-                self.stdout.write(self.style.ERROR(f'La hoja "{sheet_name}" no existe en el archivo'))
+                self.error = f'La hoja "{sheet_name}" no existe en el archivo'
+                self.stdout.write(self.style.ERROR(self.error))
                 self.stdout.write(f'Hojas disponibles: {", ".join(wb.sheetnames)}')
                 return
 
@@ -81,8 +201,8 @@ class Command(BaseCommand):
 
             # Encontrar la fila donde comienzan los datos (después de los headers)
             data_start_row = None
-            for row_idx, row in enumerate(ws.iter_rows(min_row=1, max_row=10), start=1):
-                cell_value = str(row[0].value).strip() if row[0].value else ""
+            for row_idx, row in enumerate(ws.iter_rows(min_row=1, max_row=10, values_only=True), start=1):
+                cell_value = str(row[0]).strip() if row and row[0] else ""
                 # Buscar la fila que tiene "N°" o un número
                 if cell_value and (cell_value == "N°" or cell_value.isdigit()):
                     if cell_value == "N°":
@@ -92,7 +212,8 @@ class Command(BaseCommand):
                     break
 
             if not data_start_row:
-                self.stdout.write(self.style.ERROR('No se pudo encontrar el inicio de los datos'))
+                self.error = 'No se pudo encontrar el inicio de los datos'
+                self.stdout.write(self.style.ERROR(self.error))
                 return
 
             self.stdout.write(f'Los datos comienzan en la fila {data_start_row}')
@@ -101,341 +222,336 @@ class Command(BaseCommand):
             header_row_idx = data_start_row - 1 if data_start_row > 1 else 1
 
             # Procesar cada fila de datos
-            trabajadores_creados = 0
-            trabajadores_actualizados = 0
-            errores = 0
-
-            for row_idx, row in enumerate(ws.iter_rows(min_row=data_start_row), start=data_start_row):
-                try:
-                    # Extraer valores de las celdas
-                    numero = self._get_cell_value(row, 0)
-
-                    # Si no hay número, saltar esta fila
-                    if not numero:
-                        continue
-
-                    self.stdout.write(f'\nProcesando trabajador N° {numero}...')
-
-                    with transaction.atomic():
-                        # Datos de Identificación (columnas corregidas según el Excel real)
-                        fecha_nac = self._parse_date(self._get_cell_value(row, 4))  # Col 4: Fecha de nacimiento
-                        fecha_exp = self._parse_date(self._get_cell_value(row, 3))  # Col 3: Fecha expedición cédula
-
-                        # Si no hay fecha de expedición, usar una estimada (18 años después de nacimiento)
-                        if not fecha_exp and fecha_nac:
-                            from datetime import timedelta
-                            fecha_exp = fecha_nac.replace(year=fecha_nac.year + 18) if fecha_nac.year + 18 <= 2025 else fecha_nac
-                        elif not fecha_exp and not fecha_nac:
-                            # Si ambas son None, usar una fecha por defecto
-                            fecha_exp = datetime(2000, 1, 1).date()
-                            fecha_nac = datetime(1982, 1, 1).date()
-                        elif fecha_exp and not fecha_nac:
-                            # Si solo hay fecha de expedición, estimar nacimiento
-                            fecha_nac = fecha_exp.replace(year=fecha_exp.year - 18)
-
-                        trabajador_data = {
-                            'numero': self._get_cell_value(row, 2),  # Col 2: Número de identificación
-                            'tipo': self._map_tipo_identificacion(self._get_cell_value(row, 1)),  # Col 1: Tipo (CC, CE, etc)
-                            'primer_apellido': self._get_cell_value(row, 5),  # Col 5: Primer apellido
-                            'segundo_apellido': self._get_cell_value(row, 6),  # Col 6: Segundo apellido
-                            'primer_nombre': self._get_cell_value(row, 7),  # Col 7: Primer nombre
-                            'segundo_nombre': self._get_cell_value(row, 8),  # Col 8: Segundo nombre
-                            'fecha_nacimiento': fecha_nac,
-                            'fecha_expedicion_cedula': fecha_exp,
-                        }
-
-                        # Crear trabajador (sin verificar duplicados)
-                        trabajador = Trabajador.objects.create(**trabajador_data)
-                        trabajadores_creados += 1
-                        self.stdout.write(self.style.SUCCESS(f'  [+] Trabajador creado: {trabajador.nombre_completo}'))
-
-                        # Datos de Contratación (columnas 9-14)
-                        tipo_contrato_raw = self._get_cell_value(row, 9)
-                        tipo_contrato_map = {
-                            'PRESTACION DE SERVICIOS': 'PRESTACION_SERVICIOS',
-                            'PRESTACIÓN DE SERVICIOS': 'PRESTACION_SERVICIOS',
-                            'TERMINO INDEFINIDO': 'TERMINO_INDEFINIDO',
-                            'TÉRMINO INDEFINIDO': 'TERMINO_INDEFINIDO',
-                            'TERMINO FIJO': 'TERMINO_FIJO',
-                            'TÉRMINO FIJO': 'TERMINO_FIJO',
-                            'OBRA O LABOR': 'OBRA_LABOR',
-                            'APRENDIZAJE': 'APRENDIZAJE',
-                        }
-                        tipo_contrato = tipo_contrato_map.get(tipo_contrato_raw.upper(), 'PRESTACION_SERVICIOS') if tipo_contrato_raw else 'PRESTACION_SERVICIOS'
-
-                        cargo = self._get_cell_value(row, 10)
-                        salario_contratado = self._parse_decimal(self._get_cell_value(row, 11))
-                        municipio_base = self._get_cell_value(row, 12)
-                        fecha_inicio_contrato = self._parse_date(self._get_cell_value(row, 13))
-                        fecha_final_contrato = self._parse_date(self._get_cell_value(row, 14))
-
-                        # Crear contratacion SIEMPRE (aunque esté vacía)
-                        Contratacion.objects.update_or_create(
-                            trabajador=trabajador,
-                            anio=anio,
-                            defaults={
-                                'tipo_contrato': tipo_contrato,
-                                'cargo': cargo if cargo else '',
-                                'salario_contratado': salario_contratado if salario_contratado else 0,
-                                'municipio_base': municipio_base.strip().upper() if municipio_base else '',
-                                'fecha_inicio_contrato': fecha_inicio_contrato,
-                                'fecha_final_contrato': fecha_final_contrato,
-                            }
-                        )
-                        self.stdout.write('  [+] Contratacion guardada')
-
-                        # Datos de Ingreso (columnas 15-18)
-                        fecha_ingreso = self._parse_date(self._get_cell_value(row, 15))
-                        examen_ingreso = self._parse_date(self._get_cell_value(row, 16))
-                        fecha_entrega_epp = self._parse_date(self._get_cell_value(row, 17))
-                        fecha_entrega_dotacion = self._parse_date(self._get_cell_value(row, 18))
-
-                        # Crear ingreso SIEMPRE (aunque esté vacío)
-                        ing, created = Ingreso.objects.update_or_create(
-                            trabajador=trabajador,
-                            anio=anio,
-                            defaults={
-                                'fecha_ingreso': fecha_ingreso,
-                                'examen_ingreso': examen_ingreso,
-                                'fecha_entrega_epp': fecha_entrega_epp,
-                                'fecha_entrega_dotacion': fecha_entrega_dotacion,
-                            }
-                        )
-                        self.stdout.write(f'  [+] Ingreso guardado')
-
-                        # Datos de Retiro (columnas 19-22)
-                        fecha_retiro = self._parse_date(self._get_cell_value(row, 19))
-                        fecha_liquidacion = self._parse_date(self._get_cell_value(row, 20))
-                        valor_liquidacion = self._parse_decimal(self._get_cell_value(row, 21))
-                        fecha_examen_retiro = self._parse_date(self._get_cell_value(row, 22))
-
-                        # Crear retiro SIEMPRE (aunque esté vacío)
-                        ret, created = Retiro.objects.update_or_create(
-                            trabajador=trabajador,
-                            anio=anio,
-                            defaults={
-                                'fecha_retiro': fecha_retiro,
-                                'fecha_liquidacion': fecha_liquidacion,
-                                'valor_liquidacion': valor_liquidacion,
-                                'fecha_examen_retiro': fecha_examen_retiro,
-                            }
-                        )
-                        self.stdout.write(f'  [+] Retiro guardado')
-
-                        # Datos de Seguridad Social (columnas 23-29)
-                        eps = self._get_cell_value(row, 23)
-                        fecha_afiliacion_eps = self._parse_date(self._get_cell_value(row, 24))
-                        caja_compensacion = self._get_cell_value(row, 25)
-                        fecha_afiliacion_caja = self._parse_date(self._get_cell_value(row, 26))
-                        fondo_pension = self._get_cell_value(row, 27)
-                        fecha_afiliacion_pension = self._parse_date(self._get_cell_value(row, 28))
-                        arl = self._get_cell_value(row, 29)
-
-                        # Crear seguridad social SIEMPRE (aunque esté vacía)
-                        SeguridadSocial.objects.update_or_create(
-                            trabajador=trabajador,
-                            anio=anio,
-                            defaults={
-                                'eps': eps if eps else '',
-                                'fecha_afiliacion_eps': fecha_afiliacion_eps,
-                                'caja_compensacion': caja_compensacion if caja_compensacion else '',
-                                'fecha_afiliacion_caja': fecha_afiliacion_caja,
-                                'fondo_pension': fondo_pension if fondo_pension else '',
-                                'fecha_afiliacion_pension': fecha_afiliacion_pension,
-                                'arl': arl.upper() if arl else '',
-                            }
-                        )
-                        self.stdout.write('  [+] Seguridad Social guardada')
-
-                        # Datos de Proyecto (columnas 32-36)
-                        proyecto_data = {
-                            'administrativo': self._parse_bool(self._get_cell_value(row, 32)),
-                            'construccion_instalaciones': self._parse_bool(self._get_cell_value(row, 33)),
-                            'construccion_redes': self._parse_bool(self._get_cell_value(row, 34)),
-                            'servicios': self._parse_bool(self._get_cell_value(row, 35)),
-                            'mantenimiento_redes': self._parse_bool(self._get_cell_value(row, 36)),
-                        }
-
-                        Proyecto.objects.update_or_create(
-                            trabajador=trabajador,
-                            anio=anio,
-                            defaults=proyecto_data
-                        )
-                        self.stdout.write('  [+] Proyecto guardado')
-
-                        # Datos de Cronograma - TODOS LOS 12 MESES
-                        # Los meses están en columnas 37-84 (4 columnas por mes × 12 meses = 48 columnas)
-                        meses_config = [
-                            {'mes': datetime(anio, 1, 1).date(), 'col': 37},   # Enero
-                            {'mes': datetime(anio, 2, 1).date(), 'col': 41},   # Febrero
-                            {'mes': datetime(anio, 3, 1).date(), 'col': 45},   # Marzo
-                            {'mes': datetime(anio, 4, 1).date(), 'col': 49},   # Abril
-                            {'mes': datetime(anio, 5, 1).date(), 'col': 53},   # Mayo
-                            {'mes': datetime(anio, 6, 1).date(), 'col': 57},   # Junio
-                            {'mes': datetime(anio, 7, 1).date(), 'col': 61},   # Julio
-                            {'mes': datetime(anio, 8, 1).date(), 'col': 65},   # Agosto
-                            {'mes': datetime(anio, 9, 1).date(), 'col': 69},   # Septiembre
-                            {'mes': datetime(anio, 10, 1).date(), 'col': 73},  # Octubre
-                            {'mes': datetime(anio, 11, 1).date(), 'col': 77},  # Noviembre
-                            {'mes': datetime(anio, 12, 1).date(), 'col': 81},  # Diciembre
-                        ]
-
-                        cronogramas_creados = 0
-                        for mes_info in meses_config:
-                            mes_fecha = mes_info['mes']
-                            col_base = mes_info['col']
-
-                            # Leer datos del mes (4 columnas: municipio, salario, dias, sueldo)
-                            municipio = self._get_cell_value(row, col_base)
-                            salario = self._parse_decimal(self._get_cell_value(row, col_base + 1))
-                            dias = self._parse_int(self._get_cell_value(row, col_base + 2))
-                            sueldo = self._parse_decimal(self._get_cell_value(row, col_base + 3))
-
-                            # Limpiar municipio (convertir N/A y X a None)
-                            if municipio and municipio.upper() in ['N/A', 'X']:
-                                municipio = None
-
-                            # SIEMPRE crear cronograma (incluso si está vacío) - 141 por mes
-                            try:
-                                Cronograma.objects.update_or_create(
+            resumen = {'creados': 0, 'actualizados': 0, 'sin_cambios': 0, 'errores': 0}
+            self.resumen = resumen
+
+            # Huellas de la última importación de cada documento en este año: {(tipo, numero): huella}
+            huellas = {
+                (tipo, numero): huella
+                for tipo, numero, huella in Trabajador.objects.filter(anio=anio).values_list(
+                    'tipo', 'numero', 'huella_importacion'
+                )
+            }
+
+            filas = ws.iter_rows(min_row=data_start_row, values_only=True)
+            if self.progreso:
+                # max_row sale de la dimensión declarada en la hoja (puede no existir)
+                total = ws.max_row - data_start_row + 1 if ws.max_row else None
+                filas = self._con_progreso(filas, total)
+            if batch_size:
+                self.stdout.write(f'Modo por lotes: {batch_size} filas por lote')
+                self._importar_por_lotes(filas, data_start_row, anio, batch_size, huellas, resumen, forzar)
+            else:
+                for row_idx, row in enumerate(filas, start=data_start_row):
+                    try:
+                        # Extraer valores de las celdas
+                        numero = self._get_cell_value(row, 0)
+
+                        # Si no hay número, saltar esta fila
+                        if not numero:
+                            continue
+
+                        self.stdout.write(f'\nProcesando trabajador N° {numero}...')
+
+                        datos = self._parse_row(row, anio)
+                        clave = (datos['trabajador']['tipo'], datos['trabajador']['numero'])
+
+                        # Fila sin cambios desde la última importación: no se toca la base de datos
+                        if not forzar and huellas.get(clave) == datos['huella']:
+                            resumen['sin_cambios'] += 1
+                            self.stdout.write('  [=] Sin cambios')
+                            continue
+
+                        with transaction.atomic():
+                            # Upsert del trabajador por documento y año
+                            trabajador, creado = Trabajador.objects.update_or_create(
+                                tipo=clave[0],
+                                numero=clave[1],
+                                anio=anio,
+                                defaults={**datos['trabajador'], 'huella_importacion': datos['huella']}
+                            )
+                            if creado:
+                                resumen['creados'] += 1
+                                self.stdout.write(self.style.SUCCESS(f'  [+] Trabajador creado: {trabajador.nombre_completo}'))
+                            else:
+                                resumen['actualizados'] += 1
+                                self.stdout.write(self.style.SUCCESS(f'  [+] Trabajador actualizado: {trabajador.nombre_completo}'))
+
+                            # Crear contratacion, ingreso, retiro, seguridad social y proyecto SIEMPRE (aunque estén vacíos)
+                            for clave_tabla, model, etiqueta in self.TABLAS_ANUALES:
+                                model.objects.update_or_create(
                                     trabajador=trabajador,
-                                    mes=mes_fecha,
-                                    defaults={
-                                        'municipio_ejecucion': municipio.upper() if municipio else '',
-                                        'salario_cotizacion': salario if salario else 0,
-                                        'dias_laborados': dias if dias else 0,
-                                        'sueldo_devengado': sueldo if sueldo else 0,
-                                    }
+                                    anio=anio,
+                                    defaults=datos[clave_tabla]
                                 )
-                                cronogramas_creados += 1
-                            except Exception as crono_error:
-                                self.stdout.write(self.style.WARNING(f'    [!] Error en cronograma {mes_fecha}: {str(crono_error)}'))
+                                self.stdout.write(f'  [+] {etiqueta} guardado(a)')
+
+                            # SIEMPRE crear cronograma de los 12 meses (incluso si está vacío)
+                            cronogramas_creados = 0
+                            for mes_fecha, valores in datos['cronogramas'].items():
+                                try:
+                                    Cronograma.objects.update_or_create(
+                                        trabajador=trabajador,
+                                        mes=mes_fecha,
+                                        defaults=valores
+                                    )
+                                    cronogramas_creados += 1
+                                except Exception as crono_error:
+                                    self.stdout.write(self.style.WARNING(f'    [!] Error en cronograma {mes_fecha}: {str(crono_error)}'))
+
+                            self.stdout.write(f'  [+] {cronogramas_creados} cronograma(s) guardado(s) (12 meses)')
 
-                        self.stdout.write(f'  [+] {cronogramas_creados} cronograma(s) guardado(s) (12 meses)')
+                        huellas[clave] = datos['huella']
 
-                except Exception as e:
-                    errores += 1
-                    self.stdout.write(self.style.ERROR(f'  [X] Error en fila {row_idx}: {str(e)}'))
+                    except Exception as e:
+                        resumen['errores'] += 1
+                        self.stdout.write(self.style.ERROR(f'  [X] Error en fila {row_idx}: {str(e)}'))
 
             # Resumen final
             self.stdout.write('\n' + '='*60)
             self.stdout.write(self.style.SUCCESS(f'\n[OK] Importacion completada!'))
-            self.stdout.write(f'  - Trabajadores creados: {trabajadores_creados}')
-            self.stdout.write(f'  - Trabajadores actualizados: {trabajadores_actualizados}')
-            if errores > 0:
-                self.stdout.write(self.style.ERROR(f'  - Errores: {errores}'))
+            self.stdout.write(f'  - Trabajadores creados: {resumen["creados"]}')
+            self.stdout.write(f'  - Trabajadores actualizados: {resumen["actualizados"]}')
+            self.stdout.write(f'  - Trabajadores sin cambios: {resumen["sin_cambios"]}')
+            if resumen['errores'] > 0:
+                self.stdout.write(self.style.ERROR(f'  - Errores: {resumen["errores"]}'))
             self.stdout.write('='*60 + '\n')
 
         except Exception as e:
+            self.error = f'Error al procesar el archivo: {str(e)}'
             self.stdout.write(self.style.ERROR(f'\nError al procesar el archivo: {str(e)}'))
             import traceback
             traceback.print_exc()
 
-    def _get_cell_value(self, row, index, default=''):
-        """Obtiene el valor de una celda de forma segura"""
+        finally:
+            # Los libros en modo solo lectura mantienen el archivo abierto
+            if wb is not None:
+                wb.close()
+
+    def _importar_todas(self, file_path, batch_size, forzar, procesos):
+        """
+        Importa todas las hojas NOVEDADES del libro. Cada año se parsea y
+        guarda en un proceso aparte, con su propia conexión y transacción;
+        los años no comparten filas, así que los procesos no se bloquean
+        entre sí.
+        """
+        wb = load_workbook(file_path, read_only=True)
         try:
-            if index < len(row):
-                value = row[index].value
-                if value is None:
-                    return default
-                # No convertir datetime a string, devolverlo tal cual
-                if isinstance(value, datetime):
-                    return value
-                return str(value).strip() if value else default
-            return default
-        except:
-            return default
-
-    def _parse_date(self, value):
-        """Convierte un valor a fecha"""
-        if not value or value == 'N/A':
-            return None
+            hojas = hojas_novedades(wb.sheetnames)
+            disponibles = wb.sheetnames
+        finally:
+            wb.close()
+
+        if not hojas:
+            self.error = 'El archivo no tiene hojas "NOVEDADES <año>"'
+            self.stdout.write(self.style.ERROR(self.error))
+            self.stdout.write(f'Hojas disponibles: {", ".join(disponibles)}')
+            return
 
+        procesos = procesos or min(len(hojas), os.cpu_count() or 1)
+        self.stdout.write(self.style.SUCCESS(f'Leyendo archivo: {file_path}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Hojas a importar: {", ".join(hojas.values())} ({min(procesos, len(hojas))} proceso(s))'
+        ))
+
+        argumentos = [(file_path, anio, hoja, batch_size, forzar) for anio, hoja in hojas.items()]
+        resultados = []
+        if procesos == 1:
+            for args in argumentos:
+                resultados.append(self._resultado_hoja(args, partial(_importar_hoja, *args)))
+        else:
+            # Los procesos abren su propia conexión: no deben heredar la de este proceso
+            connections.close_all()
+            # 'fork' evita volver a cargar Django en cada proceso donde está disponible;
+            # con 'spawn' el proceso arranca vacío y django.setup() lo prepara
+            metodo = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+            with ProcessPoolExecutor(
+                max_workers=procesos,
+                mp_context=multiprocessing.get_context(metodo),
+                initializer=django.setup,
+            ) as pool:
+                futuros = {pool.submit(_importar_hoja_en_proceso, *args): args for args in argumentos}
+                for futuro in as_completed(futuros):
+                    resultados.append(self._resultado_hoja(futuros[futuro], futuro.result))
+
+        # Resumen por año y total
+        self.resumenes = {}
+        errores = []
+        for anio, hoja, resumen, error, salida in sorted(resultados, key=lambda resultado: resultado[0]):
+            self.stdout.write(f'\n--- {hoja} ({anio}) ---')
+            self.stdout.write(salida)
+            if error:
+                errores.append(f'{hoja}: {error}')
+            else:
+                self.resumenes[anio] = resumen
+
+        self.resumen = {'creados': 0, 'actualizados': 0, 'sin_cambios': 0, 'errores': 0}
+        for resumen in self.resumenes.values():
+            for clave in self.resumen:
+                self.resumen[clave] += resumen[clave]
+
+        self.stdout.write('\n' + '='*60)
+        for anio, resumen in self.resumenes.items():
+            self.stdout.write(
+                f'  {anio}: {resumen["creados"]} creados, {resumen["actualizados"]} actualizados, '
+                f'{resumen["sin_cambios"]} sin cambios, {resumen["errores"]} errores'
+            )
+        if errores:
+            self.error = f'No se importaron {len(errores)} hoja(s): ' + '; '.join(errores)
+            self.stdout.write(self.style.ERROR(f'  [X] {self.error}'))
+        self.stdout.write('='*60 + '\n')
+
+    def _resultado_hoja(self, args, obtener):
+        """Resultado de importar una hoja; una excepción se reporta como error del año"""
+        _, anio, hoja, _, _ = args
         try:
-            # Si ya es un objeto datetime
-            if isinstance(value, datetime):
-                return value.date()
-
-            # Intentar parsear string
-            if isinstance(value, str):
-                # Formatos comunes
-                for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d']:
-                    try:
-                        return datetime.strptime(value, fmt).date()
-                    except:
-                        continue
-        except:
-            pass
-
-        return None
-
-    def _parse_decimal(self, value):
-        """Convierte un valor a decimal"""
-        if not value or value == 'N/A':
-            return None
-
+            return obtener()
+        except Exception as e:
+            return anio, hoja, None, f'Error al procesar la hoja: {str(e)}', ''
+
+    def _con_progreso(self, filas, total):
+        """Itera las filas reportando a `self.progreso` cuántas se han procesado"""
+        procesadas = 0
+        for fila in filas:
+            yield fila
+            procesadas += 1
+            self.progreso(procesadas, total)
+
+    def _parse_row(self, row, anio):
+        """
+        Convierte una fila del Excel en los datos de cada tabla (ver
+        trabajadores/formato_novedades.py). Retorna un dict con 'trabajador',
+        una entrada por tabla anual, 'cronogramas' ({mes: valores}) con los
+        12 meses del año y la huella de la fila.
+        """
+        datos = decodificar_fila(row, anio)
+        trabajador = datos['trabajador']
+        trabajador['anio'] = anio
+
+        fecha_nac = trabajador['fecha_nacimiento']
+        fecha_exp = trabajador['fecha_expedicion_cedula']
+
+        # Si no hay fecha de expedición, usar una estimada (18 años después de nacimiento)
+        if not fecha_exp and fecha_nac:
+            fecha_exp = fecha_nac.replace(year=fecha_nac.year + 18) if fecha_nac.year + 18 <= 2025 else fecha_nac
+        elif not fecha_exp and not fecha_nac:
+            # Si ambas son None, usar una fecha por defecto
+            fecha_exp = datetime(2000, 1, 1).date()
+            fecha_nac = datetime(1982, 1, 1).date()
+        elif fecha_exp and not fecha_nac:
+            # Si solo hay fecha de expedición, estimar nacimiento
+            fecha_nac = fecha_exp.replace(year=fecha_exp.year - 18)
+
+        trabajador['fecha_nacimiento'] = fecha_nac
+        trabajador['fecha_expedicion_cedula'] = fecha_exp
+
+        datos['huella'] = self._huella(datos)
+        return datos
+
+    def _huella(self, datos):
+        """Hash SHA-256 del contenido parseado de la fila (para omitir filas sin cambios)"""
+        contenido = {clave: valor for clave, valor in datos.items() if clave != 'cronogramas'}
+        contenido['cronogramas'] = {
+            mes.isoformat(): valores for mes, valores in datos['cronogramas'].items()
+        }
+        serializado = json.dumps(contenido, sort_keys=True, default=str)
+        return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+    def _importar_por_lotes(self, filas, data_start_row, anio, batch_size, huellas, resumen, forzar=False):
+        """
+        Parsea las filas en memoria y las guarda por lotes de `batch_size`.
+        Las filas sin cambios (misma huella) se omiten; si un documento se
+        repite dentro del lote, prevalece la última fila.
+        """
+        lote = {}
+
+        for row_idx, row in enumerate(filas, start=data_start_row):
+            # Si no hay número, saltar esta fila
+            if not self._get_cell_value(row, 0):
+                continue
+            try:
+                datos = self._parse_row(row, anio)
+            except Exception as e:
+                resumen['errores'] += 1
+                self.stdout.write(self.style.ERROR(f'  [X] Error en fila {row_idx}: {str(e)}'))
+                continue
+
+            clave = (datos['trabajador']['tipo'], datos['trabajador']['numero'])
+            if not forzar and huellas.get(clave) == datos['huella']:
+                resumen['sin_cambios'] += 1
+                continue
+            lote.pop(clave, None)
+            lote[clave] = (row_idx, datos)
+
+            if len(lote) == batch_size:
+                self._guardar_lote(list(lote.values()), anio, huellas, resumen)
+                lote = {}
+
+        if lote:
+            self._guardar_lote(list(lote.values()), anio, huellas, resumen)
+
+    def _guardar_lote(self, lote, anio, huellas, resumen):
+        """
+        Guarda un lote de filas parseadas en una sola transacción: un
+        bulk_create por tabla, con upsert sobre la clave única de cada una
+        (tipo, numero, anio para el trabajador).
+        """
+        claves = [(datos['trabajador']['tipo'], datos['trabajador']['numero']) for _, datos in lote]
         try:
-            # Si ya es un número (int o float), devolverlo directamente
-            if isinstance(value, (int, float)):
-                return float(value)
-
-            # Si es string, limpiar y convertir
-            if isinstance(value, str):
-                # Quitar símbolos de moneda y espacios
-                value = value.replace('$', '').strip()
-
-                # Formato colombiano: 1.234.567,89 -> convertir a 1234567.89
-                if ',' in value and '.' in value:
-                    # Tiene ambos: el punto es separador de miles, la coma es decimal
-                    value = value.replace('.', '').replace(',', '.')
-                elif ',' in value:
-                    # Solo coma: es el decimal
-                    value = value.replace(',', '.')
-                # Si solo tiene punto, dejarlo así (es el decimal)
-
-            return float(value)
-        except:
-            return None
-
-    def _parse_int(self, value):
-        """Convierte un valor a entero"""
-        if not value or value == 'N/A':
-            return None
+            with transaction.atomic():
+                trabajadores = Trabajador.objects.bulk_create(
+                    [
+                        Trabajador(**datos['trabajador'], huella_importacion=datos['huella'])
+                        for _, datos in lote
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['tipo', 'numero', 'anio'],
+                    update_fields=self.CAMPOS_TRABAJADOR + ['huella_importacion', 'fecha_actualizacion'],
+                )
+
+                for clave, model, _ in self.TABLAS_ANUALES:
+                    campos = list(lote[0][1][clave])
+                    model.objects.bulk_create(
+                        [
+                            model(trabajador=trabajador, anio=anio, **datos[clave])
+                            for trabajador, (_, datos) in zip(trabajadores, lote)
+                        ],
+                        update_conflicts=True,
+                        unique_fields=['trabajador', 'anio'],
+                        update_fields=campos + ['fecha_actualizacion'],
+                    )
+
+                # bulk_create no llama a save(): el año del cronograma se asigna aquí
+                Cronograma.objects.bulk_create(
+                    [
+                        Cronograma(trabajador=trabajador, mes=mes_fecha, anio=mes_fecha.year, **valores)
+                        for trabajador, (_, datos) in zip(trabajadores, lote)
+                        for mes_fecha, valores in datos['cronogramas'].items()
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['trabajador', 'mes'],
+                    update_fields=self.CAMPOS_CRONOGRAMA + ['anio', 'fecha_actualizacion'],
+                )
+
+                # bulk_create no envía señales: el snapshot se recalcula para el lote
+                actualizar_snapshots(trabajadores)
+        except Exception as e:
+            resumen['errores'] += len(lote)
+            self.stdout.write(self.style.ERROR(
+                f'  [X] Error en lote de filas {lote[0][0]}-{lote[-1][0]}: {str(e)}'
+            ))
+            return
 
-        try:
-            return int(float(str(value)))
-        except:
-            return None
-
-    def _parse_bool(self, value):
-        """Convierte un valor a booleano"""
-        if not value:
-            return False
-
-        value_str = str(value).upper().strip()
-        return value_str in ['SÍ', 'SI', 'YES', 'TRUE', '1', 'X', '✓']
-
-    def _map_tipo_identificacion(self, value):
-        """Mapea el tipo de identificación del formato completo al código"""
-        if not value:
-            return 'CC'  # Default
-
-        value_upper = str(value).upper().strip()
-
-        # Mapeo de textos completos a códigos
-        mapping = {
-            'CÉDULA DE CIUDADANÍA': 'CC',
-            'CEDULA DE CIUDADANIA': 'CC',
-            'CÉDULA CIUDADANÍA': 'CC',
-            'CEDULA': 'CC',
-            'CC': 'CC',
-            'CÉDULA DE EXTRANJERÍA': 'CE',
-            'CEDULA DE EXTRANJERIA': 'CE',
-            'CE': 'CE',
-            'PASAPORTE': 'PA',
-            'PA': 'PA',
-            'TARJETA DE IDENTIDAD': 'TI',
-            'TI': 'TI',
-        }
+        actualizados = sum(1 for clave in claves if clave in huellas)
+        resumen['actualizados'] += actualizados
+        resumen['creados'] += len(lote) - actualizados
+        for clave, (_, datos) in zip(claves, lote):
+            huellas[clave] = datos['huella']
+
+        self.stdout.write(self.style.SUCCESS(
+            f'  [+] Lote de filas {lote[0][0]}-{lote[-1][0]}: {len(lote)} trabajadores guardados'
+        ))
 
-        return mapping.get(value_upper, 'CC')
+    def _get_cell_value(self, row, index):
+        """Texto de una celda (ver formato_novedades.texto_celda); '' si la fila es más corta"""
+        return texto_celda(row[index]) if index < len(row) else ''
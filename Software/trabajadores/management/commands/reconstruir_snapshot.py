@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from trabajadores.models import Trabajador, TrabajadorAnioSnapshot
+from trabajadores.snapshot import TAMANO_LOTE, reconstruir_snapshots
+import time
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el snapshot trabajador-año (trabajador_anio_snapshot) desde las tablas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--anio',
+            type=int,
+            help='Reconstruir solo los trabajadores de este año (por defecto, todos)',
+            default=None
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Trabajadores por lote (6 lecturas y un upsert por lote)',
+            default=TAMANO_LOTE
+        )
+
+    def handle(self, *args, **options):
+        anio = options['anio']
+        trabajadores = Trabajador.objects.all()
+        if anio:
+            trabajadores = trabajadores.filter(anio=anio)
+        total = trabajadores.count()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconstruyendo snapshot de {total} trabajadores' + (f' del año {anio}' if anio else '')
+        ))
+
+        def reportar_progreso(procesados):
+            self.stdout.write(f'  {procesados}/{total} trabajadores...')
+
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            guardados = reconstruir_snapshots(trabajadores, options['batch_size'], progreso=reportar_progreso)
+        segundos = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n[OK] {guardados} snapshots guardados en {segundos:.1f} s '
+            f'({TrabajadorAnioSnapshot.objects.count()} en la tabla)'
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 00:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def verificar_duplicados(apps, schema_editor):
+    """
+    Las importaciones anteriores creaban el trabajador sin verificar
+    duplicados, y la migración 0007 hace único (tipo, numero, anio). La
+    fusión de los repetidos no se hace aquí: borraría en cascada sus
+    relaciones. Se detiene la migración para que se ejecute
+    deliberadamente `python manage.py deduplicar_trabajadores`.
+    """
+    Trabajador = apps.get_model('trabajadores', 'Trabajador')
+    repetidos = (
+        Trabajador.objects.order_by().values('tipo', 'numero', 'anio')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+    )
+    total = repetidos.count()
+    if total:
+        raise RuntimeError(
+            f'Hay {total} documentos repetidos en un mismo año (tipo, numero, anio). '
+            'Revíselos con `python manage.py deduplicar_trabajadores --reporte duplicados.csv`, '
+            'fusiónelos con `--aplicar` y vuelva a ejecutar migrate.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trabajadores', '0005_trabajador_anio'),
+    ]
+
+    operations = [
+        migrations.RunPython(verificar_duplicados, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='trabajador',
+            name='huella_importacion',
+            field=models.CharField(blank=True, default='', editable=False, help_text='SHA-256 de la fila importada; permite omitir filas sin cambios al reimportar', max_length=64, verbose_name='Huella de Importación'),
+        ),
+    ]
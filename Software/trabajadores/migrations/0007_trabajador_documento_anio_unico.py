@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trabajadores', '0006_trabajador_huella_importacion'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='trabajador',
+            constraint=models.UniqueConstraint(fields=('tipo', 'numero', 'anio'), name='trabajador_documento_anio_unico'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trabajadores', '0007_trabajador_documento_anio_unico'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['anio', 'primer_apellido', 'id'], name='trabajador_anio_apellido_idx'),
+        ),
+    ]
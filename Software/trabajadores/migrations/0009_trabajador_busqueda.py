@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 01:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trabajadores', '0008_trabajador_anio_apellido_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajador',
+            name='busqueda',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector(django.db.models.functions.text.Lower(models.Func(models.F('numero'), models.Value('ÁÉÍÓÚÀÈÌÒÙÜÑáéíóúàèìòùüñ'), models.Value('AEIOUAEIOUUNaeiouaeiouun'), function='TRANSLATE')), django.db.models.functions.text.Lower(models.Func(models.F('primer_nombre'), models.Value('ÁÉÍÓÚÀÈÌÒÙÜÑáéíóúàèìòùüñ'), models.Value('AEIOUAEIOUUNaeiouaeiouun'), function='TRANSLATE')), django.db.models.functions.text.Lower(models.Func(models.F('segundo_nombre'), models.Value('ÁÉÍÓÚÀÈÌÒÙÜÑáéíóúàèìòùüñ'), models.Value('AEIOUAEIOUUNaeiouaeiouun'), function='TRANSLATE')), django.db.models.functions.text.Lower(models.Func(models.F('primer_apellido'), models.Value('ÁÉÍÓÚÀÈÌÒÙÜÑáéíóúàèìòùüñ'), models.Value('AEIOUAEIOUUNaeiouaeiouun'), function='TRANSLATE')), django.db.models.functions.text.Lower(models.Func(models.F('segundo_apellido'), models.Value('ÁÉÍÓÚÀÈÌÒÙÜÑáéíóúàèìòùüñ'), models.Value('AEIOUAEIOUUNaeiouaeiouun'), function='TRANSLATE')), config='simple'), output_field=django.contrib.postgres.search.SearchVectorField(), verbose_name='Búsqueda'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busqueda'], name='trabajador_busqueda_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:00
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trabajadores', '0009_trabajador_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajadorAnioSnapshot',
+            fields=[
+                ('trabajador', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='trabajadores.trabajador', verbose_name='Trabajador')),
+                ('anio', models.IntegerField(verbose_name='Año')),
+                ('tiene_contratacion', models.BooleanField(default=False, verbose_name='Tiene Contratación')),
+                ('tipo_contrato', models.CharField(blank=True, max_length=50, null=True, verbose_name='Tipo de Contrato')),
+                ('cargo', models.CharField(blank=True, max_length=200, null=True, verbose_name='Cargo')),
+                ('salario_contratado', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Salario Contratado')),
+                ('municipio_base', models.CharField(blank=True, max_length=50, null=True, verbose_name='Municipio Base')),
+                ('fecha_inicio_contrato', models.DateField(blank=True, null=True, verbose_name='Fecha Inicio Contrato')),
+                ('fecha_final_contrato', models.DateField(blank=True, null=True, verbose_name='Fecha Final Contrato')),
+                ('tiene_ingreso', models.BooleanField(default=False, verbose_name='Tiene Ingreso')),
+                ('fecha_ingreso', models.DateField(blank=True, null=True, verbose_name='Fecha de Ingreso')),
+                ('examen_ingreso', models.DateField(blank=True, null=True, verbose_name='Examen de Ingreso')),
+                ('fecha_entrega_epp', models.DateField(blank=True, null=True, verbose_name='Fecha Entrega EPP')),
+                ('fecha_entrega_dotacion', models.DateField(blank=True, null=True, verbose_name='Fecha Entrega Dotación')),
+                ('tiene_retiro', models.BooleanField(default=False, verbose_name='Tiene Retiro')),
+                ('fecha_retiro', models.DateField(blank=True, null=True, verbose_name='Fecha de Retiro')),
+                ('fecha_liquidacion', models.DateField(blank=True, null=True, verbose_name='Fecha de Liquidación')),
+                ('valor_liquidacion', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Valor Liquidación')),
+                ('fecha_examen_retiro', models.DateField(blank=True, null=True, verbose_name='Fecha Examen de Retiro')),
+                ('tiene_seguridad_social', models.BooleanField(default=False, verbose_name='Tiene Seguridad Social')),
+                ('eps', models.CharField(blank=True, max_length=100, null=True, verbose_name='EPS')),
+                ('fecha_afiliacion_eps', models.DateField(blank=True, null=True, verbose_name='Fecha Afiliación EPS')),
+                ('caja_compensacion', models.CharField(blank=True, max_length=100, null=True, verbose_name='Caja de Compensación')),
+                ('fecha_afiliacion_caja', models.DateField(blank=True, null=True, verbose_name='Fecha Afiliación Caja')),
+                ('fondo_pension', models.CharField(blank=True, max_length=100, null=True, verbose_name='Fondo de Pensión')),
+                ('fecha_afiliacion_pension', models.DateField(blank=True, null=True, verbose_name='Fecha Afiliación Pensión')),
+                ('arl', models.CharField(blank=True, max_length=50, null=True, verbose_name='ARL')),
+                ('riesgo', models.CharField(blank=True, max_length=10, null=True, verbose_name='Nivel de Riesgo')),
+                ('fecha_afiliacion_arl', models.DateField(blank=True, null=True, verbose_name='Fecha Afiliación ARL')),
+                ('tiene_proyecto', models.BooleanField(default=False, verbose_name='Tiene Proyecto')),
+                ('administrativo', models.BooleanField(blank=True, null=True, verbose_name='Administrativo')),
+                ('construccion_instalaciones', models.BooleanField(blank=True, null=True, verbose_name='Construcción Instalaciones')),
+                ('construccion_redes', models.BooleanField(blank=True, null=True, verbose_name='Construcción Redes')),
+                ('servicios', models.BooleanField(blank=True, null=True, verbose_name='Servicios')),
+                ('mantenimiento_redes', models.BooleanField(blank=True, null=True, verbose_name='Mantenimiento Redes')),
+                ('meses', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Cronograma por Mes')),
+                ('meses_con_cronograma', models.IntegerField(default=0, verbose_name='Meses con Cronograma')),
+                ('dias_laborados_total', models.IntegerField(default=0, verbose_name='Días Laborados (total)')),
+                ('sueldo_devengado_total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Sueldo Devengado (total)')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Snapshot Trabajador-Año',
+                'verbose_name_plural': 'Snapshots Trabajador-Año',
+                'db_table': 'trabajador_anio_snapshot',
+                'indexes': [models.Index(fields=['anio', 'trabajador'], name='snapshot_anio_trabajador_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import migrations
+
+
+# Snapshot de los trabajadores existentes que aún no lo tienen, con el
+# mismo cálculo que trabajadores.snapshot.sql_calculo_snapshots. Se copia
+# aquí para que la migración no cambie si cambia el modelo de lectura;
+# después, `python manage.py reconstruir_snapshot` lo recalcula completo.
+RELLENAR_SNAPSHOT = '''
+    INSERT INTO trabajador_anio_snapshot (
+        trabajador_id, anio,
+        tiene_contratacion, tipo_contrato, cargo, salario_contratado, municipio_base,
+        fecha_inicio_contrato, fecha_final_contrato,
+        tiene_ingreso, fecha_ingreso, examen_ingreso, fecha_entrega_epp, fecha_entrega_dotacion,
+        tiene_retiro, fecha_retiro, fecha_liquidacion, valor_liquidacion, fecha_examen_retiro,
+        tiene_seguridad_social, eps, fecha_afiliacion_eps, caja_compensacion, fecha_afiliacion_caja,
+        fondo_pension, fecha_afiliacion_pension, arl, riesgo, fecha_afiliacion_arl,
+        tiene_proyecto, administrativo, construccion_instalaciones, construccion_redes, servicios,
+        mantenimiento_redes,
+        meses, meses_con_cronograma, dias_laborados_total, sueldo_devengado_total, fecha_actualizacion
+    )
+    SELECT
+        t.id, t.anio,
+        contratacion.id IS NOT NULL, contratacion.tipo_contrato, contratacion.cargo,
+        contratacion.salario_contratado, contratacion.municipio_base,
+        contratacion.fecha_inicio_contrato, contratacion.fecha_final_contrato,
+        ingreso.id IS NOT NULL, ingreso.fecha_ingreso, ingreso.examen_ingreso,
+        ingreso.fecha_entrega_epp, ingreso.fecha_entrega_dotacion,
+        retiro.id IS NOT NULL, retiro.fecha_retiro, retiro.fecha_liquidacion,
+        retiro.valor_liquidacion, retiro.fecha_examen_retiro,
+        seguridad_social.id IS NOT NULL, seguridad_social.eps, seguridad_social.fecha_afiliacion_eps,
+        seguridad_social.caja_compensacion, seguridad_social.fecha_afiliacion_caja,
+        seguridad_social.fondo_pension, seguridad_social.fecha_afiliacion_pension,
+        seguridad_social.arl, seguridad_social.riesgo, seguridad_social.fecha_afiliacion_arl,
+        proyecto.id IS NOT NULL, proyecto.administrativo, proyecto.construccion_instalaciones,
+        proyecto.construccion_redes, proyecto.servicios, proyecto.mantenimiento_redes,
+        c.meses, c.meses_con_cronograma, c.dias_laborados_total, c.sueldo_devengado_total, now()
+    FROM trabajadores t
+    LEFT JOIN contratacion contratacion ON contratacion.trabajador_id = t.id AND contratacion.anio = t.anio
+    LEFT JOIN ingreso ingreso ON ingreso.trabajador_id = t.id AND ingreso.anio = t.anio
+    LEFT JOIN retiro retiro ON retiro.trabajador_id = t.id AND retiro.anio = t.anio
+    LEFT JOIN seguridad_social seguridad_social ON seguridad_social.trabajador_id = t.id AND seguridad_social.anio = t.anio
+    LEFT JOIN proyectos proyecto ON proyecto.trabajador_id = t.id AND proyecto.anio = t.anio
+    CROSS JOIN LATERAL (
+        SELECT
+            jsonb_agg(
+                CASE WHEN cr.id IS NOT NULL THEN jsonb_build_array(
+                    COALESCE(cr.municipio_ejecucion, ''), cr.salario_cotizacion::text,
+                    COALESCE(cr.dias_laborados, 0), cr.sueldo_devengado::text
+                ) END
+                ORDER BY mes.numero
+            ) AS meses,
+            count(cr.id) AS meses_con_cronograma,
+            COALESCE(sum(cr.dias_laborados), 0) AS dias_laborados_total,
+            COALESCE(sum(cr.sueldo_devengado), 0) AS sueldo_devengado_total
+        FROM generate_series(1, 12) AS mes(numero)
+        LEFT JOIN cronograma cr
+            ON cr.trabajador_id = t.id AND cr.mes = make_date(t.anio, mes.numero, 1)
+    ) c
+    WHERE NOT EXISTS (SELECT 1 FROM trabajador_anio_snapshot s WHERE s.trabajador_id = t.id)
+    ON CONFLICT (trabajador_id) DO NOTHING
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trabajadores', '0010_trabajador_anio_snapshot'),
+        ('contratacion', '0005_alter_contratacion_options_contratacion_anio_and_more'),
+        ('ingreso', '0003_alter_ingreso_options_ingreso_anio_and_more'),
+        ('retiro', '0003_alter_retiro_options_retiro_anio_and_more'),
+        ('seguridad_social', '0002_alter_seguridadsocial_options_seguridadsocial_anio_and_more'),
+        ('proyectos', '0002_alter_proyecto_options_proyecto_anio_and_more'),
+        ('cronograma', '0003_cronograma_anio_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(RELLENAR_SNAPSHOT, migrations.RunSQL.noop),
+    ]
@@ -1,4 +1,100 @@
+import re
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Count, F, Func, Max, Prefetch, Value
+from django.db.models.functions import Lower
+
+
+# Relaciones por año del trabajador: nombre en la API -> related_name
+RELACIONES_ANIO = {
+    'contratacion': 'contrataciones',
+    'ingreso': 'ingresos',
+    'retiro': 'retiros',
+    'seguridad_social': 'seguridad_social_registros',
+    'proyecto': 'proyectos_asignados',
+}
+
+# Plegado de acentos para la búsqueda. Se aplica igual en la columna
+# generada (TRANSLATE de PostgreSQL, sin depender de la extensión unaccent)
+# y en el texto buscado.
+CON_ACENTO = 'ÁÉÍÓÚÀÈÌÒÙÜÑáéíóúàèìòùüñ'
+SIN_ACENTO = 'AEIOUAEIOUUNaeiouaeiouun'
+_TABLA_ACENTOS = str.maketrans(CON_ACENTO, SIN_ACENTO)
+
+# Campos indexados para la búsqueda de trabajadores
+CAMPOS_BUSQUEDA = ['numero', 'primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido']
+
+
+def _sin_acentos(campo):
+    return Lower(Func(F(campo), Value(CON_ACENTO), Value(SIN_ACENTO), function='TRANSLATE'))
+
+
+def terminos_busqueda(texto):
+    """Normaliza el texto buscado: sin acentos, minúsculas, solo letras y números"""
+    return re.findall(r'[a-z0-9]+', (texto or '').translate(_TABLA_ACENTOS).lower())
+
+
+class TrabajadorQuerySet(models.QuerySet):
+    """QuerySet con utilidades para cargar los datos anuales del trabajador"""
+
+    def con_relaciones_anio(self, anio, relaciones=None):
+        """
+        Precarga las relaciones del año indicado con una consulta por tabla.
+        Cada relación queda en el atributo `<nombre>_anio` como lista.
+        """
+        prefetches = []
+        for nombre in (relaciones if relaciones is not None else RELACIONES_ANIO):
+            related_name = RELACIONES_ANIO[nombre]
+            related_model = self.model._meta.get_field(related_name).related_model
+            prefetches.append(Prefetch(
+                related_name,
+                queryset=related_model.objects.filter(anio=anio),
+                to_attr=f'{nombre}_anio'
+            ))
+        return self.prefetch_related(*prefetches)
+
+    def marca_modificacion(self, anio, relaciones=None):
+        """
+        Cantidad de filas y última `fecha_actualizacion` de los trabajadores
+        y de sus relaciones del año, en una sola consulta (UNION ALL).
+        Cambia al crear, modificar o eliminar cualquiera de esos registros;
+        sirve para validar cachés (ETag).
+        """
+        trabajador_ids = self.order_by().values('pk')
+        consultas = [self.model.objects.filter(pk__in=trabajador_ids)]
+        for nombre in (relaciones if relaciones is not None else RELACIONES_ANIO):
+            related_model = self.model._meta.get_field(RELACIONES_ANIO[nombre]).related_model
+            consultas.append(related_model.objects.filter(anio=anio, trabajador__in=trabajador_ids))
+
+        agregados = [
+            consulta.order_by().values(tabla=Value(consulta.model._meta.db_table)).annotate(
+                total=Count('id'),
+                ultima=Max('fecha_actualizacion')
+            )
+            for consulta in consultas
+        ]
+        return list(agregados[0].union(*agregados[1:], all=True))
+
+    def buscar(self, texto):
+        """
+        Búsqueda por nombre, apellido o documento sobre la columna
+        `busqueda` (índice GIN). Cada término coincide por prefijo y todos
+        deben aparecer; los resultados se ordenan por relevancia.
+        """
+        terminos = terminos_busqueda(texto)
+        if not terminos:
+            return self.none()
+        consulta = SearchQuery(
+            ' & '.join(f'{termino}:*' for termino in terminos),
+            config='simple',
+            search_type='raw'
+        )
+        return self.filter(busqueda=consulta).annotate(
+            relevancia=SearchRank(F('busqueda'), consulta)
+        ).order_by('-relevancia', 'primer_apellido', 'id')
 
 
 class Trabajador(models.Model):
@@ -69,6 +165,24 @@ class Trabajador(models.Model):
         default=2025
     )
 
+    # Hash del contenido de la última fila importada desde Excel
+    huella_importacion = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Huella de Importación',
+        help_text='SHA-256 de la fila importada; permite omitir filas sin cambios al reimportar'
+    )
+
+    # Vector de búsqueda (documento y nombres sin acentos), lo mantiene PostgreSQL
+    busqueda = models.GeneratedField(
+        expression=SearchVector(*[_sin_acentos(campo) for campo in CAMPOS_BUSQUEDA], config='simple'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name='Búsqueda'
+    )
+
     # Campos de auditoría
     fecha_creacion = models.DateTimeField(
         auto_now_add=True,
@@ -80,11 +194,26 @@ class Trabajador(models.Model):
         verbose_name='Última Actualización'
     )
 
+    objects = TrabajadorQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Trabajador'
         verbose_name_plural = 'Trabajadores'
         ordering = ['primer_apellido', 'segundo_apellido', 'primer_nombre']
         db_table = 'trabajadores'
+        constraints = [
+            # Un documento solo puede aparecer una vez por año
+            models.UniqueConstraint(
+                fields=['tipo', 'numero', 'anio'],
+                name='trabajador_documento_anio_unico'
+            ),
+        ]
+        indexes = [
+            # Paginación por cursor del listado por año
+            models.Index(fields=['anio', 'primer_apellido', 'id'], name='trabajador_anio_apellido_idx'),
+            # Búsqueda por nombre o documento (/api/trabajadores/buscar/)
+            GinIndex(fields=['busqueda'], name='trabajador_busqueda_idx'),
+        ]
 
     def __str__(self):
         nombre_completo = f"{self.primer_apellido}"
@@ -114,3 +243,103 @@ class Trabajador(models.Model):
         return today.year - self.fecha_nacimiento.year - (
             (today.month, today.day) < (self.fecha_nacimiento.month, self.fecha_nacimiento.day)
         )
+
+    def relacion_anio(self, nombre, anio):
+        """
+        Retorna el registro de la relación para el año indicado.
+        Usa los datos precargados por `con_relaciones_anio` si existen.
+        """
+        precargados = getattr(self, f'{nombre}_anio', None)
+        if precargados is not None:
+            return precargados[0] if precargados else None
+        return getattr(self, RELACIONES_ANIO[nombre]).filter(anio=anio).first()
+
+
+class TrabajadorAnioSnapshot(models.Model):
+    """
+    Modelo de lectura: una fila por trabajador-año con las columnas de
+    contratación, ingreso, retiro, seguridad social y proyecto, y el
+    cronograma de los 12 meses con sus totales.
+
+    Se mantiene con señales (ver trabajadores/snapshot.py) y se
+    reconstruye con `python manage.py reconstruir_snapshot`. No se edita
+    directamente.
+    """
+
+    trabajador = models.OneToOneField(
+        Trabajador,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='snapshot',
+        verbose_name='Trabajador'
+    )
+    anio = models.IntegerField(verbose_name='Año')
+
+    # Contratación
+    tiene_contratacion = models.BooleanField(default=False, verbose_name='Tiene Contratación')
+    tipo_contrato = models.CharField(max_length=50, null=True, blank=True, verbose_name='Tipo de Contrato')
+    cargo = models.CharField(max_length=200, null=True, blank=True, verbose_name='Cargo')
+    salario_contratado = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True, verbose_name='Salario Contratado'
+    )
+    municipio_base = models.CharField(max_length=50, null=True, blank=True, verbose_name='Municipio Base')
+    fecha_inicio_contrato = models.DateField(null=True, blank=True, verbose_name='Fecha Inicio Contrato')
+    fecha_final_contrato = models.DateField(null=True, blank=True, verbose_name='Fecha Final Contrato')
+
+    # Ingreso
+    tiene_ingreso = models.BooleanField(default=False, verbose_name='Tiene Ingreso')
+    fecha_ingreso = models.DateField(null=True, blank=True, verbose_name='Fecha de Ingreso')
+    examen_ingreso = models.DateField(null=True, blank=True, verbose_name='Examen de Ingreso')
+    fecha_entrega_epp = models.DateField(null=True, blank=True, verbose_name='Fecha Entrega EPP')
+    fecha_entrega_dotacion = models.DateField(null=True, blank=True, verbose_name='Fecha Entrega Dotación')
+
+    # Retiro
+    tiene_retiro = models.BooleanField(default=False, verbose_name='Tiene Retiro')
+    fecha_retiro = models.DateField(null=True, blank=True, verbose_name='Fecha de Retiro')
+    fecha_liquidacion = models.DateField(null=True, blank=True, verbose_name='Fecha de Liquidación')
+    valor_liquidacion = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True, verbose_name='Valor Liquidación'
+    )
+    fecha_examen_retiro = models.DateField(null=True, blank=True, verbose_name='Fecha Examen de Retiro')
+
+    # Seguridad social
+    tiene_seguridad_social = models.BooleanField(default=False, verbose_name='Tiene Seguridad Social')
+    eps = models.CharField(max_length=100, null=True, blank=True, verbose_name='EPS')
+    fecha_afiliacion_eps = models.DateField(null=True, blank=True, verbose_name='Fecha Afiliación EPS')
+    caja_compensacion = models.CharField(max_length=100, null=True, blank=True, verbose_name='Caja de Compensación')
+    fecha_afiliacion_caja = models.DateField(null=True, blank=True, verbose_name='Fecha Afiliación Caja')
+    fondo_pension = models.CharField(max_length=100, null=True, blank=True, verbose_name='Fondo de Pensión')
+    fecha_afiliacion_pension = models.DateField(null=True, blank=True, verbose_name='Fecha Afiliación Pensión')
+    arl = models.CharField(max_length=50, null=True, blank=True, verbose_name='ARL')
+    riesgo = models.CharField(max_length=10, null=True, blank=True, verbose_name='Nivel de Riesgo')
+    fecha_afiliacion_arl = models.DateField(null=True, blank=True, verbose_name='Fecha Afiliación ARL')
+
+    # Proyecto
+    tiene_proyecto = models.BooleanField(default=False, verbose_name='Tiene Proyecto')
+    administrativo = models.BooleanField(null=True, blank=True, verbose_name='Administrativo')
+    construccion_instalaciones = models.BooleanField(null=True, blank=True, verbose_name='Construcción Instalaciones')
+    construccion_redes = models.BooleanField(null=True, blank=True, verbose_name='Construcción Redes')
+    servicios = models.BooleanField(null=True, blank=True, verbose_name='Servicios')
+    mantenimiento_redes = models.BooleanField(null=True, blank=True, verbose_name='Mantenimiento Redes')
+
+    # Cronograma: 12 posiciones (enero a diciembre), cada una
+    # [municipio, salario_cotizacion, dias_laborados, sueldo_devengado] o null
+    meses = models.JSONField(default=list, encoder=DjangoJSONEncoder, verbose_name='Cronograma por Mes')
+    meses_con_cronograma = models.IntegerField(default=0, verbose_name='Meses con Cronograma')
+    dias_laborados_total = models.IntegerField(default=0, verbose_name='Días Laborados (total)')
+    sueldo_devengado_total = models.DecimalField(
+        max_digits=15, decimal_places=2, default=0, verbose_name='Sueldo Devengado (total)'
+    )
+
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name='Última Actualización')
+
+    class Meta:
+        verbose_name = 'Snapshot Trabajador-Año'
+        verbose_name_plural = 'Snapshots Trabajador-Año'
+        db_table = 'trabajador_anio_snapshot'
+        indexes = [
+            models.Index(fields=['anio', 'trabajador'], name='snapshot_anio_trabajador_idx'),
+        ]
+
+    def __str__(self):
+        return f'Snapshot {self.trabajador_id} ({self.anio})'
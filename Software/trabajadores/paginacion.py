@@ -0,0 +1,112 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) ordenada por (primer_apellido, id).
+
+    Cada página filtra a partir de la última clave vista en lugar de usar
+    OFFSET, así el costo de una página no depende de cuántos trabajadores
+    haya antes. Parámetros:
+        ?cursor=<opaco>    posición devuelta en `next`
+        ?page_size=<n>     tamaño de página (máximo `max_page_size`)
+        ?paginar=false     modo sin paginar para clientes antiguos
+
+    El cursor depende del orden fijo, así que `?ordering=` (OrderingFilter)
+    solo se acepta sin paginar; al paginar responde 400 en lugar de
+    ignorarlo en silencio.
+    """
+
+    ordering = ('primer_apellido', 'id')
+    page_size = getattr(settings, 'TRABAJADORES_PAGE_SIZE', 100)
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    paginar_query_param = 'paginar'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if request.query_params.get(self.paginar_query_param, '').lower() in ('false', '0', 'no'):
+            return None
+
+        if api_settings.ORDERING_PARAM in request.query_params:
+            raise ValidationError({
+                api_settings.ORDERING_PARAM: [
+                    f'El listado paginado se ordena por {", ".join(self.ordering)}; '
+                    f'?{api_settings.ORDERING_PARAM}= solo aplica con ?{self.paginar_query_param}=false'
+                ]
+            })
+
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = self.decode_cursor(request)
+        if cursor:
+            apellido, ultimo_id = cursor
+            # El límite inferior sobre primer_apellido permite un rango sobre el índice
+            queryset = queryset.filter(primer_apellido__gte=apellido).filter(
+                Q(primer_apellido__gt=apellido) | Q(id__gt=ultimo_id)
+            )
+
+        # Se pide un registro extra para saber si hay página siguiente
+        resultados = list(queryset[:page_size + 1])
+        self.has_next = len(resultados) > page_size
+        resultados = resultados[:page_size]
+        self.next_position = None
+        if self.has_next:
+            ultimo = resultados[-1]
+            self.next_position = (ultimo.primer_apellido, ultimo.id)
+        return resultados
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            apellido, ultimo_id = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return str(apellido), int(ultimo_id)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Cursor inválido')
+
+    def encode_cursor(self, position):
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.next_position:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
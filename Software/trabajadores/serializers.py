@@ -1,10 +1,44 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Trabajador
+from .models import Trabajador, TrabajadorAnioSnapshot, RELACIONES_ANIO
+from .snapshot import construir_snapshot, guardar_snapshots
 from proyectos.models import Proyecto
+from contratacion.serializers import ContratacionSerializer
+from ingreso.serializers import IngresoSerializer
+from retiro.serializers import RetiroSerializer
+from seguridad_social.serializers import SeguridadSocialSerializer
+from proyectos.serializers import ProyectoSerializer
+from cronograma.models import Cronograma
+from cronograma.serializers import CronogramaSerializer
+
+
+# Columnas del modelo que necesita cada campo calculado
+DEPENDENCIAS_CAMPOS = {
+    'nombre_completo': ['primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido'],
+    'edad': ['fecha_nacimiento'],
+}
+
+
+class CamposDinamicosMixin:
+    """
+    Permite limitar los campos serializados con el argumento `campos`
+    (lista de nombres). Los campos no incluidos no se calculan.
+    """
+
+    def __init__(self, *args, **kwargs):
+        campos = kwargs.pop('campos', None)
+        super().__init__(*args, **kwargs)
+        if campos is not None:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
 
 
 class TrabajadorSerializer(serializers.ModelSerializer):
-    """Serializer básico para el modelo Trabajador (sin relaciones)"""
+    """
+    Serializer básico para el modelo Trabajador (sin relaciones).
+    Incluye `anio` para que la restricción única (tipo, numero, anio)
+    se valide aquí y un documento repetido responda 400.
+    """
 
     nombre_completo = serializers.ReadOnlyField()
     edad = serializers.ReadOnlyField()
@@ -21,6 +55,7 @@ class TrabajadorSerializer(serializers.ModelSerializer):
             'segundo_apellido',
             'primer_nombre',
             'segundo_nombre',
+            'anio',
             'nombre_completo',
             'edad',
             'fecha_creacion',
@@ -29,8 +64,11 @@ class TrabajadorSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion']
 
 
-class TrabajadorDetalleSerializer(serializers.ModelSerializer):
-    """Serializer completo con todas las relaciones del trabajador"""
+class TrabajadorDetalleSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Serializer completo con todas las relaciones del trabajador.
+    Acepta `campos` para serializar solo una parte (?fields= y ?expand=).
+    """
 
     nombre_completo = serializers.ReadOnlyField()
     edad = serializers.ReadOnlyField()
@@ -71,7 +109,7 @@ class TrabajadorDetalleSerializer(serializers.ModelSerializer):
         from contratacion.serializers import ContratacionSerializer
         try:
             anio = self.context.get('anio', 2025)
-            contratacion = obj.contrataciones.filter(anio=anio).first()
+            contratacion = obj.relacion_anio('contratacion', anio)
             if contratacion:
                 return ContratacionSerializer(contratacion).data
             return None
@@ -83,7 +121,7 @@ class TrabajadorDetalleSerializer(serializers.ModelSerializer):
         from ingreso.serializers import IngresoSerializer
         try:
             anio = self.context.get('anio', 2025)
-            ingreso = obj.ingresos.filter(anio=anio).first()
+            ingreso = obj.relacion_anio('ingreso', anio)
             if ingreso:
                 return IngresoSerializer(ingreso).data
             return None
@@ -95,7 +133,7 @@ class TrabajadorDetalleSerializer(serializers.ModelSerializer):
         from retiro.serializers import RetiroSerializer
         try:
             anio = self.context.get('anio', 2025)
-            retiro = obj.retiros.filter(anio=anio).first()
+            retiro = obj.relacion_anio('retiro', anio)
             if retiro:
                 return RetiroSerializer(retiro).data
             return None
@@ -107,7 +145,7 @@ class TrabajadorDetalleSerializer(serializers.ModelSerializer):
         from seguridad_social.serializers import SeguridadSocialSerializer
         try:
             anio = self.context.get('anio', 2025)
-            seguridad_social = obj.seguridad_social_registros.filter(anio=anio).first()
+            seguridad_social = obj.relacion_anio('seguridad_social', anio)
             if seguridad_social:
                 return SeguridadSocialSerializer(seguridad_social).data
             return None
@@ -119,7 +157,7 @@ class TrabajadorDetalleSerializer(serializers.ModelSerializer):
         from proyectos.serializers import ProyectoSerializer
         try:
             anio = self.context.get('anio', 2025)
-            proyecto = obj.proyectos_asignados.filter(anio=anio).first()
+            proyecto = obj.relacion_anio('proyecto', anio)
             if proyecto:
                 return ProyectoSerializer(proyecto).data
             return None
@@ -141,3 +179,175 @@ class TrabajadorListSerializer(serializers.ModelSerializer):
             'nombre_completo',
             'fecha_nacimiento'
         ]
+
+
+class TrabajadorAnioSnapshotSerializer(serializers.ModelSerializer):
+    """Columnas del snapshot trabajador-año (sin la clave)"""
+
+    class Meta:
+        model = TrabajadorAnioSnapshot
+        exclude = ['trabajador', 'anio']
+
+
+class TrabajadorResumenSerializer(serializers.ModelSerializer):
+    """
+    Trabajador-año en una fila plana: identificación más las columnas de
+    su snapshot. Requiere el snapshot unido (select_related('snapshot')).
+    """
+
+    nombre_completo = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Trabajador
+        fields = [
+            'id',
+            'numero',
+            'tipo',
+            'nombre_completo',
+            'anio',
+        ]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data.update(TrabajadorAnioSnapshotSerializer(instance.snapshot).data)
+        return data
+
+
+def serializer_anidado(serializer_class):
+    """
+    Variante del serializer de una tabla relacionada sin el campo
+    `trabajador`, para usarla dentro del documento del trabajador.
+    """
+    class Meta(serializer_class.Meta):
+        fields = [campo for campo in serializer_class.Meta.fields if campo != 'trabajador']
+
+    return type(f'{serializer_class.__name__}Anidado', (serializer_class,), {'Meta': Meta})
+
+
+class TrabajadorDocumentoSerializer(serializers.ModelSerializer):
+    """
+    Documento completo de un trabajador en un año: datos personales,
+    contratación, ingreso, retiro, seguridad social, proyecto y cronograma.
+    Se guarda completo en una sola transacción.
+    """
+
+    nombre_completo = serializers.ReadOnlyField()
+    edad = serializers.ReadOnlyField()
+
+    contratacion = serializer_anidado(ContratacionSerializer)(required=False, allow_null=True)
+    ingreso = serializer_anidado(IngresoSerializer)(required=False, allow_null=True)
+    retiro = serializer_anidado(RetiroSerializer)(required=False, allow_null=True)
+    seguridad_social = serializer_anidado(SeguridadSocialSerializer)(required=False, allow_null=True)
+    proyecto = serializer_anidado(ProyectoSerializer)(required=False, allow_null=True)
+    cronogramas = serializer_anidado(CronogramaSerializer)(many=True, required=False)
+
+    class Meta:
+        model = Trabajador
+        fields = TrabajadorDetalleSerializer.Meta.fields[:]
+        fields.insert(fields.index('nombre_completo'), 'anio')
+        fields.insert(fields.index('fecha_creacion'), 'cronogramas')
+        read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion']
+
+    def validate(self, attrs):
+        anio = attrs.get('anio', self.instance.anio if self.instance else 2025)
+        if self.instance and anio != self.instance.anio:
+            raise serializers.ValidationError({'anio': ['No se puede cambiar el año del documento']})
+
+        meses = set()
+        for cronograma in attrs.get('cronogramas', []):
+            # El cronograma se guarda con el primer día del mes
+            cronograma['mes'] = mes = cronograma['mes'].replace(day=1)
+            if mes.year != anio:
+                raise serializers.ValidationError({'cronogramas': [f'El mes {mes} no pertenece al año {anio}']})
+            if mes in meses:
+                raise serializers.ValidationError({'cronogramas': [f'El mes {mes} está repetido']})
+            meses.add(mes)
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        relaciones = {nombre: validated_data.pop(nombre, None) for nombre in RELACIONES_ANIO}
+        cronogramas = validated_data.pop('cronogramas', [])
+        trabajador = Trabajador.objects.create(**validated_data)
+        registros, trabajador.cronogramas_anio = self._guardar_relaciones(trabajador, relaciones, cronogramas)
+        # Quedan como datos precargados para la respuesta (ver Trabajador.relacion_anio)
+        for nombre, registro in registros.items():
+            setattr(trabajador, f'{nombre}_anio', [registro] if registro else [])
+        return trabajador
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """Reemplaza el documento: las relaciones omitidas se eliminan"""
+        relaciones = {nombre: validated_data.pop(nombre, None) for nombre in RELACIONES_ANIO}
+        cronogramas = validated_data.pop('cronogramas', [])
+        for campo, valor in validated_data.items():
+            setattr(instance, campo, valor)
+        instance.save()
+
+        for nombre, datos in relaciones.items():
+            if datos is None:
+                self._modelo_relacion(nombre).objects.filter(trabajador=instance, anio=instance.anio).delete()
+        instance.cronogramas.filter(anio=instance.anio).exclude(
+            mes__in=[cronograma['mes'] for cronograma in cronogramas]
+        ).delete()
+
+        # Los registros actualizados se vuelven a leer al serializar
+        self._guardar_relaciones(instance, relaciones, cronogramas)
+        return instance
+
+    def _modelo_relacion(self, nombre):
+        return Trabajador._meta.get_field(RELACIONES_ANIO[nombre]).related_model
+
+    def _guardar_relaciones(self, trabajador, relaciones, cronogramas):
+        """
+        Un upsert por tabla anual y uno para todo el cronograma.
+        Retorna ({nombre: registro o None}, lista de cronogramas).
+        """
+        registros = {}
+        for nombre, datos in relaciones.items():
+            registros[nombre] = None
+            if datos is not None:
+                model = self._modelo_relacion(nombre)
+                registros[nombre], = model.objects.bulk_create(
+                    [model(trabajador=trabajador, anio=trabajador.anio, **datos)],
+                    update_conflicts=True,
+                    unique_fields=['trabajador', 'anio'],
+                    update_fields=[
+                        field.name for field in model._meta.concrete_fields
+                        if not field.primary_key and field.name not in ('trabajador', 'anio', 'fecha_creacion')
+                    ],
+                )
+
+        guardados = []
+        if cronogramas:
+            guardados = Cronograma.objects.bulk_create(
+                [Cronograma(trabajador=trabajador, anio=datos['mes'].year, **datos) for datos in cronogramas],
+                update_conflicts=True,
+                unique_fields=['trabajador', 'mes'],
+                update_fields=[
+                    'anio', 'municipio_ejecucion', 'salario_cotizacion',
+                    'dias_laborados', 'sueldo_devengado', 'fecha_actualizacion'
+                ],
+            )
+
+        # bulk_create no envía señales: el snapshot se arma con los registros guardados
+        guardar_snapshots([construir_snapshot(trabajador, registros, guardados)])
+        return registros, guardados
+
+    def to_representation(self, instance):
+        data = {}
+        for nombre, field in self.fields.items():
+            if field.write_only:
+                continue
+            if nombre in RELACIONES_ANIO:
+                registro = instance.relacion_anio(nombre, instance.anio)
+                data[nombre] = field.to_representation(registro) if registro else None
+            elif nombre == 'cronogramas':
+                cronogramas = getattr(instance, 'cronogramas_anio', None)
+                if cronogramas is None:
+                    cronogramas = instance.cronogramas.filter(anio=instance.anio).order_by('mes')
+                data[nombre] = field.to_representation(cronogramas)
+            else:
+                valor = field.get_attribute(instance)
+                data[nombre] = None if valor is None else field.to_representation(valor)
+        return data
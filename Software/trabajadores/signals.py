@@ -0,0 +1,96 @@
+"""
+Señales que mantienen el snapshot trabajador-año (ver trabajadores/snapshot.py).
+
+Los borrados en cascada desde el trabajador no actualizan nada: su
+snapshot se elimina con él.
+
+Cada registro recuerda el (trabajador_id, anio) con que se leyó: si al
+guardarlo cambió (se reasignó a otro trabajador o a otro año), también se
+recalcula el snapshot que deja.
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+
+from cronograma.models import Cronograma
+from . import snapshot
+from .models import Trabajador, RELACIONES_ANIO
+
+
+# Modelo de cada tabla anual -> nombre de la relación
+MODELOS_RELACIONES = {
+    Trabajador._meta.get_field(related_name).related_model: nombre
+    for nombre, related_name in RELACIONES_ANIO.items()
+}
+
+
+def _borrado_en_cascada(origin):
+    """El borrado empezó en un trabajador (instancia o QuerySet)"""
+    return isinstance(origin, Trabajador) or getattr(origin, 'model', None) is Trabajador
+
+
+def _clave_snapshot(instance):
+    """(trabajador_id, anio) del registro; None en los campos diferidos"""
+    return instance.__dict__.get('trabajador_id'), instance.__dict__.get('anio')
+
+
+def _clave_anterior(instance):
+    """
+    Clave con que se leyó el registro si cambió al guardarlo, o None. Se
+    actualiza para el siguiente guardado de la misma instancia.
+    """
+    anterior = getattr(instance, '_snapshot_clave', None)
+    instance._snapshot_clave = _clave_snapshot(instance)
+    if anterior is None or None in anterior or anterior == instance._snapshot_clave:
+        return None
+    return anterior
+
+
+def registro_inicializado(sender, instance, **kwargs):
+    instance._snapshot_clave = _clave_snapshot(instance)
+
+
+def trabajador_guardado(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        snapshot.crear_snapshot_vacio(instance)
+    else:
+        snapshot.sincronizar_anio(instance)
+
+
+def relacion_guardada(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    snapshot.actualizar_relacion(MODELOS_RELACIONES[sender], instance)
+    anterior = _clave_anterior(instance)
+    if anterior:
+        snapshot.recalcular_relacion(MODELOS_RELACIONES[sender], sender, *anterior)
+
+
+def relacion_eliminada(sender, instance, origin=None, **kwargs):
+    if not _borrado_en_cascada(origin):
+        snapshot.actualizar_relacion(MODELOS_RELACIONES[sender], instance, eliminado=True)
+
+
+def cronograma_guardado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    snapshot.actualizar_cronograma(instance.trabajador_id, instance.anio)
+    anterior = _clave_anterior(instance)
+    if anterior:
+        snapshot.actualizar_cronograma(*anterior)
+
+
+def cronograma_eliminado(sender, instance, origin=None, **kwargs):
+    if not _borrado_en_cascada(origin):
+        snapshot.actualizar_cronograma(instance.trabajador_id, instance.anio)
+
+
+def conectar():
+    post_save.connect(trabajador_guardado, sender=Trabajador, dispatch_uid='snapshot_trabajador')
+    for model in MODELOS_RELACIONES:
+        post_init.connect(registro_inicializado, sender=model, dispatch_uid=f'snapshot_leer_{model.__name__}')
+        post_save.connect(relacion_guardada, sender=model, dispatch_uid=f'snapshot_guardar_{model.__name__}')
+        post_delete.connect(relacion_eliminada, sender=model, dispatch_uid=f'snapshot_eliminar_{model.__name__}')
+    post_init.connect(registro_inicializado, sender=Cronograma, dispatch_uid='snapshot_leer_cronograma')
+    post_save.connect(cronograma_guardado, sender=Cronograma, dispatch_uid='snapshot_guardar_cronograma')
+    post_delete.connect(cronograma_eliminado, sender=Cronograma, dispatch_uid='snapshot_eliminar_cronograma')
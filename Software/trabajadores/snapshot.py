@@ -0,0 +1,364 @@
+"""
+Mantenimiento del modelo de lectura `trabajador_anio_snapshot`.
+
+Cada fila reúne en columnas planas la contratación, el ingreso, el
+retiro, la seguridad social y el proyecto de un trabajador-año, y su
+cronograma de 12 meses con los totales. La exportación NOVEDADES y el
+listado resumido la leen junto con el trabajador en una sola consulta.
+
+Se mantiene así:
+    - Señales post_save/post_delete (trabajadores/signals.py): un cambio
+      en una tabla anual actualiza solo sus columnas (un UPDATE); un
+      cambio en el cronograma recalcula los meses del año. Si el registro
+      pasó a otro trabajador o a otro año, también se recalcula el
+      snapshot que deja.
+    - bulk_create no envía señales: las rutas masivas (importación por
+      lotes, documento del trabajador, carga de cronogramas,
+      generar_datos) guardan el snapshot de lo que acaban de escribir.
+    - `reconstruir_snapshots` lo recalcula por lotes desde las tablas
+      (comando reconstruir_snapshot). La migración 0011 lo llenó para los
+      trabajadores existentes.
+    - `guardar_snapshots_sql` lo recalcula en una sola sentencia SQL,
+      para cargas que escriben directamente en las tablas (importar_csv).
+
+Las lecturas (exportaciones, /api/trabajadores/resumen/) no escriben: si
+a un trabajador le falta el snapshot, lo calculan al vuelo
+(`completar_en_memoria`, `sql_snapshots_o_calculados`).
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from contratacion.models import Contratacion
+from ingreso.models import Ingreso
+from retiro.models import Retiro
+from seguridad_social.models import SeguridadSocial
+from proyectos.models import Proyecto
+from cronograma.models import Cronograma
+from .models import Trabajador, TrabajadorAnioSnapshot, RELACIONES_ANIO
+
+
+# Trabajadores procesados por cada lote de consultas
+TAMANO_LOTE = 2000
+
+# Columnas del snapshot copiadas de cada tabla anual
+CAMPOS_RELACIONES = {
+    'contratacion': [
+        'tipo_contrato', 'cargo', 'salario_contratado', 'municipio_base',
+        'fecha_inicio_contrato', 'fecha_final_contrato',
+    ],
+    'ingreso': ['fecha_ingreso', 'examen_ingreso', 'fecha_entrega_epp', 'fecha_entrega_dotacion'],
+    'retiro': ['fecha_retiro', 'fecha_liquidacion', 'valor_liquidacion', 'fecha_examen_retiro'],
+    'seguridad_social': [
+        'eps', 'fecha_afiliacion_eps', 'caja_compensacion', 'fecha_afiliacion_caja',
+        'fondo_pension', 'fecha_afiliacion_pension', 'arl', 'riesgo', 'fecha_afiliacion_arl',
+    ],
+    'proyecto': [
+        'administrativo', 'construccion_instalaciones', 'construccion_redes', 'servicios', 'mantenimiento_redes',
+    ],
+}
+
+CENTAVO = Decimal('0.01')
+
+# Columnas que se reescriben en un upsert (todas salvo la clave)
+CAMPOS_ACTUALIZABLES = [
+    field.name for field in TrabajadorAnioSnapshot._meta.concrete_fields if not field.primary_key
+]
+
+
+class DatosAnio:
+    """Relaciones de un año cargadas en memoria para un lote de trabajadores"""
+
+    def __init__(self, anio, trabajador_ids):
+        self.anio = anio
+        self.meses = [date(anio, mes, 1) for mes in range(1, 13)]
+
+        self.contrataciones = self._por_trabajador(Contratacion, trabajador_ids)
+        self.ingresos = self._por_trabajador(Ingreso, trabajador_ids)
+        self.retiros = self._por_trabajador(Retiro, trabajador_ids)
+        self.seguridad_social = self._por_trabajador(SeguridadSocial, trabajador_ids)
+        self.proyectos = self._por_trabajador(Proyecto, trabajador_ids)
+
+        self.cronogramas = defaultdict(list)
+        for cronograma in Cronograma.objects.filter(
+            trabajador_id__in=trabajador_ids,
+            mes__in=self.meses
+        ).order_by():
+            self.cronogramas[cronograma.trabajador_id].append(cronograma)
+
+    def _por_trabajador(self, model, trabajador_ids):
+        """Una consulta por tabla: {trabajador_id: registro del año}"""
+        return {
+            registro.trabajador_id: registro
+            for registro in model.objects.filter(anio=self.anio, trabajador_id__in=trabajador_ids).order_by()
+        }
+
+    def registros(self, trabajador_id):
+        """{nombre de la relación: registro o None} de un trabajador"""
+        return {
+            'contratacion': self.contrataciones.get(trabajador_id),
+            'ingreso': self.ingresos.get(trabajador_id),
+            'retiro': self.retiros.get(trabajador_id),
+            'seguridad_social': self.seguridad_social.get(trabajador_id),
+            'proyecto': self.proyectos.get(trabajador_id),
+        }
+
+
+def columnas_relacion(nombre, registro):
+    """Columnas del snapshot para el registro de una tabla anual (None si no existe)"""
+    columnas = {f'tiene_{nombre}': registro is not None}
+    for campo in CAMPOS_RELACIONES[nombre]:
+        columnas[campo] = getattr(registro, campo) if registro is not None else None
+    return columnas
+
+
+def _pesos(valor):
+    """Valor monetario con 2 decimales, como se lee de la base de datos"""
+    return None if valor is None else Decimal(str(valor)).quantize(CENTAVO)
+
+
+def columnas_cronograma(anio, cronogramas):
+    """Meses (enero a diciembre) y totales del cronograma de un trabajador en el año"""
+    por_mes = {cronograma.mes: cronograma for cronograma in cronogramas}
+    meses = []
+    for numero in range(1, 13):
+        cronograma = por_mes.get(date(anio, numero, 1))
+        meses.append([
+            cronograma.municipio_ejecucion or '',
+            _pesos(cronograma.salario_cotizacion),
+            cronograma.dias_laborados or 0,
+            _pesos(cronograma.sueldo_devengado),
+        ] if cronograma else None)
+
+    registrados = [mes for mes in meses if mes]
+    return {
+        'meses': meses,
+        'meses_con_cronograma': len(registrados),
+        'dias_laborados_total': sum(mes[2] for mes in registrados),
+        'sueldo_devengado_total': sum((mes[3] or 0 for mes in registrados), Decimal('0.00')),
+    }
+
+
+def construir_snapshot(trabajador, registros, cronogramas):
+    """
+    Snapshot sin guardar de un trabajador a partir de sus registros en
+    memoria: `registros` es {nombre: registro o None} y `cronogramas` los
+    del año del trabajador.
+    """
+    columnas = {}
+    for nombre in CAMPOS_RELACIONES:
+        columnas.update(columnas_relacion(nombre, registros.get(nombre)))
+    columnas.update(columnas_cronograma(trabajador.anio, cronogramas))
+    return TrabajadorAnioSnapshot(trabajador=trabajador, anio=trabajador.anio, **columnas)
+
+
+def guardar_snapshots(snapshots):
+    """Upsert de los snapshots en una sola consulta"""
+    if snapshots:
+        TrabajadorAnioSnapshot.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['trabajador'],
+            update_fields=CAMPOS_ACTUALIZABLES,
+        )
+
+
+def calcular_snapshots(trabajadores):
+    """
+    Snapshots sin guardar de los trabajadores indicados (instancias con
+    `id` y `anio`), calculados desde las tablas. Una consulta por tabla y año.
+    """
+    por_anio = defaultdict(list)
+    for trabajador in trabajadores:
+        por_anio[trabajador.anio].append(trabajador)
+
+    snapshots = []
+    for anio, grupo in por_anio.items():
+        datos = DatosAnio(anio, [trabajador.id for trabajador in grupo])
+        snapshots.extend(
+            construir_snapshot(trabajador, datos.registros(trabajador.id), datos.cronogramas[trabajador.id])
+            for trabajador in grupo
+        )
+    return snapshots
+
+
+def actualizar_snapshots(trabajadores):
+    """
+    Recalcula desde las tablas el snapshot de los trabajadores indicados
+    (instancias con `id` y `anio`). Una consulta por tabla y año, y un upsert.
+    """
+    snapshots = calcular_snapshots(trabajadores)
+    guardar_snapshots(snapshots)
+    return len(snapshots)
+
+
+def sql_calculo_snapshots(trabajadores_sql):
+    """
+    SELECT que calcula las columnas del snapshot de los trabajadores cuyo
+    id devuelve `trabajadores_sql`, con un LEFT JOIN por tabla anual y el
+    cronograma agregado por mes. Produce los mismos valores que
+    `construir_snapshot` (los montos del JSON como texto con 2 decimales).
+    Retorna (columnas, sql).
+    """
+    columnas = ['trabajador_id', 'anio']
+    valores = ['t.id', 't.anio']
+    uniones = []
+    for nombre, campos in CAMPOS_RELACIONES.items():
+        tabla = Trabajador._meta.get_field(RELACIONES_ANIO[nombre]).related_model._meta.db_table
+        uniones.append(f'LEFT JOIN {tabla} {nombre} ON {nombre}.trabajador_id = t.id AND {nombre}.anio = t.anio')
+        columnas += [f'tiene_{nombre}'] + campos
+        valores += [f'{nombre}.id IS NOT NULL'] + [f'{nombre}.{campo}' for campo in campos]
+    columnas += ['meses', 'meses_con_cronograma', 'dias_laborados_total', 'sueldo_devengado_total', 'fecha_actualizacion']
+    valores += ['c.meses', 'c.meses_con_cronograma', 'c.dias_laborados_total', 'c.sueldo_devengado_total', 'now()']
+
+    return columnas, f'''
+        SELECT {', '.join(f'{valor} AS {columna}' for valor, columna in zip(valores, columnas))}
+        FROM {Trabajador._meta.db_table} t
+        {' '.join(uniones)}
+        CROSS JOIN LATERAL (
+            SELECT
+                jsonb_agg(
+                    CASE WHEN cr.id IS NOT NULL THEN jsonb_build_array(
+                        COALESCE(cr.municipio_ejecucion, ''), cr.salario_cotizacion::text,
+                        COALESCE(cr.dias_laborados, 0), cr.sueldo_devengado::text
+                    ) END
+                    ORDER BY mes.numero
+                ) AS meses,
+                count(cr.id) AS meses_con_cronograma,
+                COALESCE(sum(cr.dias_laborados), 0) AS dias_laborados_total,
+                COALESCE(sum(cr.sueldo_devengado), 0) AS sueldo_devengado_total
+            FROM generate_series(1, 12) AS mes(numero)
+            LEFT JOIN {Cronograma._meta.db_table} cr
+                ON cr.trabajador_id = t.id AND cr.mes = make_date(t.anio, mes.numero, 1)
+        ) c
+        WHERE t.id IN ({trabajadores_sql})
+    '''
+
+
+def sql_snapshots_o_calculados():
+    """
+    Subconsulta con el snapshot de todos los trabajadores: las filas de la
+    tabla y, para los que aún no tienen, las calculadas al vuelo (sin
+    guardarlas). Para lecturas que no deben escribir.
+    """
+    tabla = TrabajadorAnioSnapshot._meta.db_table
+    columnas, calculo = sql_calculo_snapshots(
+        f'SELECT id FROM {Trabajador._meta.db_table} WHERE id NOT IN (SELECT trabajador_id FROM {tabla})'
+    )
+    return f'''(
+        SELECT {', '.join(columnas)} FROM {tabla}
+        UNION ALL
+        {calculo}
+    )'''
+
+
+def _sql_snapshots(trabajadores_sql):
+    """Upsert de los snapshots calculados por `sql_calculo_snapshots`"""
+    columnas, calculo = sql_calculo_snapshots(trabajadores_sql)
+
+    # Los snapshots que no cambian no se reescriben
+    actualizables = columnas[1:]
+    comparables = actualizables[:-1]
+    return f'''
+        INSERT INTO {TrabajadorAnioSnapshot._meta.db_table} AS s ({', '.join(columnas)})
+        {calculo}
+        ON CONFLICT (trabajador_id) DO UPDATE SET
+            {', '.join(f'{columna} = EXCLUDED.{columna}' for columna in actualizables)}
+        WHERE ({', '.join(f's.{columna}' for columna in comparables)})
+            IS DISTINCT FROM ({', '.join(f'EXCLUDED.{columna}' for columna in comparables)})
+    '''
+
+
+def guardar_snapshots_sql(trabajadores_sql, params=()):
+    """
+    Recalcula en la base de datos, en una sola sentencia, el snapshot de
+    los trabajadores que selecciona `trabajadores_sql` (un SELECT de ids).
+    Retorna la cantidad de snapshots creados o modificados.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_sql_snapshots(trabajadores_sql), params)
+        return cursor.rowcount
+
+
+def _por_lotes(trabajadores, tamano_lote):
+    lote = []
+    for trabajador in trabajadores.only('id', 'anio').order_by('id').iterator(chunk_size=tamano_lote):
+        lote.append(trabajador)
+        if len(lote) == tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def reconstruir_snapshots(trabajadores=None, tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Recalcula el snapshot de todos los trabajadores (o del QuerySet
+    indicado) por lotes de `tamano_lote`. `progreso` (opcional) se llama
+    con el total recalculado. Retorna la cantidad de snapshots guardados.
+    """
+    if trabajadores is None:
+        trabajadores = Trabajador.objects.all()
+    total = 0
+    for lote in _por_lotes(trabajadores, tamano_lote):
+        total += actualizar_snapshots(lote)
+        if progreso:
+            progreso(total)
+    return total
+
+
+def completar_en_memoria(trabajadores):
+    """
+    A los trabajadores (leídos con select_related('snapshot')) que aún no
+    tienen snapshot les asigna uno calculado, sin guardarlo: las lecturas
+    no escriben en la base de datos.
+    """
+    faltantes = [trabajador for trabajador in trabajadores if not hasattr(trabajador, 'snapshot')]
+    for snapshot in calcular_snapshots(faltantes):
+        snapshot.trabajador.snapshot = snapshot
+
+
+def actualizar_relacion(nombre, registro, eliminado=False):
+    """Reescribe las columnas de una tabla anual en el snapshot de su trabajador-año"""
+    TrabajadorAnioSnapshot.objects.filter(trabajador_id=registro.trabajador_id, anio=registro.anio).update(
+        **columnas_relacion(nombre, None if eliminado else registro),
+        fecha_actualizacion=timezone.now()
+    )
+
+
+def recalcular_relacion(nombre, model, trabajador_id, anio):
+    """
+    Recalcula desde la tabla las columnas de una relación en el snapshot de
+    un trabajador-año: el que queda cuando un registro se mueve a otro
+    trabajador o a otro año.
+    """
+    registro = model.objects.filter(trabajador_id=trabajador_id, anio=anio).first()
+    TrabajadorAnioSnapshot.objects.filter(trabajador_id=trabajador_id, anio=anio).update(
+        **columnas_relacion(nombre, registro),
+        fecha_actualizacion=timezone.now()
+    )
+
+
+def actualizar_cronograma(trabajador_id, anio):
+    """Recalcula los meses y totales del cronograma en el snapshot del trabajador-año"""
+    cronogramas = Cronograma.objects.filter(trabajador_id=trabajador_id, anio=anio).order_by()
+    TrabajadorAnioSnapshot.objects.filter(trabajador_id=trabajador_id, anio=anio).update(
+        **columnas_cronograma(anio, cronogramas),
+        fecha_actualizacion=timezone.now()
+    )
+
+
+def crear_snapshot_vacio(trabajador):
+    """Fila inicial de un trabajador nuevo; las señales de sus tablas la completan"""
+    TrabajadorAnioSnapshot.objects.bulk_create(
+        [construir_snapshot(trabajador, {}, [])], ignore_conflicts=True
+    )
+
+
+def sincronizar_anio(trabajador):
+    """Si el trabajador cambió de año, su snapshot se recalcula con las tablas del año nuevo"""
+    if TrabajadorAnioSnapshot.objects.filter(trabajador=trabajador).exclude(anio=trabajador.anio).exists():
+        actualizar_snapshots([trabajador])
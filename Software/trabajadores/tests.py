@@ -1,3 +1,1693 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from functools import partial
+from importlib import import_module
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from openpyxl import Workbook, load_workbook
+
+from contratacion.models import Contratacion
+from cronograma.models import Cronograma
+from ingreso.models import Ingreso
+from proyectos.models import Proyecto
+from retiro.models import Retiro
+from seguridad_social.models import SeguridadSocial
+from .benchmark import ESCENARIOS, comparar_resultados, medir, preparar_datos
+from .cache_exportacion import purgar_cache
+from .conversiones import FORMATOS_FECHA, convertir_decimal, convertir_entero, convertir_fecha
+from .csv_novedades import TAMANO_BLOQUE, ErrorFormatoCSV, exportar_csv, importar_csv, iterar_csv
+from .exportacion import filas_novedades
+from .formato_novedades import COL_CRONOGRAMA, codificar_fila, decodificar_fila
+from .management.commands.importar_excel import Command as ImportarExcel, hojas_novedades
+from .snapshot import reconstruir_snapshots
+from .models import Trabajador, TrabajadorAnioSnapshot
+
+verificar_duplicados = import_module('trabajadores.migrations.0006_trabajador_huella_importacion').verificar_duplicados
+RELLENAR_SNAPSHOT = import_module('trabajadores.migrations.0011_rellenar_trabajador_anio_snapshot').RELLENAR_SNAPSHOT
+
+
+def crear_trabajador(indice, anio=2025):
+    """Crea un trabajador con todas sus relaciones para el año indicado"""
+    trabajador = Trabajador.objects.create(
+        tipo='CC',
+        numero=f'10{indice:06d}',
+        fecha_expedicion_cedula=date(2000, 1, 1),
+        fecha_nacimiento=date(1982, 1, 1),
+        primer_apellido=f'APELLIDO{indice}',
+        primer_nombre=f'NOMBRE{indice}',
+        anio=anio,
+    )
+    Contratacion.objects.create(
+        trabajador=trabajador,
+        anio=anio,
+        tipo_contrato='TERMINO_FIJO',
+        cargo='OPERARIO',
+        salario_contratado=1423500,
+        municipio_base='PASTO',
+        fecha_inicio_contrato=date(anio, 1, 1),
+    )
+    Ingreso.objects.create(trabajador=trabajador, anio=anio, fecha_ingreso=date(anio, 1, 1))
+    Retiro.objects.create(trabajador=trabajador, anio=anio)
+    SeguridadSocial.objects.create(trabajador=trabajador, anio=anio, eps='NUEVA EPS', arl='POSITIVA')
+    Proyecto.objects.create(trabajador=trabajador, anio=anio, administrativo=True)
+    Cronograma.objects.create(
+        trabajador=trabajador,
+        mes=date(anio, 1, 1),
+        municipio_ejecucion='PASTO',
+        salario_cotizacion=1423500,
+        dias_laborados=30,
+        sueldo_devengado=1423500,
+    )
+    return trabajador
+
+
+def fila_novedades(indice, anio=2025):
+    """Fila del formato NOVEDADES (85 columnas) como la lee importar_excel"""
+    fila = [None] * 85
+    fila[0:9] = [
+        indice, 'CC', f'20{indice:06d}', datetime(2006, 8, 15), datetime(1988, 6, 23),
+        'URBANO', 'ORDOÑEZ', f'NOMBRE{indice}', None,
+    ]
+    fila[9:15] = ['PRESTACION DE SERVICIOS', 'GERENTE', 2000000, ' PASTO ', datetime(anio, 5, 1), None]
+    fila[23] = 'SANITAS S.A.S.'
+    fila[29] = 'POSITIVA '
+    fila[32] = 'X'
+    # Enero y diciembre con cronograma
+    fila[37:41] = ['PASTO', 2000000, 30, 2000000]
+    fila[81:85] = ['IPIALES', '1.500.000,50', 15, 750000]
+    return fila
+
+
+def crear_libro_novedades(path, filas, titulo='NOVEDADES 2025'):
+    """Crea un libro con encabezados en las filas 3-4 y los datos desde la fila 5"""
+    crear_libro_hojas(path, {titulo: filas})
+
+
+def crear_libro_hojas(path, hojas):
+    """Crea un libro con una hoja por título ({titulo: filas}) en el formato de crear_libro_novedades"""
+    wb = Workbook()
+    wb.remove(wb.active)
+    for titulo, filas in hojas.items():
+        ws = wb.create_sheet(titulo)
+        ws.append(['CONTRATISTA:'])
+        ws.append([])
+        ws.append(['#', 'IDENTIFICACIÓN'])
+        ws.append(['N°', 'TIPO', 'NUMERO'])
+        for fila in filas:
+            ws.append(fila)
+    wb.save(path)
+
+
+class TrabajadorListadoTests(TestCase):
+    """Pruebas del listado de trabajadores con relaciones por año"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def test_listado_usa_numero_constante_de_consultas(self):
+        # Marca de modificación (ETag) + 1 consulta de trabajadores + 1 por cada relación anual precargada
+        for cantidad in (2, 8):
+            for indice in range(Trabajador.objects.count(), cantidad):
+                crear_trabajador(indice)
+            with self.assertNumQueries(7):
+                response = self.client.get('/api/trabajadores/', {'anio': 2025})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), cantidad)
+
+    def test_listado_retorna_relaciones_del_anio(self):
+        crear_trabajador(1, anio=2025)
+        crear_trabajador(2, anio=2024)
+
+        response = self.client.get('/api/trabajadores/', {'anio': 2024})
+
+        self.assertEqual(len(response.data['results']), 1)
+        datos = response.data['results'][0]
+        self.assertEqual(datos['numero'], '10000002')
+        self.assertEqual(datos['contratacion']['cargo'], 'OPERARIO')
+        self.assertEqual(datos['seguridad_social']['arl'], 'POSITIVA')
+        self.assertTrue(datos['proyecto']['administrativo'])
+        self.assertIsNotNone(datos['ingreso'])
+        self.assertIsNotNone(datos['retiro'])
+
+    def test_paginacion_por_cursor_recorre_todos_sin_repetir(self):
+        for indice in range(7):
+            crear_trabajador(indice)
+        # Apellidos repetidos: el desempate es por id
+        Trabajador.objects.filter(numero__in=['10000001', '10000002', '10000003']).update(primer_apellido='PEREZ')
+
+        vistos = []
+        url = '/api/trabajadores/?anio=2025&page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            vistos.extend((t['primer_apellido'], t['id']) for t in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(len(vistos), 7)
+        self.assertEqual(vistos, sorted(vistos))
+
+    def test_modo_sin_paginar_retorna_lista(self):
+        for indice in range(3):
+            crear_trabajador(indice)
+
+        response = self.client.get('/api/trabajadores/', {'anio': 2025, 'paginar': 'false'})
+
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 3)
+
+    def test_ordering_solo_aplica_sin_paginar(self):
+        crear_trabajador(1)
+        joven = crear_trabajador(2)
+        Trabajador.objects.filter(id=joven.id).update(fecha_nacimiento=date(1990, 1, 1))
+
+        response = self.client.get('/api/trabajadores/', {'anio': 2025, 'ordering': '-fecha_nacimiento'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.data)
+
+        response = self.client.get(
+            '/api/trabajadores/', {'anio': 2025, 'ordering': '-fecha_nacimiento', 'paginar': 'false'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['numero'] for t in response.data], ['10000002', '10000001'])
+
+    def test_cursor_invalido(self):
+        response = self.client.get('/api/trabajadores/', {'cursor': 'no-es-un-cursor'})
+
+        self.assertEqual(response.status_code, 404)
+
+
+class GetCondicionalTests(TestCase):
+    """Pruebas del ETag en el listado y el detalle de trabajadores"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        self.trabajador = crear_trabajador(1)
+
+    def test_listado_responde_304_sin_serializar(self):
+        primera = self.client.get('/api/trabajadores/', {'anio': 2025})
+
+        # Solo la consulta de la marca de modificación
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/trabajadores/', {'anio': 2025}, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_no_oculta_eliminaciones(self):
+        primera = self.client.get('/api/trabajadores/', {'anio': 2025})
+        self.assertNotIn('Last-Modified', primera)
+        desde = http_date(time.time() + 3600)
+
+        # Eliminar no mueve la última fecha_actualizacion: la fecha sola no sirve para validar
+        Ingreso.objects.filter(trabajador=self.trabajador).delete()
+        response = self.client.get('/api/trabajadores/', {'anio': 2025}, HTTP_IF_MODIFIED_SINCE=desde)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['results'][0]['ingreso'])
+        response = self.client.get(
+            f'/api/trabajadores/{self.trabajador.id}/', HTTP_IF_MODIFIED_SINCE=desde
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_cambia_con_los_datos_y_los_parametros(self):
+        etag = self.client.get('/api/trabajadores/', {'anio': 2025})['ETag']
+
+        otra_url = self.client.get('/api/trabajadores/', {'anio': 2025, 'fields': 'id'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(otra_url.status_code, 200)
+
+        contratacion = self.trabajador.contrataciones.get()
+        contratacion.cargo = 'SUPERVISOR'
+        contratacion.save()
+        response = self.client.get('/api/trabajadores/', {'anio': 2025}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['contratacion']['cargo'], 'SUPERVISOR')
+
+        etag = response['ETag']
+        crear_trabajador(2).delete()
+        self.assertEqual(
+            self.client.get('/api/trabajadores/', {'anio': 2025}, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        Ingreso.objects.filter(trabajador=self.trabajador).delete()
+        self.assertEqual(
+            self.client.get('/api/trabajadores/', {'anio': 2025}, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def test_detalle_responde_304(self):
+        url = f'/api/trabajadores/{self.trabajador.id}/'
+        etag = self.client.get(url, {'expand': 'retiro'})['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'expand': 'retiro'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        retiro = Retiro.objects.get(trabajador=self.trabajador)
+        retiro.valor_liquidacion = 1000
+        retiro.save()
+        self.assertEqual(self.client.get(url, {'expand': 'retiro'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detalle_inexistente_responde_404(self):
+        self.assertEqual(self.client.get('/api/trabajadores/999999/').status_code, 404)
+        self.assertEqual(self.client.get('/api/trabajadores/abc/').status_code, 404)
+
+
+class CamposDinamicosTests(TestCase):
+    """Pruebas de ?fields= y ?expand= en el API de trabajadores"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        for indice in range(3):
+            crear_trabajador(indice)
+
+    def test_fields_limita_campos_y_no_carga_relaciones(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/trabajadores/', {'anio': 2025, 'fields': 'id,numero,nombre_completo'})
+
+        # Marca de modificación (ETag) + trabajadores
+        self.assertEqual(len(consultas), 2)
+        self.assertNotIn('fecha_expedicion_cedula', consultas[1]['sql'])
+        self.assertEqual(set(response.data['results'][0]), {'id', 'numero', 'nombre_completo'})
+        self.assertEqual(response.data['results'][0]['nombre_completo'], 'NOMBRE0 APELLIDO0')
+
+    def test_expand_precarga_solo_relaciones_pedidas(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                '/api/trabajadores/', {'anio': 2025, 'expand': 'contratacion,seguridad_social'}
+            )
+
+        datos = response.data['results'][0]
+        self.assertEqual(datos['contratacion']['cargo'], 'OPERARIO')
+        self.assertEqual(datos['seguridad_social']['arl'], 'POSITIVA')
+        self.assertNotIn('ingreso', datos)
+        self.assertNotIn('proyecto', datos)
+        self.assertIn('primer_nombre', datos)
+
+    def test_relacion_en_fields_se_expande(self):
+        response = self.client.get('/api/trabajadores/', {'anio': 2025, 'fields': 'id,proyecto'})
+
+        self.assertEqual(set(response.data['results'][0]), {'id', 'proyecto'})
+        self.assertTrue(response.data['results'][0]['proyecto']['administrativo'])
+
+    def test_detalle_sin_relaciones_por_defecto_y_con_expand(self):
+        trabajador = Trabajador.objects.get(numero='10000001')
+
+        response = self.client.get(f'/api/trabajadores/{trabajador.id}/')
+        self.assertNotIn('contratacion', response.data)
+        self.assertEqual(response.data['numero'], '10000001')
+
+        response = self.client.get(f'/api/trabajadores/{trabajador.id}/', {'expand': 'retiro'})
+        self.assertIn('retiro', response.data)
+        self.assertNotIn('contratacion', response.data)
+
+    def test_campo_desconocido(self):
+        response = self.client.get('/api/trabajadores/', {'fields': 'id,salario'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class BusquedaTests(TestCase):
+    """Pruebas de la búsqueda de trabajadores (/api/trabajadores/buscar/)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        for indice in range(3):
+            crear_trabajador(indice)
+        Trabajador.objects.filter(numero='10000001').update(
+            primer_nombre='ANDRÉS', primer_apellido='MUÑOZ', segundo_apellido='ORDOÑEZ'
+        )
+
+    def test_busqueda_ignora_acentos_y_mayusculas(self):
+        for texto in ('andres muñoz', 'ANDRES MUNOZ', 'Ordóñez'):
+            response = self.client.get('/api/trabajadores/buscar/', {'q': texto})
+            self.assertEqual([t['numero'] for t in response.data], ['10000001'], texto)
+
+    def test_busqueda_por_prefijo_y_documento(self):
+        response = self.client.get('/api/trabajadores/buscar/', {'q': 'andr mu'})
+        self.assertEqual(len(response.data), 1)
+
+        response = self.client.get('/api/trabajadores/buscar/', {'q': '1000000'})
+        self.assertEqual(len(response.data), 3)
+
+        response = self.client.get('/api/trabajadores/buscar/', {'q': 'apellido9'})
+        self.assertEqual(response.data, [])
+
+    def test_busqueda_sin_relaciones_por_defecto_y_con_limite(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/trabajadores/buscar/', {'q': 'nombre', 'limite': 1})
+
+        self.assertEqual(len(response.data), 1)
+        self.assertNotIn('contratacion', response.data[0])
+
+        response = self.client.get('/api/trabajadores/buscar/', {'q': 'andres', 'expand': 'contratacion'})
+        self.assertEqual(response.data[0]['contratacion']['cargo'], 'OPERARIO')
+
+    def test_busqueda_requiere_texto(self):
+        response = self.client.get('/api/trabajadores/buscar/', {'q': '  '})
+
+        self.assertEqual(response.status_code, 400)
+
+
+def documento_trabajador(meses=(1,), **datos):
+    """Documento completo de un trabajador-año para /api/trabajadores/documento/"""
+    documento = {
+        'tipo': 'CC',
+        'numero': '30000001',
+        'fecha_expedicion_cedula': '2000-01-01',
+        'fecha_nacimiento': '1982-01-01',
+        'primer_apellido': 'ORDOÑEZ',
+        'primer_nombre': 'ANDRÉS',
+        'anio': 2025,
+        'contratacion': {
+            'tipo_contrato': 'TERMINO_FIJO',
+            'cargo': 'OPERARIO',
+            'salario_contratado': '1423500.00',
+            'municipio_base': 'PASTO',
+            'fecha_inicio_contrato': '2025-01-01',
+        },
+        'ingreso': {'fecha_ingreso': '2025-01-01'},
+        'retiro': {'fecha_retiro': '2025-12-31'},
+        'seguridad_social': {'eps': 'NUEVA EPS', 'arl': 'POSITIVA'},
+        'proyecto': {'administrativo': True},
+        'cronogramas': [
+            {
+                'mes': f'2025-{mes:02d}-01',
+                'municipio_ejecucion': 'PASTO',
+                'salario_cotizacion': '1423500.00',
+                'dias_laborados': 30,
+                'sueldo_devengado': '1423500.00',
+            }
+            for mes in meses
+        ],
+    }
+    documento.update(datos)
+    return documento
+
+
+class DocumentoUnicoTests(TestCase):
+    """El documento (tipo, numero) es único por año también en la API básica"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def datos(self, **cambios):
+        return {
+            'tipo': 'CC', 'numero': '123456', 'anio': 2025,
+            'fecha_expedicion_cedula': '2000-01-01', 'fecha_nacimiento': '1982-01-01',
+            'primer_apellido': 'PEREZ', 'primer_nombre': 'ANA', **cambios,
+        }
+
+    def test_post_duplicado_responde_400(self):
+        self.assertEqual(self.client.post('/api/trabajadores/', self.datos(), format='json').status_code, 201)
+
+        response = self.client.post('/api/trabajadores/', self.datos(), format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data)
+        # El mismo documento en otro año sí se acepta
+        otro_anio = self.client.post('/api/trabajadores/', self.datos(anio=2024), format='json')
+        self.assertEqual(otro_anio.status_code, 201)
+        self.assertEqual(Trabajador.objects.count(), 2)
+
+    def test_patch_que_choca_con_otro_documento_responde_400(self):
+        self.client.post('/api/trabajadores/', self.datos(), format='json')
+        otro = self.client.post('/api/trabajadores/', self.datos(numero='999'), format='json').data
+
+        response = self.client.patch(f"/api/trabajadores/{otro['id']}/", {'numero': '123456'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Trabajador.objects.get(id=otro['id']).numero, '999')
+        # Cambiar otros campos del mismo trabajador no choca consigo mismo
+        response = self.client.patch(f"/api/trabajadores/{otro['id']}/", {'primer_nombre': 'LUIS'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class DeduplicarTrabajadoresTests(TestCase):
+    """Fusión de documentos repetidos en un año (comando deduplicar_trabajadores y migración 0006)"""
+
+    def setUp(self):
+        # Bases anteriores a la migración 0007: sin la restricción única
+        restriccion = next(c for c in Trabajador._meta.constraints if c.name == 'trabajador_documento_anio_unico')
+        with connection.schema_editor() as editor:
+            editor.remove_constraint(Trabajador, restriccion)
+
+        self.viejo = crear_trabajador(1)
+        self.nuevo = Trabajador.objects.create(
+            tipo='CC', numero=self.viejo.numero, anio=2025,
+            fecha_expedicion_cedula=date(2000, 1, 1), fecha_nacimiento=date(1982, 1, 1),
+            primer_apellido='APELLIDO1', primer_nombre='NOMBRE1',
+        )
+        Contratacion.objects.create(
+            trabajador=self.nuevo, anio=2025, tipo_contrato='TERMINO_FIJO', cargo='GERENTE',
+            salario_contratado=2000000, municipio_base='PASTO', fecha_inicio_contrato=date(2025, 2, 1),
+        )
+        Cronograma.objects.create(
+            trabajador=self.nuevo, mes=date(2025, 2, 1), municipio_ejecucion='PASTO',
+            salario_cotizacion=2000000, dias_laborados=30, sueldo_devengado=2000000,
+        )
+
+    def test_sin_aplicar_solo_reporta(self):
+        salida = StringIO()
+        with tempfile.TemporaryDirectory() as directorio:
+            reporte = os.path.join(directorio, 'duplicados.csv')
+            call_command('deduplicar_trabajadores', reporte=reporte, stdout=salida)
+            with open(reporte, encoding='utf-8') as archivo:
+                lineas = archivo.read().splitlines()
+
+        self.assertEqual(Trabajador.objects.count(), 2)
+        self.assertEqual(Contratacion.objects.count(), 2)
+        self.assertIn('use --aplicar', salida.getvalue())
+        self.assertEqual(lineas, [
+            'tipo,numero,anio,id_conservado,id_eliminado,filas_movidas,filas_descartadas',
+            f'CC,{self.viejo.numero},2025,{self.nuevo.id},{self.viejo.id},5,1',
+        ])
+
+    def test_aplicar_mueve_las_relaciones_al_mas_reciente(self):
+        call_command('deduplicar_trabajadores', aplicar=True, stdout=StringIO())
+
+        self.assertEqual(list(Trabajador.objects.values_list('id', flat=True)), [self.nuevo.id])
+        # La contratación del año ya existía en el conservado: se descarta la del eliminado
+        self.assertEqual(list(Contratacion.objects.values_list('trabajador_id', 'cargo')), [(self.nuevo.id, 'GERENTE')])
+        for modelo in (Ingreso, Retiro, SeguridadSocial, Proyecto):
+            self.assertEqual(list(modelo.objects.values_list('trabajador_id', flat=True)), [self.nuevo.id])
+        self.assertEqual(
+            list(Cronograma.objects.order_by('mes').values_list('trabajador_id', 'mes')),
+            [(self.nuevo.id, date(2025, 1, 1)), (self.nuevo.id, date(2025, 2, 1))],
+        )
+        snapshot = TrabajadorAnioSnapshot.objects.get()
+        self.assertEqual(snapshot.trabajador_id, self.nuevo.id)
+        self.assertTrue(snapshot.tiene_ingreso)
+        self.assertEqual(snapshot.cargo, 'GERENTE')
+
+        # Sin repetidos la migración 0006 continúa
+        verificar_duplicados(apps, None)
+
+    def test_migracion_se_detiene_con_repetidos(self):
+        with self.assertRaisesMessage(RuntimeError, 'deduplicar_trabajadores'):
+            verificar_duplicados(apps, None)
+
+        self.assertEqual(Trabajador.objects.count(), 2)
+
+
+class DocumentoTrabajadorTests(TestCase):
+    """Pruebas del documento completo del trabajador (/api/trabajadores/documento/)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def test_crear_documento_guarda_todas_las_tablas(self):
+        response = self.client.post('/api/trabajadores/documento/', documento_trabajador(meses=[1, 2]), format='json')
+
+        self.assertEqual(response.status_code, 201)
+        trabajador = Trabajador.objects.get(numero='30000001')
+        for model in (Contratacion, Ingreso, Retiro, SeguridadSocial, Proyecto):
+            self.assertEqual(model.objects.get(trabajador=trabajador).anio, 2025)
+        self.assertEqual(Cronograma.objects.filter(trabajador=trabajador, anio=2025).count(), 2)
+        self.assertEqual(response.data['contratacion']['cargo'], 'OPERARIO')
+        self.assertEqual(response.data['nombre_completo'], 'ANDRÉS ORDOÑEZ')
+        self.assertEqual([c['mes'] for c in response.data['cronogramas']], ['2025-01-01', '2025-02-01'])
+
+    def test_crear_documento_usa_consultas_constantes(self):
+        # Unicidad del documento + trabajador + snapshot inicial + 5 tablas anuales + cronograma
+        # + snapshot + savepoint
+        for numero, meses in (('30000001', [1]), ('30000002', range(1, 13))):
+            with self.assertNumQueries(12):
+                response = self.client.post(
+                    '/api/trabajadores/documento/', documento_trabajador(meses=meses, numero=numero), format='json'
+                )
+            self.assertEqual(response.status_code, 201)
+
+    def test_documento_invalido_no_guarda_nada(self):
+        documento = documento_trabajador(meses=[1, 1])
+        documento['seguridad_social']['arl'] = 'NO EXISTE'
+
+        response = self.client.post('/api/trabajadores/documento/', documento, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('seguridad_social', response.data)
+        self.assertFalse(Trabajador.objects.exists())
+
+        response = self.client.post('/api/trabajadores/documento/', documento_trabajador(meses=[1, 1]), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cronogramas', response.data)
+
+    def test_documento_repetido(self):
+        self.client.post('/api/trabajadores/documento/', documento_trabajador(), format='json')
+
+        response = self.client.post('/api/trabajadores/documento/', documento_trabajador(), format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Trabajador.objects.count(), 1)
+
+    def test_reemplazar_documento(self):
+        creado = self.client.post('/api/trabajadores/documento/', documento_trabajador(meses=[1, 2, 3]), format='json')
+        url = f"/api/trabajadores/{creado.data['id']}/documento/"
+        documento = documento_trabajador(meses=[3, 4], retiro=None)
+        documento['contratacion']['cargo'] = 'SUPERVISOR'
+
+        response = self.client.put(url, documento, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        trabajador = Trabajador.objects.get(id=creado.data['id'])
+        self.assertEqual(trabajador.contrataciones.get().cargo, 'SUPERVISOR')
+        self.assertEqual(trabajador.contrataciones.get().id, creado.data['contratacion']['id'])
+        self.assertFalse(trabajador.retiros.exists())
+        self.assertEqual(
+            list(trabajador.cronogramas.order_by('mes').values_list('mes', flat=True)),
+            [date(2025, 3, 1), date(2025, 4, 1)]
+        )
+        self.assertIsNone(response.data['retiro'])
+        self.assertEqual(self.client.get(url).data, response.data)
+
+
+class RelacionesTrabajadorTests(TestCase):
+    """Acciones por trabajador de las tablas anuales (/api/trabajadores/<id>/contratacion/, ...)"""
+
+    # (ruta, modelo, datos de creación, campo y valor que cambia el PUT)
+    RELACIONES = [
+        ('contratacion', Contratacion, {
+            'tipo_contrato': 'TERMINO_FIJO', 'cargo': 'OPERARIO', 'salario_contratado': '1423500.00',
+            'municipio_base': 'PASTO', 'fecha_inicio_contrato': '2025-01-01',
+        }, 'cargo', 'GERENTE'),
+        ('ingreso', Ingreso, {'fecha_ingreso': '2025-01-01'}, 'fecha_ingreso', '2025-02-01'),
+        ('retiro', Retiro, {'fecha_retiro': '2025-06-30'}, 'fecha_retiro', '2025-07-31'),
+        ('seguridad-social', SeguridadSocial, {'eps': 'NUEVA EPS', 'arl': 'POSITIVA'}, 'eps', 'SANITAS'),
+        ('proyectos', Proyecto, {'administrativo': True}, 'servicios', True),
+    ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def test_get_post_put_delete_en_el_anio_del_trabajador(self):
+        for indice, (ruta, modelo, datos, campo, valor) in enumerate(self.RELACIONES):
+            with self.subTest(ruta):
+                trabajador = Trabajador.objects.create(
+                    tipo='CC', numero=f'40{indice:06d}', anio=2025,
+                    fecha_expedicion_cedula=date(2000, 1, 1), fecha_nacimiento=date(1982, 1, 1),
+                    primer_apellido='PEREZ', primer_nombre='ANA',
+                )
+                # Registro de otro año: no es el del trabajador
+                anterior = modelo.objects.create(trabajador=trabajador, anio=2024, **datos)
+                anterior.refresh_from_db()
+                url = f'/api/trabajadores/{trabajador.id}/{ruta}/'
+
+                self.assertEqual(self.client.get(url).status_code, 404)
+                self.assertEqual(self.client.put(url, datos, format='json').status_code, 404)
+
+                response = self.client.post(url, datos, format='json')
+                self.assertEqual(response.status_code, 201)
+                actual = modelo.objects.get(id=response.data['id'])
+                self.assertEqual(actual.anio, 2025)
+                self.assertEqual(self.client.post(url, datos, format='json').status_code, 400)
+
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['id'], actual.id)
+
+                response = self.client.put(url, {**datos, campo: valor}, format='json')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['id'], actual.id)
+                self.assertEqual(response.data[campo], valor)
+                anterior_despues = modelo.objects.get(id=anterior.id)
+                self.assertEqual(getattr(anterior_despues, campo), getattr(anterior, campo))
+
+                self.assertEqual(self.client.delete(url).status_code, 204)
+                self.assertEqual(list(modelo.objects.filter(trabajador=trabajador).values_list('anio', flat=True)), [2024])
+                self.assertEqual(self.client.delete(url).status_code, 404)
+
+
+class EstadisticasTests(TestCase):
+    """Pruebas del endpoint de estadísticas del tablero"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def test_estadisticas_agregan_por_anio_y_documento(self):
+        for indice in range(3):
+            crear_trabajador(indice, anio=2025)
+        # El mismo documento en 2024 cuenta una sola vez como empleado
+        crear_trabajador(0, anio=2024)
+        Contratacion.objects.filter(trabajador__numero='10000001').update(
+            tipo_contrato='OBRA_LABOR', fecha_final_contrato=date(2025, 1, 31)
+        )
+
+        response = self.client.get('/api/trabajadores/estadisticas/')
+
+        self.assertEqual(response.status_code, 200)
+        datos = response.data
+        self.assertEqual(datos['total_empleados'], 3)
+        self.assertEqual(datos['total_registros'], 4)
+        self.assertEqual(datos['por_anio'], [{'anio': 2024, 'total': 1}, {'anio': 2025, 'total': 3}])
+        self.assertEqual(datos['contratos'], {'total': 4, 'activos': 3})
+        self.assertEqual(
+            [(fila['tipo_contrato'], fila['total']) for fila in datos['por_tipo_contrato']],
+            [('TERMINO_FIJO', 3), ('OBRA_LABOR', 1)]
+        )
+        self.assertEqual(datos['por_municipio_base'][0]['nombre'], 'Pasto')
+        self.assertEqual(datos['por_arl'][0]['total'], 4)
+        self.assertEqual(datos['por_proyecto']['administrativo'], 4)
+        self.assertEqual(datos['por_proyecto']['servicios'], 0)
+        self.assertEqual(len(datos['actividad_reciente']), 3)
+        self.assertEqual(datos['actividad_reciente'][0]['anio'], 2024)
+
+    def test_estadisticas_filtradas_por_anio(self):
+        crear_trabajador(1, anio=2025)
+        crear_trabajador(2, anio=2024)
+
+        response = self.client.get('/api/trabajadores/estadisticas/', {'anio': 2024})
+
+        self.assertEqual(response.data['total_registros'], 1)
+        self.assertEqual(response.data['actividad_reciente'][0]['nombre_completo'], 'NOMBRE2 APELLIDO2')
+
+    def test_estadisticas_usan_cache(self):
+        for indice in range(5):
+            crear_trabajador(indice)
+
+        # Consultas agregadas fijas, sin importar cuántos trabajadores haya
+        with self.assertNumQueries(8):
+            self.client.get('/api/trabajadores/estadisticas/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/trabajadores/estadisticas/')
+        self.assertEqual(response.data['total_empleados'], 5)
+
+    def test_anio_invalido(self):
+        response = self.client.get('/api/trabajadores/estadisticas/', {'anio': 'dos mil'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportacionNovedadesTests(TestCase):
+    """Pruebas del motor de exportación NOVEDADES"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        ajustes = override_settings(EXPORTACION_CACHE_DIR=self.cache_dir)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_filas_usan_numero_constante_de_consultas(self):
+        # Trabajadores unidos a su snapshot
+        for cantidad in (2, 8):
+            for indice in range(Trabajador.objects.count(), cantidad):
+                crear_trabajador(indice)
+            trabajadores = Trabajador.objects.filter(anio=2025).order_by('id')
+            with self.assertNumQueries(1):
+                filas = list(filas_novedades(trabajadores))
+            self.assertEqual(len(filas), cantidad)
+
+    def test_comando_exporta_los_trabajadores_del_anio(self):
+        crear_trabajador(1)
+        # Trabajador registrado en 2024 con una contratación de 2025
+        otro_anio = crear_trabajador(2, anio=2024)
+        Contratacion.objects.create(
+            trabajador=otro_anio, anio=2025, tipo_contrato='TERMINO_FIJO', cargo='GERENTE',
+            salario_contratado=2000000, municipio_base='PASTO', fecha_inicio_contrato=date(2025, 1, 1),
+        )
+        path = os.path.join(self.cache_dir, 'novedades.xlsx')
+        salida = StringIO()
+
+        call_command('exportar_excel', output=path, anio=2025, sheet='EXPORTADA 2025', stdout=salida)
+
+        ws = load_workbook(path)['EXPORTADA 2025']
+        self.assertEqual([fila[2] for fila in ws.iter_rows(min_row=5, values_only=True)], ['10000001'])
+        self.assertIn('1 contrataciones de 2025 son de trabajadores registrados en otro año', salida.getvalue())
+
+    def test_fila_ubica_cada_bloque_en_su_columna(self):
+        crear_trabajador(1)
+
+        fila = next(filas_novedades(Trabajador.objects.all()))
+
+        self.assertEqual(fila[0], 1)
+        self.assertEqual(fila[2], '10000001')
+        self.assertEqual(fila[9], 'Término Fijo')
+        self.assertEqual(fila[11], 1423500.0)
+        self.assertEqual(fila[29], 'POSITIVA')
+        self.assertEqual(fila[32], 'X')
+        self.assertEqual(fila[COL_CRONOGRAMA - 1:COL_CRONOGRAMA + 3], ['PASTO', 1423500.0, 30, 1423500.0])
+        # Febrero sin cronograma: celdas vacías
+        self.assertIsNone(fila[COL_CRONOGRAMA + 3])
+
+    def test_endpoint_exporta_hojas_por_anio(self):
+        crear_trabajador(1, anio=2024)
+        crear_trabajador(2, anio=2025)
+        crear_trabajador(3, anio=2025)
+
+        response = self.client.get('/api/trabajadores/exportar-excel/')
+
+        self.assertEqual(response.status_code, 200)
+        wb = load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(wb.sheetnames, ['NOVEDADES 2024', 'NOVEDADES 2025'])
+        self.assertEqual(wb['NOVEDADES 2024'].cell(row=3, column=3).value, '10000001')
+        self.assertEqual(wb['NOVEDADES 2025'].cell(row=4, column=3).value, '10000003')
+        self.assertEqual(wb['NOVEDADES 2025'].cell(row=4, column=COL_CRONOGRAMA).value, 'PASTO')
+        # Encabezados de la plantilla en las filas 1-2
+        ws = wb['NOVEDADES 2025']
+        self.assertEqual(ws.cell(row=1, column=2).value, 'IDENTIFICACIÓN')
+        self.assertEqual(ws.cell(row=2, column=10).value, 'TIPO DE CONTRATO')
+        self.assertEqual(ws.freeze_panes, 'J3')
+        self.assertTrue(ws.merged_cells.ranges)
+
+    def test_endpoint_reutiliza_el_libro_mientras_no_cambien_los_datos(self):
+        crear_trabajador(1)
+        primera = self.client.get('/api/trabajadores/exportar-excel/')
+        contenido = b''.join(primera.streaming_content)
+
+        # Solo la marca de agua: una consulta por tabla, sin regenerar el libro
+        with self.assertNumQueries(7):
+            segunda = self.client.get('/api/trabajadores/exportar-excel/')
+        self.assertEqual(segunda['ETag'], primera['ETag'])
+        self.assertEqual(b''.join(segunda.streaming_content), contenido)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        cronograma = Cronograma.objects.get(anio=2025)
+        cronograma.dias_laborados = 10
+        cronograma.save()
+        tercera = self.client.get('/api/trabajadores/exportar-excel/')
+        self.assertNotEqual(tercera['ETag'], primera['ETag'])
+        wb = load_workbook(BytesIO(b''.join(tercera.streaming_content)))
+        self.assertEqual(wb['NOVEDADES 2025'].cell(row=3, column=COL_CRONOGRAMA + 2).value, 10)
+
+    def test_endpoint_responde_304_con_if_none_match(self):
+        crear_trabajador(1)
+        etag = self.client.get('/api/trabajadores/exportar-excel/')['ETag']
+
+        response = self.client.get('/api/trabajadores/exportar-excel/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Trabajador.objects.get().delete()
+        response = self.client.get('/api/trabajadores/exportar-excel/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_purgar_cache_elimina_los_menos_usados(self):
+        for indice, nombre in enumerate(['viejo', 'medio', 'nuevo']):
+            ruta = os.path.join(self.cache_dir, f'{nombre}.xlsx')
+            with open(ruta, 'wb') as archivo:
+                archivo.write(b'x' * 100)
+            os.utime(ruta, (1000 + indice, 1000 + indice))
+
+        self.assertEqual(purgar_cache(self.cache_dir, 250), 1)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ['medio.xlsx', 'nuevo.xlsx'])
+
+    def test_filas_por_lotes_mantienen_numeracion(self):
+        for indice in range(5):
+            crear_trabajador(indice)
+        trabajadores = Trabajador.objects.filter(anio=2025).order_by('id')
+
+        # Un solo cursor para todos los lotes
+        with self.assertNumQueries(1):
+            filas = list(filas_novedades(trabajadores, tamano_lote=2))
+
+        self.assertEqual([fila[0] for fila in filas], [1, 2, 3, 4, 5])
+        self.assertTrue(all(fila[COL_CRONOGRAMA - 1] == 'PASTO' for fila in filas))
+
+
+class FormatoNovedadesTests(TestCase):
+    """Pruebas del esquema NOVEDADES compartido por la importación y las exportaciones"""
+
+    def test_fila_exportada_se_decodifica_con_los_mismos_datos(self):
+        crear_trabajador(1)
+        trabajador = Trabajador.objects.select_related('snapshot').get()
+
+        fila = codificar_fila(trabajador, trabajador.snapshot, 1)
+        datos = decodificar_fila(tuple(fila), 2025)
+
+        self.assertEqual(len(fila), 85)
+        self.assertEqual(datos['trabajador']['numero'], '10000001')
+        self.assertEqual(datos['trabajador']['fecha_nacimiento'], date(1982, 1, 1))
+        self.assertEqual(datos['contratacion']['tipo_contrato'], 'TERMINO_FIJO')
+        self.assertEqual(datos['contratacion']['salario_contratado'], 1423500.0)
+        self.assertEqual(datos['seguridad_social']['arl'], 'POSITIVA')
+        self.assertTrue(datos['proyecto']['administrativo'])
+        self.assertFalse(datos['proyecto']['servicios'])
+        self.assertEqual(datos['cronogramas'][date(2025, 1, 1)], {
+            'municipio_ejecucion': 'PASTO', 'salario_cotizacion': 1423500.0,
+            'dias_laborados': 30, 'sueldo_devengado': 1423500.0,
+        })
+        self.assertEqual(datos['cronogramas'][date(2025, 2, 1)]['municipio_ejecucion'], '')
+
+    def test_textos_vacios_se_exportan_sin_celda(self):
+        trabajador = crear_trabajador(1)
+        Contratacion.objects.filter(trabajador=trabajador).update(cargo='', municipio_base='')
+        reconstruir_snapshots()
+        trabajador = Trabajador.objects.select_related('snapshot').get()
+
+        fila = codificar_fila(trabajador, trabajador.snapshot, 1)
+
+        # segundo_apellido, segundo_nombre, cargo y municipio_base
+        self.assertEqual([fila[6], fila[8], fila[10], fila[12]], [None] * 4)
+        # Las marcas de proyecto vacías siguen siendo ''
+        self.assertEqual(fila[33], '')
+
+    def test_fila_corta_y_valores_vacios(self):
+        fila = fila_novedades(1)[:41]
+        fila[12] = None
+        fila[37] = 'n/a'
+
+        datos = decodificar_fila(tuple(fila), 2024)
+
+        self.assertEqual(datos['contratacion']['municipio_base'], '')
+        self.assertEqual(datos['cronogramas'][date(2024, 1, 1)]['municipio_ejecucion'], '')
+        self.assertEqual(datos['cronogramas'][date(2024, 12, 1)]['dias_laborados'], 0)
+        self.assertIsNone(datos['retiro']['valor_liquidacion'])
+        self.assertEqual(len(datos['cronogramas']), 12)
+
+
+class ImportacionExcelTests(TestCase):
+    """Pruebas del comando importar_excel"""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        self.path = os.path.join(directorio, 'novedades.xlsx')
+        crear_libro_novedades(self.path, [fila_novedades(indice) for indice in range(1, 6)])
+
+    def importar(self, **opciones):
+        call_command('importar_excel', file=self.path, anio=2025, stdout=StringIO(), **opciones)
+
+    def test_importacion_por_lotes_guarda_todas_las_tablas(self):
+        self.importar(batch_size=2)
+
+        self.assertEqual(Trabajador.objects.count(), 5)
+        self.assertEqual(Contratacion.objects.filter(anio=2025).count(), 5)
+        self.assertEqual(SeguridadSocial.objects.filter(anio=2025, arl='POSITIVA').count(), 5)
+        self.assertEqual(Proyecto.objects.filter(anio=2025, administrativo=True).count(), 5)
+        self.assertEqual(Cronograma.objects.filter(anio=2025).count(), 5 * 12)
+
+        diciembre = Cronograma.objects.get(trabajador__numero='20000001', mes=date(2025, 12, 1))
+        self.assertEqual(diciembre.municipio_ejecucion, 'IPIALES')
+        self.assertEqual(diciembre.salario_cotizacion, Decimal('1500000.50'))
+        self.assertEqual(diciembre.anio, 2025)
+        contratacion = Contratacion.objects.get(trabajador__numero='20000001')
+        self.assertEqual(contratacion.municipio_base, 'PASTO')
+        self.assertEqual(contratacion.tipo_contrato, 'PRESTACION_SERVICIOS')
+
+    def test_importacion_por_lotes_usa_consultas_por_lote(self):
+        # Lectura de huellas + 5 filas en lotes de 2 = 3 lotes; cada lote: savepoint + 7 inserts
+        # + snapshot (6 lecturas y un upsert) + liberación
+        with self.assertNumQueries(1 + 3 * 16):
+            self.importar(batch_size=2)
+
+    def test_importacion_por_lotes_equivale_a_fila_por_fila(self):
+        campos = ['trabajador__numero', 'mes', 'municipio_ejecucion', 'salario_cotizacion', 'dias_laborados']
+
+        self.importar()
+        fila_por_fila = list(Cronograma.objects.order_by('trabajador__numero', 'mes').values_list(*campos))
+        Trabajador.objects.all().delete()
+        self.importar(batch_size=3)
+        por_lotes = list(Cronograma.objects.order_by('trabajador__numero', 'mes').values_list(*campos))
+
+        self.assertEqual(fila_por_fila, por_lotes)
+
+    def test_reimportar_no_duplica_trabajadores(self):
+        for opciones in ({}, {'batch_size': 2}):
+            self.importar(**opciones)
+            self.importar(**opciones)
+
+            self.assertEqual(Trabajador.objects.count(), 5)
+            self.assertEqual(Contratacion.objects.count(), 5)
+            self.assertEqual(Cronograma.objects.count(), 5 * 12)
+            self.assertEqual(set(Trabajador.objects.values_list('anio', flat=True)), {2025})
+
+    def test_reimportar_omite_filas_sin_cambios(self):
+        self.importar(batch_size=2)
+
+        # Solo se leen las huellas existentes del año
+        with self.assertNumQueries(1):
+            self.importar(batch_size=2)
+
+    def test_reimportar_actualiza_filas_modificadas(self):
+        self.importar(batch_size=2)
+        filas = [fila_novedades(indice) for indice in range(1, 6)]
+        filas[0][10] = 'CONTADOR'
+        filas[1][37:41] = ['IPIALES', 1500000, 20, 1000000]
+        crear_libro_novedades(self.path, filas)
+
+        salida = StringIO()
+        call_command('importar_excel', file=self.path, anio=2025, batch_size=2, stdout=salida)
+
+        self.assertIn('Trabajadores actualizados: 2', salida.getvalue())
+        self.assertIn('Trabajadores sin cambios: 3', salida.getvalue())
+        self.assertEqual(Trabajador.objects.count(), 5)
+        self.assertEqual(Contratacion.objects.get(trabajador__numero='20000001').cargo, 'CONTADOR')
+        enero = Cronograma.objects.get(trabajador__numero='20000002', mes=date(2025, 1, 1))
+        self.assertEqual(enero.municipio_ejecucion, 'IPIALES')
+        self.assertEqual(enero.dias_laborados, 20)
+
+    def test_documento_repetido_en_la_hoja_prevalece_la_ultima_fila(self):
+        filas = [fila_novedades(1), fila_novedades(1)]
+        filas[1][10] = 'CONTADOR'
+        crear_libro_novedades(self.path, filas)
+
+        self.importar(batch_size=10)
+
+        self.assertEqual(Trabajador.objects.count(), 1)
+        self.assertEqual(Contratacion.objects.get().cargo, 'CONTADOR')
+
+    def test_hojas_novedades_por_anio(self):
+        hojas = hojas_novedades(['RESUMEN', 'NOVEDADES 24', 'NOVEDADES 2024 (2)', 'novedades 2025', 'NOVEDADES 2025 copia'])
+
+        self.assertEqual(hojas, {2024: 'NOVEDADES 2024 (2)', 2025: 'novedades 2025'})
+
+    def test_todas_las_hojas_importa_cada_anio_en_su_transaccion(self):
+        crear_libro_hojas(self.path, {
+            'RESUMEN': [],
+            'NOVEDADES 24': [fila_novedades(indice, 2024) for indice in range(1, 4)],
+            'NOVEDADES 2025': [fila_novedades(indice) for indice in range(1, 6)],
+        })
+        comando = ImportarExcel(stdout=StringIO())
+
+        call_command(comando, file=self.path, all_sheets=True, procesos=1, batch_size=2)
+
+        self.assertIsNone(comando.error)
+        self.assertEqual(set(comando.resumenes), {2024, 2025})
+        self.assertEqual(comando.resumen['creados'], 8)
+        self.assertEqual(Trabajador.objects.filter(anio=2024).count(), 3)
+        self.assertEqual(Cronograma.objects.filter(anio=2024).count(), 3 * 12)
+        self.assertEqual(TrabajadorAnioSnapshot.objects.filter(anio=2025).count(), 5)
+
+    def test_todas_las_hojas_hoja_ilegible_no_afecta_los_demas_anios(self):
+        crear_libro_novedades(self.path, [fila_novedades(indice) for indice in range(1, 3)])
+        libro = load_workbook(self.path)
+        libro.create_sheet('NOVEDADES 2024').append(['SIN DATOS'])
+        libro.save(self.path)
+        comando = ImportarExcel(stdout=StringIO())
+
+        call_command(comando, file=self.path, all_sheets=True, procesos=1)
+
+        self.assertIn('NOVEDADES 2024', comando.error)
+        self.assertEqual(list(comando.resumenes), [2025])
+        self.assertFalse(Trabajador.objects.filter(anio=2024).exists())
+        self.assertEqual(Trabajador.objects.filter(anio=2025).count(), 2)
+
+
+class ConversionesTests(TestCase):
+    """Pruebas de la conversión memorizada de textos de celda"""
+
+    def test_fechas_equivalen_a_strptime(self):
+        textos = [
+            '2024-05-01', '2024-5-1', '01/05/2024', '1/5/2024', '31-12-2024', '2024/06/30',
+            '2024-02-30', '2024-05- 5', '2024-05/01', '24-05-01', '0000-01-01', 'PENDIENTE', '',
+        ]
+        for texto in textos:
+            esperado = None
+            for fmt in FORMATOS_FECHA:
+                try:
+                    esperado = datetime.strptime(texto, fmt).date()
+                    break
+                except ValueError:
+                    continue
+            self.assertEqual(convertir_fecha(texto), esperado, texto)
+
+    def test_montos_y_enteros(self):
+        self.assertEqual(convertir_decimal('2850000'), 2850000.0)
+        self.assertEqual(convertir_decimal('1.500.000,50'), 1500000.5)
+        self.assertEqual(convertir_decimal('$ 1500,5'), 1500.5)
+        self.assertEqual(convertir_decimal('1423500.75'), 1423500.75)
+        self.assertIsNone(convertir_decimal('1.500.000'))
+        self.assertIsNone(convertir_decimal('SIN DATO'))
+        self.assertEqual(convertir_entero('30.0'), 30)
+        self.assertIsNone(convertir_entero('treinta'))
+
+    def test_valores_repetidos_salen_de_la_cache(self):
+        convertir_fecha.cache_clear()
+        for _ in range(3):
+            convertir_fecha('15/03/2025')
+
+        self.assertEqual(convertir_fecha.cache_info().hits, 2)
+        self.assertEqual(convertir_fecha.cache_info().misses, 1)
+
+
+class ImportacionParalelaTests(TransactionTestCase):
+    """importar_excel --all-sheets con un proceso por año (cada proceso usa su propia conexión)"""
+
+    def test_procesos_importan_lo_mismo_que_la_importacion_por_anio(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        path = os.path.join(directorio, 'sintetico.xlsx')
+        call_command('generar_datos', trabajadores=4, anios='2023-2025', excel=path, solo_excel=True, stdout=StringIO())
+        for anio in (2023, 2024, 2025):
+            call_command('importar_excel', file=path, anio=anio, batch_size=3, stdout=StringIO())
+        esperado = sorted(Cronograma.objects.values_list('trabajador__numero', 'mes', 'municipio_ejecucion', 'dias_laborados'))
+        Trabajador.objects.all().delete()
+        comando = ImportarExcel(stdout=StringIO())
+
+        call_command(comando, file=path, all_sheets=True, procesos=3, batch_size=3)
+
+        self.assertIsNone(comando.error)
+        self.assertEqual(comando.resumen['creados'], 12)
+        self.assertEqual(
+            sorted(Cronograma.objects.values_list('trabajador__numero', 'mes', 'municipio_ejecucion', 'dias_laborados')),
+            esperado
+        )
+        self.assertEqual(TrabajadorAnioSnapshot.objects.count(), 12)
+
+
+class GenerarDatosTests(TestCase):
+    """Pruebas del comando generar_datos"""
+
+    def generar(self, **opciones):
+        call_command('generar_datos', stdout=StringIO(), **opciones)
+
+    def valores(self):
+        """Datos comparables de lo generado (solo columnas del formato NOVEDADES)"""
+        return {
+            'trabajadores': sorted(Trabajador.objects.values_list(
+                'numero', 'anio', 'primer_apellido', 'primer_nombre', 'fecha_nacimiento'
+            )),
+            'contrataciones': sorted(Contratacion.objects.values_list(
+                'trabajador__numero', 'anio', 'tipo_contrato', 'cargo', 'salario_contratado', 'municipio_base'
+            )),
+            'seguridad_social': sorted(SeguridadSocial.objects.values_list('trabajador__numero', 'anio', 'eps', 'arl')),
+            'proyectos': sorted(Proyecto.objects.values_list('trabajador__numero', 'anio', 'servicios')),
+            'cronogramas': sorted(Cronograma.objects.values_list(
+                'trabajador__numero', 'mes', 'municipio_ejecucion', 'dias_laborados', 'sueldo_devengado'
+            )),
+        }
+
+    def test_genera_todas_las_tablas_por_anio(self):
+        self.generar(trabajadores=3, anios='2024-2025', batch_size=2)
+
+        self.assertEqual(Trabajador.objects.count(), 6)
+        for model in (Contratacion, Ingreso, Retiro, SeguridadSocial, Proyecto):
+            self.assertEqual(model.objects.filter(anio=2025).count(), 3)
+        self.assertEqual(Cronograma.objects.filter(anio=2024).count(), 3 * 12)
+        self.assertTrue(all(numero.startswith('99') for numero in Trabajador.objects.values_list('numero', flat=True)))
+        # La misma persona en los dos años
+        nombres = Trabajador.objects.filter(numero='9900000001').values_list('primer_nombre', 'fecha_nacimiento')
+        self.assertEqual(len(set(nombres)), 1)
+
+    def test_misma_semilla_reescribe_los_mismos_registros(self):
+        self.generar(trabajadores=4, anios='2025')
+        antes = self.valores()
+
+        self.generar(trabajadores=4, anios='2025')
+
+        self.assertEqual(self.valores(), antes)
+        self.assertEqual(Trabajador.objects.count(), 4)
+
+    def test_libro_generado_se_importa_igual(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        path = os.path.join(directorio, 'sintetico.xlsx')
+
+        self.generar(trabajadores=5, anios='2024,2025')
+        esperado = self.valores()
+        Trabajador.objects.all().delete()
+
+        self.generar(trabajadores=5, anios='2024,2025', excel=path, solo_excel=True)
+        self.assertFalse(Trabajador.objects.exists())
+        self.assertEqual(load_workbook(path, read_only=True).sheetnames, ['NOVEDADES 2024', 'NOVEDADES 2025'])
+
+        for anio in (2024, 2025):
+            call_command('importar_excel', file=path, anio=anio, batch_size=2, stdout=StringIO())
+        self.assertEqual(self.valores(), esperado)
+
+    def test_anios_invalidos(self):
+        with self.assertRaises(CommandError):
+            self.generar(anios='2026-2023')
+        with self.assertRaises(CommandError):
+            self.generar(anios='dos mil')
+
+
+class BenchmarkTests(TestCase):
+    """Pruebas de los escenarios y la comparación del comando benchmark"""
+
+    def test_escenarios_se_miden_sobre_datos_sinteticos(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+
+        with override_settings(EXPORTACION_CACHE_DIR=os.path.join(directorio, 'cache')):
+            contexto = preparar_datos(3, directorio)
+            # exportar_cli carga la plantilla completa (varios segundos): se omite en las pruebas
+            resultados = {
+                nombre: medir(escenario, contexto, 1)
+                for nombre, escenario in ESCENARIOS.items() if nombre != 'exportar_cli'
+            }
+
+        self.assertEqual(Trabajador.objects.filter(anio=2025).count(), 3)
+        self.assertEqual(len(contexto.filas), 3)
+        # El parseo de filas no toca la base de datos
+        self.assertEqual(resultados['parsear_excel']['consultas'], 0)
+        for nombre, metricas in resultados.items():
+            if nombre != 'parsear_excel':
+                self.assertGreater(metricas['consultas'], 0, nombre)
+            self.assertGreater(metricas['segundos'], 0, nombre)
+            self.assertGreater(metricas['memoria_mb'], 0, nombre)
+
+    def test_comparar_resultados_detecta_regresiones(self):
+        baseline = {
+            'listado@100': {'segundos': 1.0, 'consultas': 7, 'memoria_mb': 10.0},
+            'detalle@100': {'segundos': 0.001, 'consultas': 2, 'memoria_mb': 0.1},
+        }
+        actuales = {
+            'listado@100': {'segundos': 1.5, 'consultas': 8, 'memoria_mb': 11.0},
+            # Variaciones pequeñas dentro del margen mínimo
+            'detalle@100': {'segundos': 0.005, 'consultas': 2, 'memoria_mb': 0.4},
+            'busqueda@100': {'segundos': 9.0, 'consultas': 99, 'memoria_mb': 99.0},
+        }
+
+        regresiones = comparar_resultados(actuales, baseline, umbral=0.25)
+
+        self.assertEqual(regresiones, ['listado@100: consultas 7 -> 8', 'listado@100: segundos 1.0 -> 1.5'])
+
+
+class SnapshotTrabajadorAnioTests(TestCase):
+    """Pruebas del snapshot trabajador-año y del listado resumido"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def snapshots(self):
+        """Columnas de todos los snapshots (sin la fecha de actualización)"""
+        return {
+            fila.pop('trabajador_id'): fila
+            for fila in TrabajadorAnioSnapshot.objects.values(
+                *[field.attname for field in TrabajadorAnioSnapshot._meta.concrete_fields
+                  if field.name != 'fecha_actualizacion']
+            )
+        }
+
+    def assertIgualAReconstruido(self):
+        """El snapshot mantenido por señales y rutas masivas es igual al reconstruido desde las tablas"""
+        incremental = self.snapshots()
+        reconstruir_snapshots()
+        self.assertEqual(incremental, self.snapshots())
+
+    def test_senales_mantienen_el_snapshot(self):
+        trabajador = crear_trabajador(1)
+        snapshot = TrabajadorAnioSnapshot.objects.get(trabajador=trabajador)
+        self.assertEqual((snapshot.anio, snapshot.cargo, snapshot.eps), (2025, 'OPERARIO', 'NUEVA EPS'))
+        self.assertEqual(snapshot.meses[0], ['PASTO', '1423500.00', 30, '1423500.00'])
+        self.assertEqual(snapshot.meses_con_cronograma, 1)
+
+        contratacion = trabajador.contrataciones.get()
+        contratacion.cargo = 'SUPERVISOR'
+        contratacion.save()
+        trabajador.retiros.get().delete()
+        Cronograma.objects.create(
+            trabajador=trabajador, mes=date(2025, 2, 1), municipio_ejecucion='IPIALES',
+            salario_cotizacion=1423500, dias_laborados=15, sueldo_devengado=711750,
+        )
+
+        snapshot.refresh_from_db()
+        self.assertEqual(snapshot.cargo, 'SUPERVISOR')
+        self.assertFalse(snapshot.tiene_retiro)
+        self.assertEqual(snapshot.meses[1][0], 'IPIALES')
+        self.assertEqual(snapshot.dias_laborados_total, 45)
+        self.assertEqual(snapshot.sueldo_devengado_total, Decimal('2135250'))
+        self.assertIgualAReconstruido()
+
+        trabajador.delete()
+        self.assertFalse(TrabajadorAnioSnapshot.objects.exists())
+
+    def test_reasignar_un_registro_actualiza_el_snapshot_que_deja(self):
+        trabajador, otro = crear_trabajador(1), crear_trabajador(2)
+        otro.contrataciones.get().delete()
+        contratacion = trabajador.contrataciones.get()
+
+        response = self.client.patch(f'/api/contrataciones/{contratacion.id}/', {'trabajador': otro.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertFalse(TrabajadorAnioSnapshot.objects.get(trabajador=trabajador).tiene_contratacion)
+        self.assertEqual(TrabajadorAnioSnapshot.objects.get(trabajador=otro).cargo, 'OPERARIO')
+        self.assertIgualAReconstruido()
+
+    def test_cambiar_de_anio_un_registro_actualiza_el_snapshot_que_deja(self):
+        trabajador = crear_trabajador(1)
+        ingreso = trabajador.ingresos.get()
+        ingreso.anio = 2024
+        ingreso.save()
+        cronograma = trabajador.cronogramas.get()
+
+        response = self.client.patch(
+            f'/api/trabajadores/{trabajador.id}/cronograma/{cronograma.id}/', {'mes': '2024-01-01'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        snapshot = TrabajadorAnioSnapshot.objects.get(trabajador=trabajador)
+        self.assertFalse(snapshot.tiene_ingreso)
+        self.assertEqual((snapshot.meses_con_cronograma, snapshot.dias_laborados_total), (0, 0))
+        self.assertIgualAReconstruido()
+
+    def test_rutas_masivas_guardan_el_snapshot(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        path = os.path.join(directorio, 'novedades.xlsx')
+        crear_libro_novedades(path, [fila_novedades(indice) for indice in range(1, 4)])
+
+        call_command('importar_excel', file=path, anio=2025, batch_size=2, stdout=StringIO())
+        response = self.client.post('/api/trabajadores/documento/', documento_trabajador(meses=[1, 2]), format='json')
+        self.assertEqual(response.status_code, 201)
+        documento = self.client.get(f"/api/trabajadores/{response.data['id']}/documento/").data
+        documento['retiro'] = None
+        documento['cronogramas'] = documento['cronogramas'][1:]
+        response = self.client.put(f"/api/trabajadores/{response.data['id']}/documento/", documento, format='json')
+        self.assertEqual(response.status_code, 200)
+        call_command('generar_datos', trabajadores=2, anios='2025', stdout=StringIO())
+
+        self.assertEqual(TrabajadorAnioSnapshot.objects.count(), 6)
+        snapshot = TrabajadorAnioSnapshot.objects.get(trabajador__numero='30000001')
+        self.assertFalse(snapshot.tiene_retiro)
+        self.assertEqual([mes is not None for mes in snapshot.meses[:3]], [False, True, False])
+        self.assertIgualAReconstruido()
+
+    def test_comando_reconstruye_el_snapshot(self):
+        for indice in range(3):
+            crear_trabajador(indice)
+        esperado = self.snapshots()
+        TrabajadorAnioSnapshot.objects.all().delete()
+
+        call_command('reconstruir_snapshot', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(self.snapshots(), esperado)
+
+    def test_lecturas_calculan_los_snapshots_faltantes_sin_escribir(self):
+        for indice in range(3):
+            crear_trabajador(indice)
+        completo = list(filas_novedades(Trabajador.objects.order_by('id')))
+        csv_completo = BytesIO()
+        exportar_csv(csv_completo)
+        TrabajadorAnioSnapshot.objects.filter(trabajador__numero__in=['10000000', '10000002']).delete()
+
+        csv_incompleto = BytesIO()
+        with CaptureQueriesContext(connection) as consultas:
+            filas = list(filas_novedades(Trabajador.objects.order_by('id'), tamano_lote=2))
+            resumen = self.client.get('/api/trabajadores/resumen/', {'anio': 2025})
+            exportar_csv(csv_incompleto)
+
+        self.assertEqual(filas, completo)
+        self.assertEqual(csv_incompleto.getvalue(), csv_completo.getvalue())
+        self.assertEqual([fila['cargo'] for fila in resumen.data['results']], ['OPERARIO'] * 3)
+        escrituras = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].lstrip().startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(escrituras, [])
+        self.assertEqual(TrabajadorAnioSnapshot.objects.count(), 1)
+
+    def test_migracion_rellena_los_snapshots_faltantes(self):
+        for indice in range(3):
+            crear_trabajador(indice)
+        crear_trabajador(9, anio=2024)
+        esperado = self.snapshots()
+        TrabajadorAnioSnapshot.objects.exclude(trabajador__numero='10000001').delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute(RELLENAR_SNAPSHOT)
+
+        self.assertEqual(self.snapshots(), esperado)
+
+    def test_resumen_lee_el_snapshot_en_una_consulta(self):
+        for indice in range(3):
+            crear_trabajador(indice)
+        crear_trabajador(9, anio=2024)
+
+        # Trabajadores unidos a su snapshot
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/trabajadores/resumen/', {'anio': 2025})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+        fila = response.data['results'][0]
+        self.assertEqual(fila['nombre_completo'], 'NOMBRE0 APELLIDO0')
+        self.assertEqual((fila['cargo'], fila['arl'], fila['dias_laborados_total']), ('OPERARIO', 'POSITIVA', 30))
+
+class CSVNovedadesTests(TestCase):
+    """Pruebas de exportar_csv / importar_csv (COPY de PostgreSQL)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def snapshots(self):
+        """Snapshots por documento y año (sin ids ni fecha de actualización)"""
+        return {
+            (fila.pop('trabajador__tipo'), fila.pop('trabajador__numero'), fila['anio']): fila
+            for fila in TrabajadorAnioSnapshot.objects.values(
+                'trabajador__tipo', 'trabajador__numero',
+                *[field.attname for field in TrabajadorAnioSnapshot._meta.concrete_fields
+                  if field.name not in ('trabajador', 'fecha_actualizacion')]
+            )
+        }
+
+    def exportar(self, anios=None):
+        destino = BytesIO()
+        total = exportar_csv(destino, anios)
+        return total, destino.getvalue()
+
+    def importar(self, contenido, anio=2025):
+        return importar_csv(BytesIO(contenido.encode('utf-8') if isinstance(contenido, str) else contenido), anio)
+
+    def test_exportar_e_importar_conserva_los_datos(self):
+        for indice in range(3):
+            crear_trabajador(indice)
+        crear_trabajador(9, anio=2024)
+        # Un bloque sin ningún valor no se importa: el retiro lleva fecha
+        Retiro.objects.update(fecha_retiro=date(2025, 6, 30), valor_liquidacion=Decimal('350000.50'))
+        reconstruir_snapshots()
+        esperado = self.snapshots()
+
+        total, contenido = self.exportar()
+        self.assertEqual(total, 4)
+        lineas = contenido.decode('utf-8').splitlines()
+        self.assertTrue(lineas[0].startswith('fila,tipo,numero,fecha_expedicion_cedula'))
+        self.assertTrue(lineas[1].startswith('1,CC,10000009,2000-01-01,1982-01-01,APELLIDO9,'))
+        self.assertTrue(lineas[1].endswith(',2024'))
+
+        Trabajador.objects.all().delete()
+        resumen = self.importar(contenido)
+
+        self.assertEqual(resumen, {'filas': 4, 'creados': 4, 'actualizados': 0, 'sin_cambios': 0})
+        self.assertEqual(self.snapshots(), esperado)
+        self.assertEqual(Cronograma.objects.count(), 4)
+        # El snapshot calculado en SQL es igual al de Python
+        reconstruir_snapshots()
+        self.assertEqual(self.snapshots(), esperado)
+
+        # Reimportar lo mismo no reescribe ninguna fila
+        antes = Cronograma.objects.values_list('fecha_actualizacion', flat=True).get(trabajador__numero='10000001')
+        resumen = self.importar(contenido)
+        self.assertEqual(resumen, {'filas': 4, 'creados': 0, 'actualizados': 0, 'sin_cambios': 4})
+        self.assertEqual(
+            Cronograma.objects.values_list('fecha_actualizacion', flat=True).get(trabajador__numero='10000001'), antes
+        )
+
+    def test_importar_fusiona_solo_las_columnas_presentes(self):
+        trabajador = crear_trabajador(1)
+        Trabajador.objects.filter(pk=trabajador.pk).update(huella_importacion='abc')
+        contenido = (
+            'NUMERO,tipo,primer_nombre,tipo_contrato,cargo,municipio_03,dias_03\n'
+            '10000001,CC,ANA,Término Indefinido,SUPERVISOR,ipiales,15\n'
+            '20000002,Cédula de Extranjería,LUIS,,,,\n'
+            '20000002,CE,LUISA,,,N/A,\n'
+        )
+
+        resumen = self.importar(contenido)
+
+        self.assertEqual(resumen, {'filas': 3, 'creados': 1, 'actualizados': 1, 'sin_cambios': 0})
+        trabajador.refresh_from_db()
+        self.assertEqual((trabajador.primer_nombre, trabajador.primer_apellido), ('ANA', 'APELLIDO1'))
+        self.assertEqual(trabajador.huella_importacion, '')
+        contratacion = trabajador.contrataciones.get()
+        self.assertEqual((contratacion.tipo_contrato, contratacion.cargo), ('TERMINO_INDEFINIDO', 'SUPERVISOR'))
+        self.assertEqual(contratacion.municipio_base, 'PASTO')
+        marzo = trabajador.cronogramas.get(mes=date(2025, 3, 1))
+        self.assertEqual((marzo.municipio_ejecucion, marzo.dias_laborados, marzo.sueldo_devengado), ('IPIALES', 15, 0))
+        self.assertEqual(trabajador.snapshot.meses_con_cronograma, 2)
+
+        # La última fila repetida prevalece; los bloques vacíos no se crean
+        nuevo = Trabajador.objects.get(numero='20000002')
+        self.assertEqual((nuevo.tipo, nuevo.primer_nombre, nuevo.primer_apellido), ('CE', 'LUISA', ''))
+        self.assertEqual((nuevo.fecha_nacimiento, nuevo.fecha_expedicion_cedula), (date(1982, 1, 1), date(2000, 1, 1)))
+        self.assertFalse(nuevo.contrataciones.exists())
+        self.assertFalse(nuevo.cronogramas.exists())
+        self.assertFalse(nuevo.snapshot.tiene_contratacion)
+
+    def test_errores_no_dejan_cambios(self):
+        with self.assertRaisesMessage(ErrorFormatoCSV, 'Columnas desconocidas: salario'):
+            self.importar('numero,salario\n1,2\n')
+
+        salida = StringIO()
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        path = os.path.join(directorio, 'novedades.csv')
+        with open(path, 'w', encoding='utf-8') as archivo:
+            archivo.write('numero,primer_nombre,fecha_nacimiento\n1,ANA,1990-01-01\n2,LUIS,31/31/1990\n')
+        call_command('importar_csv', file=path, stdout=salida)
+
+        self.assertIn('Error al importar', salida.getvalue())
+        self.assertFalse(Trabajador.objects.exists())
+
+    def test_comandos_y_endpoint(self):
+        crear_trabajador(1)
+        crear_trabajador(2, anio=2024)
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        path = os.path.join(directorio, 'csv', 'novedades.csv')
+
+        call_command('exportar_csv', output=path, anio='2024', stdout=StringIO())
+        Trabajador.objects.all().delete()
+        call_command('importar_csv', file=path, stdout=StringIO())
+        self.assertEqual(list(Trabajador.objects.values_list('numero', 'anio')), [('10000002', 2024)])
+
+        response = self.client.get('/api/trabajadores/exportar-csv/', {'anio': '2024,2025'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lineas = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lineas), 2)
+        self.assertEqual(self.client.get('/api/trabajadores/exportar-csv/', {'anio': 'x'}).status_code, 400)
+
+    def test_streaming_se_interrumpe_al_cerrar(self):
+        call_command('generar_datos', trabajadores=400, anios='2025', stdout=StringIO())
+        completo = b''.join(iterar_csv())
+        self.assertEqual(completo.count(b'\n'), 401)
+        self.assertGreater(len(completo), 2 * TAMANO_BLOQUE)
+
+        bloques = iterar_csv()
+        primero = next(bloques)
+        bloques.close()
+        self.assertTrue(completo.startswith(primero))
+        self.assertLess(len(primero), 2 * TAMANO_BLOQUE)
+        # La conexión queda libre para la petición
+        self.assertEqual(Trabajador.objects.count(), 400)
+
+
+# Consultas máximas por endpoint y comando. Deben ser las mismas con K y con 10K
+# trabajadores: un número que crece con las filas es un N+1.
+PRESUPUESTO_CONSULTAS = {
+    # Comandos (un lote de 1000 filas)
+    'generar_datos': 10,
+    'importar_excel': 17,
+    'exportar_excel': 3,
+    # COPY (con los snapshots faltantes calculados en la misma consulta)
+    'exportar_csv': 1,
+    # Tablas temporales, COPY y un upsert por tabla
+    'importar_csv': 15,
+    # Lecturas: marca de modificación + trabajadores + 1 por relación anual
+    'listado': 7,
+    'listado sin paginar': 7,
+    'detalle': 7,
+    'datos_completos': 6,
+    'buscar': 1,
+    'resumen': 1,
+    'estadisticas': 8,
+    'exportar-excel': 9,
+    'exportar-csv': 1,
+    'GET documento': 7,
+    'GET contratacion': 2,
+    'GET ingreso': 2,
+    'GET retiro': 2,
+    'GET seguridad-social': 2,
+    'GET proyectos': 2,
+    'GET cronograma': 2,
+    # Escrituras
+    'PUT documento': 24,
+    'POST documento': 12,
+    'POST trabajador': 3,
+    'PATCH trabajador': 3,
+    'PUT contratacion': 5,
+    'PATCH contratacion': 5,
+    'DELETE contratacion': 4,
+    'POST contratacion': 5,
+    'PUT ingreso': 5,
+    'PATCH ingreso': 5,
+    'DELETE ingreso': 4,
+    'POST ingreso': 5,
+    'PUT retiro': 5,
+    'PATCH retiro': 5,
+    'DELETE retiro': 4,
+    'POST retiro': 5,
+    'PUT seguridad-social': 5,
+    'PATCH seguridad-social': 5,
+    'DELETE seguridad-social': 4,
+    'POST seguridad-social': 5,
+    'PUT proyectos': 5,
+    'PATCH proyectos': 5,
+    'DELETE proyectos': 4,
+    'POST proyectos': 5,
+    'PATCH cronograma': 6,
+    'DELETE cronograma': 5,
+    'POST cronograma': 6,
+    'DELETE trabajador': 15,
+    # contratacion/urls.py
+    'listado contrataciones': 1,
+    'detalle contratacion': 1,
+    'contratos_activos': 1,
+    'por_trabajador': 1,
+    'PUT contrataciones': 4,
+    'PATCH contrataciones': 3,
+    'DELETE contrataciones': 3,
+    'POST contrataciones': 3,
+}
+
+
+class PresupuestoConsultasTests(TestCase):
+    """
+    Recorre cada endpoint de trabajadores/urls.py y contratacion/urls.py y los
+    comandos de importación, exportación y generación con K y 10K trabajadores,
+    y verifica que las consultas no dependan de la cantidad de filas.
+    """
+    K = 3
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+        ajustes = override_settings(EXPORTACION_CACHE_DIR=os.path.join(self.directorio, 'cache'))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        self.plantilla = os.path.join(self.directorio, 'plantilla.xlsx')
+        crear_libro_novedades(self.plantilla, [])
+
+    def contar(self, consultas, nombre, funcion):
+        with CaptureQueriesContext(connection) as capturadas:
+            resultado = funcion()
+        consultas[nombre] = len(capturadas)
+        return resultado
+
+    def leer_respuesta(self, llamada):
+        """Las respuestas en streaming consultan al enviarse: se leen dentro de la medición"""
+        response = llamada()
+        if response.streaming:
+            response.contenido = b''.join(response.streaming_content)
+        return response
+
+    def peticion(self, consultas, metodo, ruta, datos=None, *, nombre):
+        if metodo == 'get':
+            llamada = partial(self.client.get, ruta, datos)
+        else:
+            llamada = partial(getattr(self.client, metodo), ruta, datos, format='json')
+        response = self.contar(consultas, nombre, partial(self.leer_respuesta, llamada))
+        self.assertLess(response.status_code, 400, f'{nombre}: {getattr(response, "data", "")}')
+        return response
+
+    def medir(self, tamano):
+        """Consultas de cada endpoint y comando con `tamano` trabajadores del año 2025"""
+        consultas = {}
+        libro = os.path.join(self.directorio, f'novedades_{tamano}.xlsx')
+        self.contar(consultas, 'generar_datos', partial(
+            call_command, 'generar_datos', trabajadores=tamano, anios='2025', excel=libro, stdout=StringIO()
+        ))
+        self.contar(consultas, 'importar_excel', partial(
+            call_command, 'importar_excel', file=libro, anio=2025, batch_size=1000, forzar=True, stdout=StringIO()
+        ))
+        self.contar(consultas, 'exportar_excel', partial(
+            call_command, 'exportar_excel', output=os.path.join(self.directorio, f'exportado_{tamano}.xlsx'),
+            template=self.plantilla, anio=2025, stdout=StringIO()
+        ))
+        csv_path = os.path.join(self.directorio, f'exportado_{tamano}.csv')
+        self.contar(consultas, 'exportar_csv', partial(
+            call_command, 'exportar_csv', output=csv_path, anio='2025', stdout=StringIO()
+        ))
+        self.contar(consultas, 'importar_csv', partial(
+            call_command, 'importar_csv', file=csv_path, stdout=StringIO()
+        ))
+
+        # Solo los sintéticos: la ronda anterior también crea trabajadores por la API
+        ids = list(
+            Trabajador.objects.filter(anio=2025, numero__startswith='99').order_by('id').values_list('id', flat=True)
+        )
+        self.assertEqual(len(ids), tamano)
+        # Lecturas sobre el primer trabajador; escrituras y borrados sobre el último
+        trabajador = f'/api/trabajadores/{ids[0]}/'
+        victima = f'/api/trabajadores/{ids[-1]}/'
+        get = partial(self.peticion, consultas, 'get')
+
+        # trabajadores/urls.py: lecturas
+        get('/api/trabajadores/', {'anio': 2025}, nombre='listado')
+        get('/api/trabajadores/', {'anio': 2025, 'paginar': 'false'}, nombre='listado sin paginar')
+        get(trabajador, {'anio': 2025, 'expand': 'contratacion,ingreso,retiro,seguridad_social,proyecto'},
+            nombre='detalle')
+        get(f'{trabajador}datos_completos/', {'anio': 2025}, nombre='datos_completos')
+        get('/api/trabajadores/buscar/', {'q': 'a', 'anio': 2025, 'limite': 100}, nombre='buscar')
+        get('/api/trabajadores/resumen/', {'anio': 2025}, nombre='resumen')
+        cache.clear()
+        get('/api/trabajadores/estadisticas/', {'anio': 2025}, nombre='estadisticas')
+        shutil.rmtree(settings.EXPORTACION_CACHE_DIR, ignore_errors=True)
+        get('/api/trabajadores/exportar-excel/', nombre='exportar-excel')
+        get('/api/trabajadores/exportar-csv/', {'anio': 2025}, nombre='exportar-csv')
+        documento = get(f'{trabajador}documento/', nombre='GET documento').data
+        for subrecurso in ('contratacion', 'ingreso', 'retiro', 'seguridad-social', 'proyectos', 'cronograma'):
+            get(f'{trabajador}{subrecurso}/', nombre=f'GET {subrecurso}')
+
+        # trabajadores/urls.py: escrituras (generar_datos deja sin municipio los meses sin actividad)
+        documento['cronogramas'] = [mes for mes in documento['cronogramas'] if mes['municipio_ejecucion']]
+        self.peticion(consultas, 'put', f'{trabajador}documento/', documento, nombre='PUT documento')
+        self.peticion(
+            consultas, 'post', '/api/trabajadores/documento/',
+            documento_trabajador(numero=f'3{tamano:07d}'), nombre='POST documento'
+        )
+        datos_trabajador = {
+            campo: documento[campo]
+            for campo in ('tipo', 'fecha_expedicion_cedula', 'fecha_nacimiento', 'primer_apellido', 'primer_nombre')
+        }
+        self.peticion(
+            consultas, 'post', '/api/trabajadores/', {**datos_trabajador, 'numero': f'4{tamano:07d}', 'anio': 2025},
+            nombre='POST trabajador'
+        )
+        self.peticion(consultas, 'patch', victima, {'segundo_nombre': 'PRUEBA'}, nombre='PATCH trabajador')
+        for subrecurso in ('contratacion', 'ingreso', 'retiro', 'seguridad-social', 'proyectos'):
+            ruta = f'{victima}{subrecurso}/'
+            datos = self.client.get(ruta).data
+            self.peticion(consultas, 'put', ruta, datos, nombre=f'PUT {subrecurso}')
+            self.peticion(consultas, 'patch', ruta, {}, nombre=f'PATCH {subrecurso}')
+            self.peticion(consultas, 'delete', ruta, nombre=f'DELETE {subrecurso}')
+            self.peticion(consultas, 'post', ruta, datos, nombre=f'POST {subrecurso}')
+        cronograma = next(
+            mes for mes in self.client.get(f'{victima}cronograma/').data
+            if mes['municipio_ejecucion']
+        )
+        ruta = f'{victima}cronograma/{cronograma["id"]}/'
+        self.peticion(consultas, 'patch', ruta, {'dias_laborados': 29}, nombre='PATCH cronograma')
+        self.peticion(consultas, 'delete', ruta, nombre='DELETE cronograma')
+        self.peticion(consultas, 'post', f'{victima}cronograma/', cronograma, nombre='POST cronograma')
+
+        # contratacion/urls.py
+        get('/api/contrataciones/', nombre='listado contrataciones')
+        contratacion = self.client.get(f'{victima}contratacion/').data
+        ruta = f'/api/contrataciones/{contratacion["id"]}/'
+        get(ruta, nombre='detalle contratacion')
+        get('/api/contrataciones/contratos_activos/', nombre='contratos_activos')
+        get(f'/api/contrataciones/{ids[0]}/por_trabajador/', nombre='por_trabajador')
+        self.peticion(consultas, 'put', ruta, contratacion, nombre='PUT contrataciones')
+        self.peticion(consultas, 'patch', ruta, {'cargo': 'SUPERVISOR'}, nombre='PATCH contrataciones')
+        self.peticion(consultas, 'delete', ruta, nombre='DELETE contrataciones')
+        self.peticion(consultas, 'post', '/api/contrataciones/', contratacion, nombre='POST contrataciones')
+
+        self.peticion(consultas, 'delete', victima, nombre='DELETE trabajador')
+        return consultas
+
+    def test_consultas_no_crecen_con_las_filas(self):
+        pocos = self.medir(self.K)
+        muchos = self.medir(10 * self.K)
+
+        self.assertEqual(set(pocos), set(PRESUPUESTO_CONSULTAS))
+        for nombre, maximo in PRESUPUESTO_CONSULTAS.items():
+            with self.subTest(nombre):
+                self.assertEqual(muchos[nombre], pocos[nombre], f'{nombre}: las consultas crecen con las filas')
+                self.assertLessEqual(pocos[nombre], maximo)
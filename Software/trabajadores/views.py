@@ -1,14 +1,26 @@
+import hashlib
+import json
+from datetime import date
+from functools import partial
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import HttpResponse
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from openpyxl import Workbook
 from openpyxl.styles import Font, Fill, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
-from .models import Trabajador
-from .serializers import TrabajadorSerializer, TrabajadorListSerializer, TrabajadorDetalleSerializer
+from .models import Trabajador, RELACIONES_ANIO
+from .paginacion import KeysetPagination
+from .serializers import (
+    TrabajadorSerializer, TrabajadorListSerializer, TrabajadorDetalleSerializer, TrabajadorDocumentoSerializer,
+    TrabajadorResumenSerializer, DEPENDENCIAS_CAMPOS
+)
 
 
 class TrabajadorViewSet(viewsets.ModelViewSet):
@@ -16,13 +28,18 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
     ViewSet para gestionar trabajadores.
     Proporciona operaciones CRUD completas.
     """
-    queryset = Trabajador.objects.all()
+    # El vector de búsqueda solo se usa en SQL; no se trae en las consultas
+    queryset = Trabajador.objects.defer('busqueda')
     serializer_class = TrabajadorSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['tipo', 'fecha_nacimiento', 'anio']
     search_fields = ['numero', 'primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido']
     ordering_fields = ['primer_apellido', 'fecha_nacimiento', 'fecha_creacion']
     ordering = ['primer_apellido']
+    pagination_class = KeysetPagination
+
+    # Acciones de lectura que aceptan ?fields= y ?expand=
+    acciones_campos_dinamicos = ('list', 'retrieve', 'datos_completos', 'buscar')
 
     def get_queryset(self):
         """Filtrar trabajadores por año si se proporciona el parámetro"""
@@ -30,14 +47,28 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         anio = self.request.query_params.get('anio', None)
         if anio:
             queryset = queryset.filter(anio=int(anio))
+        # En lectura solo se precargan las relaciones pedidas (una consulta por tabla)
+        if self.action in self.acciones_campos_dinamicos:
+            campos, relaciones = self.get_seleccion_campos()
+            queryset = queryset.con_relaciones_anio(int(anio or 2025), relaciones)
+            if self.request.query_params.get('fields', None) is not None:
+                queryset = queryset.only(*self.get_columnas(campos))
         return queryset
 
     def get_serializer_class(self):
         """Usar serializer apropiado según la acción"""
-        if self.action == 'list':
+        if self.action in self.acciones_campos_dinamicos:
             return TrabajadorDetalleSerializer
+        if self.action == 'resumen':
+            return TrabajadorResumenSerializer
         return TrabajadorSerializer
 
+    def get_serializer(self, *args, **kwargs):
+        """En lectura se serializan solo los campos pedidos"""
+        if self.action in self.acciones_campos_dinamicos:
+            kwargs.setdefault('campos', self.get_seleccion_campos()[0])
+        return super().get_serializer(*args, **kwargs)
+
     def get_serializer_context(self):
         """Agregar el año al contexto del serializer"""
         context = super().get_serializer_context()
@@ -45,13 +76,162 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         context['anio'] = int(self.request.query_params.get('anio', 2025))
         return context
 
+    def _lista_parametro(self, nombre):
+        """Valores separados por coma de un query param (None si no viene)"""
+        valor = self.request.query_params.get(nombre, None)
+        if valor is None:
+            return None
+        return [parte.strip() for parte in valor.split(',') if parte.strip()]
+
+    def get_seleccion_campos(self):
+        """
+        Interpreta ?fields= y ?expand=. Retorna (campos, relaciones):
+        los campos a serializar y las relaciones anuales a precargar.
+        Sin parámetros, el listado y datos_completos incluyen todas las
+        relaciones; el detalle y la búsqueda ninguna.
+        """
+        if hasattr(self, '_seleccion_campos'):
+            return self._seleccion_campos
+
+        disponibles = TrabajadorDetalleSerializer.Meta.fields
+        campos = self._lista_parametro('fields')
+        expand = self._lista_parametro('expand')
+
+        desconocidos = [campo for campo in campos or [] if campo not in disponibles]
+        desconocidos += [relacion for relacion in expand or [] if relacion not in RELACIONES_ANIO]
+        if desconocidos:
+            raise ValidationError({'error': f'Campos desconocidos: {", ".join(desconocidos)}'})
+
+        if expand is not None:
+            relaciones = expand
+        elif campos is not None:
+            relaciones = [campo for campo in campos if campo in RELACIONES_ANIO]
+        elif self.action in ('retrieve', 'buscar'):
+            relaciones = []
+        else:
+            relaciones = list(RELACIONES_ANIO)
+
+        if campos is None:
+            campos = [campo for campo in disponibles if campo not in RELACIONES_ANIO]
+        seleccion = set(campos) | set(relaciones)
+        relaciones = [relacion for relacion in RELACIONES_ANIO if relacion in seleccion]
+
+        self._seleccion_campos = ([campo for campo in disponibles if campo in seleccion], relaciones)
+        return self._seleccion_campos
+
+    def get_columnas(self, campos):
+        """Columnas de la tabla trabajadores necesarias para serializar `campos`"""
+        # id y primer_apellido siempre: los usa la paginación por cursor
+        columnas = {'id', 'primer_apellido'}
+        for campo in campos:
+            if campo in RELACIONES_ANIO:
+                continue
+            columnas.update(DEPENDENCIAS_CAMPOS.get(campo, [campo]))
+        return sorted(columnas)
+
+    def get_relacion_anio(self, trabajador, nombre):
+        """
+        Registro de la relación (contratacion, ingreso, ...) en el año del trabajador.
+        Lanza DoesNotExist del modelo relacionado si no existe.
+        """
+        return getattr(trabajador, RELACIONES_ANIO[nombre]).get(anio=trabajador.anio)
+
+    def get_etag(self, queryset):
+        """
+        ETag de una lectura. Depende de la URL (filtros, cursor, ?fields=),
+        del formato de respuesta, del día (la edad se calcula con la fecha
+        actual) y de la marca de modificación de los trabajadores y
+        relaciones que se serializan.
+
+        No se envía Last-Modified: la última fecha_actualizacion no cambia
+        al eliminar registros, y un If-Modified-Since respondería 304 con
+        datos viejos. La marca incluye además la cantidad de filas.
+        """
+        anio = int(self.request.query_params.get('anio', None) or 2025)
+        marca = sorted(
+            queryset.marca_modificacion(anio, self.get_seleccion_campos()[1]),
+            key=lambda fila: fila['tabla']
+        )
+        contenido = json.dumps([
+            self.request.get_full_path(),
+            self.request.accepted_renderer.format,
+            date.today(),
+            marca,
+        ], default=str)
+        return quote_etag(hashlib.sha256(contenido.encode()).hexdigest()[:32])
+
+    def respuesta_condicional(self, queryset, leer):
+        """
+        Responde 304 si el cliente ya tiene la versión actual (If-None-Match)
+        sin ejecutar el serializer; si no, llama a `leer()` y agrega el
+        encabezado ETag.
+        """
+        etag = self.get_etag(queryset)
+        no_modificado = get_conditional_response(self.request, etag=etag)
+        if no_modificado is not None:
+            return no_modificado
+
+        response = leer()
+        response['ETag'] = etag
+        # El cliente puede guardar la respuesta, pero debe revalidarla siempre
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Listado con soporte de GET condicional (ETag)"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.respuesta_condicional(queryset, partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Detalle con soporte de GET condicional (ETag)"""
+        try:
+            trabajador_id = int(kwargs[self.lookup_field])
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).filter(pk=trabajador_id)
+        return self.respuesta_condicional(queryset, partial(super().retrieve, request, *args, **kwargs))
+
     @action(detail=True, methods=['get'])
     def datos_completos(self, request, pk=None):
         """Endpoint para obtener todos los datos del trabajador incluyendo relaciones"""
         trabajador = self.get_object()
-        serializer = TrabajadorDetalleSerializer(trabajador)
+        serializer = self.get_serializer(trabajador)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], url_path='documento', url_name='crear-documento')
+    def crear_documento(self, request):
+        """
+        Crea un trabajador con todas sus tablas del año en una sola transacción
+        POST /api/trabajadores/documento/
+        Body: datos del trabajador + contratacion, ingreso, retiro,
+              seguridad_social, proyecto y cronogramas (lista de meses)
+        """
+        serializer = TrabajadorDocumentoSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=['get', 'put'], url_path='documento')
+    def documento(self, request, pk=None):
+        """
+        Documento completo del trabajador en su año
+        GET: Ver el documento
+        PUT: Reemplazar el documento (las relaciones omitidas se eliminan)
+        """
+        trabajador = self.get_object()
+
+        if request.method == 'GET':
+            serializer = TrabajadorDocumentoSerializer(trabajador)
+            return Response(serializer.data)
+
+        elif request.method == 'PUT':
+            serializer = TrabajadorDocumentoSerializer(trabajador, data=request.data)
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     @action(detail=True, methods=['get', 'post', 'put', 'patch', 'delete'], url_path='contratacion')
     def contratacion(self, request, pk=None):
         """
@@ -69,7 +249,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         if request.method == 'GET':
             # Ver contratación
             try:
-                contratacion_obj = trabajador.contratacion
+                contratacion_obj = self.get_relacion_anio(trabajador, 'contratacion')
                 serializer = ContratacionSerializer(contratacion_obj)
                 return Response(serializer.data)
             except Contratacion.DoesNotExist:
@@ -80,7 +260,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
 
         elif request.method == 'POST':
             # Verificar si ya tiene contratación
-            if hasattr(trabajador, 'contratacion'):
+            if trabajador.relacion_anio('contratacion', trabajador.anio) is not None:
                 return Response(
                     {'error': 'Este trabajador ya tiene una contratación'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -91,14 +271,14 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
             data['trabajador'] = trabajador.id
             serializer = ContratacionSerializer(data=data)
             if serializer.is_valid():
-                serializer.save()
+                serializer.save(anio=trabajador.anio)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         elif request.method in ['PUT', 'PATCH']:
             # Actualizar contratación existente
             try:
-                contratacion_obj = trabajador.contratacion
+                contratacion_obj = self.get_relacion_anio(trabajador, 'contratacion')
             except Contratacion.DoesNotExist:
                 return Response(
                     {'error': 'Este trabajador no tiene contratación'},
@@ -117,7 +297,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         elif request.method == 'DELETE':
             # Eliminar contratación
             try:
-                contratacion_obj = trabajador.contratacion
+                contratacion_obj = self.get_relacion_anio(trabajador, 'contratacion')
                 contratacion_obj.delete()
                 return Response(status=status.HTTP_204_NO_CONTENT)
             except Contratacion.DoesNotExist:
@@ -143,7 +323,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         if request.method == 'GET':
             # Ver ingreso
             try:
-                ingreso_obj = trabajador.ingreso
+                ingreso_obj = self.get_relacion_anio(trabajador, 'ingreso')
                 serializer = IngresoSerializer(ingreso_obj)
                 return Response(serializer.data)
             except Ingreso.DoesNotExist:
@@ -154,7 +334,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
 
         elif request.method == 'POST':
             # Verificar si ya tiene ingreso
-            if hasattr(trabajador, 'ingreso'):
+            if trabajador.relacion_anio('ingreso', trabajador.anio) is not None:
                 return Response(
                     {'error': 'Este trabajador ya tiene un ingreso'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -165,14 +345,14 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
             data['trabajador'] = trabajador.id
             serializer = IngresoSerializer(data=data)
             if serializer.is_valid():
-                serializer.save()
+                serializer.save(anio=trabajador.anio)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         elif request.method in ['PUT', 'PATCH']:
             # Actualizar ingreso existente
             try:
-                ingreso_obj = trabajador.ingreso
+                ingreso_obj = self.get_relacion_anio(trabajador, 'ingreso')
             except Ingreso.DoesNotExist:
                 return Response(
                     {'error': 'Este trabajador no tiene ingreso'},
@@ -191,7 +371,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         elif request.method == 'DELETE':
             # Eliminar ingreso
             try:
-                ingreso_obj = trabajador.ingreso
+                ingreso_obj = self.get_relacion_anio(trabajador, 'ingreso')
                 ingreso_obj.delete()
                 return Response(status=status.HTTP_204_NO_CONTENT)
             except Ingreso.DoesNotExist:
@@ -217,7 +397,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         if request.method == 'GET':
             # Ver retiro
             try:
-                retiro_obj = trabajador.retiro
+                retiro_obj = self.get_relacion_anio(trabajador, 'retiro')
                 serializer = RetiroSerializer(retiro_obj)
                 return Response(serializer.data)
             except Retiro.DoesNotExist:
@@ -228,7 +408,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
 
         elif request.method == 'POST':
             # Verificar si ya tiene retiro
-            if hasattr(trabajador, 'retiro'):
+            if trabajador.relacion_anio('retiro', trabajador.anio) is not None:
                 return Response(
                     {'error': 'Este trabajador ya tiene un retiro'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -239,14 +419,14 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
             data['trabajador'] = trabajador.id
             serializer = RetiroSerializer(data=data)
             if serializer.is_valid():
-                serializer.save()
+                serializer.save(anio=trabajador.anio)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         elif request.method in ['PUT', 'PATCH']:
             # Actualizar retiro existente
             try:
-                retiro_obj = trabajador.retiro
+                retiro_obj = self.get_relacion_anio(trabajador, 'retiro')
             except Retiro.DoesNotExist:
                 return Response(
                     {'error': 'Este trabajador no tiene retiro'},
@@ -265,7 +445,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         elif request.method == 'DELETE':
             # Eliminar retiro
             try:
-                retiro_obj = trabajador.retiro
+                retiro_obj = self.get_relacion_anio(trabajador, 'retiro')
                 retiro_obj.delete()
                 return Response(status=status.HTTP_204_NO_CONTENT)
             except Retiro.DoesNotExist:
@@ -291,7 +471,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         if request.method == 'GET':
             # Ver seguridad social
             try:
-                seguridad_social_obj = trabajador.seguridad_social
+                seguridad_social_obj = self.get_relacion_anio(trabajador, 'seguridad_social')
                 serializer = SeguridadSocialSerializer(seguridad_social_obj)
                 return Response(serializer.data)
             except SeguridadSocial.DoesNotExist:
@@ -302,7 +482,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
 
         elif request.method == 'POST':
             # Verificar si ya tiene seguridad social
-            if hasattr(trabajador, 'seguridad_social'):
+            if trabajador.relacion_anio('seguridad_social', trabajador.anio) is not None:
                 return Response(
                     {'error': 'Este trabajador ya tiene seguridad social'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -313,14 +493,14 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
             data['trabajador'] = trabajador.id
             serializer = SeguridadSocialSerializer(data=data)
             if serializer.is_valid():
-                serializer.save()
+                serializer.save(anio=trabajador.anio)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         elif request.method in ['PUT', 'PATCH']:
             # Actualizar seguridad social existente
             try:
-                seguridad_social_obj = trabajador.seguridad_social
+                seguridad_social_obj = self.get_relacion_anio(trabajador, 'seguridad_social')
             except SeguridadSocial.DoesNotExist:
                 return Response(
                     {'error': 'Este trabajador no tiene seguridad social'},
@@ -339,7 +519,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         elif request.method == 'DELETE':
             # Eliminar seguridad social
             try:
-                seguridad_social_obj = trabajador.seguridad_social
+                seguridad_social_obj = self.get_relacion_anio(trabajador, 'seguridad_social')
                 seguridad_social_obj.delete()
                 return Response(status=status.HTTP_204_NO_CONTENT)
             except SeguridadSocial.DoesNotExist:
@@ -365,7 +545,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         if request.method == 'GET':
             # Ver proyectos
             try:
-                proyectos_obj = trabajador.proyectos
+                proyectos_obj = self.get_relacion_anio(trabajador, 'proyecto')
                 serializer = ProyectoSerializer(proyectos_obj)
                 return Response(serializer.data)
             except Proyecto.DoesNotExist:
@@ -376,7 +556,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
 
         elif request.method == 'POST':
             # Verificar si ya tiene proyectos
-            if hasattr(trabajador, 'proyectos'):
+            if trabajador.relacion_anio('proyecto', trabajador.anio) is not None:
                 return Response(
                     {'error': 'Este trabajador ya tiene proyectos asignados'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -387,14 +567,14 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
             data['trabajador'] = trabajador.id
             serializer = ProyectoSerializer(data=data)
             if serializer.is_valid():
-                serializer.save()
+                serializer.save(anio=trabajador.anio)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         elif request.method in ['PUT', 'PATCH']:
             # Actualizar proyectos existentes
             try:
-                proyectos_obj = trabajador.proyectos
+                proyectos_obj = self.get_relacion_anio(trabajador, 'proyecto')
             except Proyecto.DoesNotExist:
                 return Response(
                     {'error': 'Este trabajador no tiene proyectos asignados'},
@@ -413,7 +593,7 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
         elif request.method == 'DELETE':
             # Eliminar proyectos
             try:
-                proyectos_obj = trabajador.proyectos
+                proyectos_obj = self.get_relacion_anio(trabajador, 'proyecto')
                 proyectos_obj.delete()
                 return Response(status=status.HTTP_204_NO_CONTENT)
             except Proyecto.DoesNotExist:
@@ -490,24 +670,105 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
             cronograma_obj.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['get'], url_path='buscar')
+    def buscar(self, request):
+        """
+        Búsqueda por nombre, apellido o documento ordenada por relevancia
+        GET /api/trabajadores/buscar/?q=andres zapata&anio=2025&limite=20
+
+        Ignora acentos y mayúsculas; cada palabra coincide por prefijo.
+        Acepta ?fields= y ?expand= como el listado.
+        """
+        texto = request.query_params.get('q', '').strip()
+        if not texto:
+            return Response(
+                {'error': 'El parámetro q es requerido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limite = min(int(request.query_params.get('limite', 20)), 100)
+        except ValueError:
+            return Response(
+                {'error': 'El parámetro limite debe ser un número'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        trabajadores = self.get_queryset().buscar(texto)[:max(limite, 1)]
+        serializer = self.get_serializer(trabajadores, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='resumen')
+    def resumen(self, request):
+        """
+        Listado plano leído del snapshot trabajador-año
+        GET /api/trabajadores/resumen/?anio=2025
+
+        Una fila por trabajador con las columnas de contratación, ingreso,
+        retiro, seguridad social y proyecto y los totales del cronograma,
+        en una sola consulta. Se pagina por cursor como el listado.
+        """
+        from .snapshot import completar_en_memoria
+
+        queryset = self.filter_queryset(self.get_queryset()).select_related('snapshot')
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            completar_en_memoria(page)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        trabajadores = list(queryset)
+        completar_en_memoria(trabajadores)
+        serializer = self.get_serializer(trabajadores, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='estadisticas')
+    def estadisticas(self, request):
+        """
+        Cifras del tablero calculadas con agregados SQL
+        GET /api/trabajadores/estadisticas/?anio=2025 (anio opcional)
+
+        El resultado se guarda en caché durante ESTADISTICAS_CACHE_SEGUNDOS.
+        """
+        from django.conf import settings
+        from django.core.cache import cache
+        from .estadisticas import calcular_estadisticas
+
+        anio = request.query_params.get('anio', None)
+        try:
+            anio = int(anio) if anio else None
+        except ValueError:
+            return Response(
+                {'error': f'Año inválido: {anio}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cache_key = f'trabajadores:estadisticas:{anio or "todos"}'
+        datos = cache.get(cache_key)
+        if datos is None:
+            datos = calcular_estadisticas(anio)
+            cache.set(cache_key, datos, settings.ESTADISTICAS_CACHE_SEGUNDOS)
+        return Response(datos)
+
     @action(detail=False, methods=['get'], url_path='exportar-excel', permission_classes=[AllowAny])
     def exportar_excel(self, request):
         """
         Exporta todos los trabajadores a Excel usando el mismo formato que la plantilla original
         GET /api/trabajadores/exportar-excel/
+
+        El libro se guarda en disco con una clave que depende de los datos:
+        mientras nada cambie se sirve el mismo archivo sin regenerarlo. La
+        clave se envía como ETag; con If-None-Match responde 304.
         """
         from datetime import datetime
-        from openpyxl import load_workbook
-        from contratacion.models import Contratacion
-        from ingreso.models import Ingreso
-        from retiro.models import Retiro
-        from seguridad_social.models import SeguridadSocial
-        from proyectos.models import Proyecto
-        from cronograma.models import Cronograma
+        from django.utils.cache import get_conditional_response
+        from django.utils.http import quote_etag
+        from .cache_exportacion import abrir_exportacion, clave_exportacion
+        from .exportacion import PLANTILLA_NOVEDADES
         import os
 
         # Ruta de la plantilla
-        template_path = 'excel/1. FORMATO RELACION DE PERSONAL_OCTUBRE.xlsx'
+        template_path = PLANTILLA_NOVEDADES
 
         # Verificar que la plantilla existe
         if not os.path.exists(template_path):
@@ -517,228 +778,25 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            # Cargar la plantilla
-            wb = load_workbook(template_path)
-            ws_template = wb.active
-
-            # Eliminar todas las hojas excepto la plantilla
-            sheets_to_remove = [sheet for sheet in wb.worksheets if sheet != ws_template]
-            for sheet in sheets_to_remove:
-                wb.remove(sheet)
-
-            # Crear dos nuevas hojas para 2024 y 2025
-            ws_2024 = wb.create_sheet("NOVEDADES 2024", 0)
-            ws_2025 = wb.create_sheet("NOVEDADES 2025", 1)
-
-            # Copiar los headers de la plantilla a ambas hojas (filas 3-4 de plantilla → filas 1-2 de nuevas hojas)
-            # Mapeo: fila 3 de plantilla → fila 1, fila 4 de plantilla → fila 2
-            row_mapping = {3: 1, 4: 2}
-
-            for template_row, new_row in row_mapping.items():
-                for col_idx in range(1, ws_template.max_column + 1):
-                    cell_template = ws_template.cell(row=template_row, column=col_idx)
-
-                    # Copiar a hoja 2024
-                    cell_2024 = ws_2024.cell(row=new_row, column=col_idx)
-                    cell_2024.value = cell_template.value
-                    if cell_template.has_style:
-                        cell_2024.font = cell_template.font.copy()
-                        cell_2024.border = cell_template.border.copy()
-                        cell_2024.fill = cell_template.fill.copy()
-                        cell_2024.number_format = cell_template.number_format
-                        cell_2024.protection = cell_template.protection.copy()
-                        cell_2024.alignment = cell_template.alignment.copy()
-
-                    # Copiar a hoja 2025
-                    cell_2025 = ws_2025.cell(row=new_row, column=col_idx)
-                    cell_2025.value = cell_template.value
-                    if cell_template.has_style:
-                        cell_2025.font = cell_template.font.copy()
-                        cell_2025.border = cell_template.border.copy()
-                        cell_2025.fill = cell_template.fill.copy()
-                        cell_2025.number_format = cell_template.number_format
-                        cell_2025.protection = cell_template.protection.copy()
-                        cell_2025.alignment = cell_template.alignment.copy()
-
-            # Copiar merged cells (celdas combinadas) ajustando las filas
-            # Solo copiar las de las filas 3 y 4, y ajustarlas a filas 1 y 2
-            for merged_cell_range in ws_template.merged_cells.ranges:
-                min_row = merged_cell_range.min_row
-                max_row = merged_cell_range.max_row
-
-                # Solo copiar si está en las filas 3 o 4 de la plantilla
-                if min_row >= 3 and max_row <= 4:
-                    # Ajustar las filas: restar 2 para mover de 3-4 a 1-2
-                    from openpyxl.utils import get_column_letter
-                    min_col_letter = get_column_letter(merged_cell_range.min_col)
-                    max_col_letter = get_column_letter(merged_cell_range.max_col)
-                    new_min_row = min_row - 2
-                    new_max_row = max_row - 2
-
-                    new_range = f"{min_col_letter}{new_min_row}:{max_col_letter}{new_max_row}"
-
-                    # Copiar a hoja 2024
-                    ws_2024.merge_cells(new_range)
-                    # Copiar a hoja 2025
-                    ws_2025.merge_cells(new_range)
-
-            # Copiar anchos de columna
-            for col_idx in range(1, ws_template.max_column + 1):
-                col_letter = get_column_letter(col_idx)
-                ws_2024.column_dimensions[col_letter].width = ws_template.column_dimensions[col_letter].width
-                ws_2025.column_dimensions[col_letter].width = ws_template.column_dimensions[col_letter].width
-
-            # Copiar alturas de fila (para los headers)
-            # Mapear las alturas de las filas 3-4 de la plantilla a las filas 1-2 de las nuevas hojas
-            ws_2024.row_dimensions[1].height = ws_template.row_dimensions[3].height
-            ws_2024.row_dimensions[2].height = ws_template.row_dimensions[4].height
-            ws_2025.row_dimensions[1].height = ws_template.row_dimensions[3].height
-            ws_2025.row_dimensions[2].height = ws_template.row_dimensions[4].height
-
-            # Congelar paneles: columnas A-I (1-9) estáticas, desde J en adelante se mueven
-            # También congela las filas 1-2 (headers) para que permanezcan visibles al desplazarse verticalmente
-            ws_2024.freeze_panes = 'J3'  # Congela hasta columna I y fila 2
-            ws_2025.freeze_panes = 'J3'  # Congela hasta columna I y fila 2
-
-            # Eliminar la hoja de plantilla original
-            wb.remove(ws_template)
-
-            # Función para escribir datos de trabajadores en una hoja
-            def escribir_trabajadores_en_hoja(ws, trabajadores_filtrados):
-                row_idx = 3  # Los datos empiezan en la fila 3 (después de headers en filas 1-2)
-                count = 0
-
-                for trabajador in trabajadores_filtrados:
-                    try:
-                        # Columna 0: Número secuencial
-                        ws.cell(row=row_idx, column=1, value=count + 1)
-
-                        # Columnas 1-8: Identificación
-                        ws.cell(row=row_idx, column=2, value=trabajador.tipo or '')
-                        ws.cell(row=row_idx, column=3, value=trabajador.numero or '')
-                        ws.cell(row=row_idx, column=4, value=trabajador.fecha_expedicion_cedula)
-                        ws.cell(row=row_idx, column=5, value=trabajador.fecha_nacimiento)
-                        ws.cell(row=row_idx, column=6, value=trabajador.primer_apellido or '')
-                        ws.cell(row=row_idx, column=7, value=trabajador.segundo_apellido or '')
-                        ws.cell(row=row_idx, column=8, value=trabajador.primer_nombre or '')
-                        ws.cell(row=row_idx, column=9, value=trabajador.segundo_nombre or '')
-
-                        # Columnas 9-14: Contratación
-                        try:
-                            contratacion = trabajador.contrataciones.filter(anio=trabajador.anio).first()
-                            if contratacion:
-                                ws.cell(row=row_idx, column=10, value=contratacion.get_tipo_contrato_display() or '')
-                                ws.cell(row=row_idx, column=11, value=contratacion.cargo or '')
-                                ws.cell(row=row_idx, column=12, value=float(contratacion.salario_contratado) if contratacion.salario_contratado else 0)
-                                ws.cell(row=row_idx, column=13, value=contratacion.municipio_base or '')
-                                ws.cell(row=row_idx, column=14, value=contratacion.fecha_inicio_contrato)
-                                ws.cell(row=row_idx, column=15, value=contratacion.fecha_final_contrato)
-                        except Exception:
-                            pass
-
-                        # Columnas 15-18: Ingreso
-                        try:
-                            ingreso = trabajador.ingresos.filter(anio=trabajador.anio).first()
-                            if ingreso:
-                                ws.cell(row=row_idx, column=16, value=ingreso.fecha_ingreso)
-                                ws.cell(row=row_idx, column=17, value=ingreso.examen_ingreso)
-                                ws.cell(row=row_idx, column=18, value=ingreso.fecha_entrega_epp)
-                                ws.cell(row=row_idx, column=19, value=ingreso.fecha_entrega_dotacion)
-                        except Exception:
-                            pass
-
-                        # Columnas 19-22: Retiro
-                        try:
-                            retiro = trabajador.retiros.filter(anio=trabajador.anio).first()
-                            if retiro:
-                                ws.cell(row=row_idx, column=20, value=retiro.fecha_retiro)
-                                ws.cell(row=row_idx, column=21, value=retiro.fecha_liquidacion)
-                                ws.cell(row=row_idx, column=22, value=float(retiro.valor_liquidacion) if retiro.valor_liquidacion else None)
-                                ws.cell(row=row_idx, column=23, value=retiro.fecha_examen_retiro)
-                        except Exception:
-                            pass
-
-                        # Columnas 23-29: Seguridad Social
-                        try:
-                            seguridad = trabajador.seguridad_social_registros.filter(anio=trabajador.anio).first()
-                            if seguridad:
-                                ws.cell(row=row_idx, column=24, value=seguridad.eps)
-                                ws.cell(row=row_idx, column=25, value=seguridad.fecha_afiliacion_eps)
-                                ws.cell(row=row_idx, column=26, value=seguridad.caja_compensacion)
-                                ws.cell(row=row_idx, column=27, value=seguridad.fecha_afiliacion_caja)
-                                ws.cell(row=row_idx, column=28, value=seguridad.fondo_pension)
-                                ws.cell(row=row_idx, column=29, value=seguridad.fecha_afiliacion_pension)
-                                ws.cell(row=row_idx, column=30, value=seguridad.arl)
-                        except Exception:
-                            pass
-
-                        # Columnas 32-36: Proyecto
-                        try:
-                            proyecto = trabajador.proyectos_asignados.filter(anio=trabajador.anio).first()
-                            if proyecto:
-                                ws.cell(row=row_idx, column=33, value='X' if proyecto.administrativo else '')
-                                ws.cell(row=row_idx, column=34, value='X' if proyecto.construccion_instalaciones else '')
-                                ws.cell(row=row_idx, column=35, value='X' if proyecto.construccion_redes else '')
-                                ws.cell(row=row_idx, column=36, value='X' if proyecto.servicios else '')
-                                ws.cell(row=row_idx, column=37, value='X' if proyecto.mantenimiento_redes else '')
-                        except Exception:
-                            pass
-
-                        # Columnas 37-84: Cronogramas (12 meses × 4 columnas)
-                        # Usar el año del trabajador para los cronogramas
-                        anio_trabajador = trabajador.anio
-                        meses_config = [
-                            {'mes': datetime(anio_trabajador, 1, 1).date(), 'col': 38},   # Enero
-                            {'mes': datetime(anio_trabajador, 2, 1).date(), 'col': 42},   # Febrero
-                            {'mes': datetime(anio_trabajador, 3, 1).date(), 'col': 46},   # Marzo
-                            {'mes': datetime(anio_trabajador, 4, 1).date(), 'col': 50},   # Abril
-                            {'mes': datetime(anio_trabajador, 5, 1).date(), 'col': 54},   # Mayo
-                            {'mes': datetime(anio_trabajador, 6, 1).date(), 'col': 58},   # Junio
-                            {'mes': datetime(anio_trabajador, 7, 1).date(), 'col': 62},   # Julio
-                            {'mes': datetime(anio_trabajador, 8, 1).date(), 'col': 66},   # Agosto
-                            {'mes': datetime(anio_trabajador, 9, 1).date(), 'col': 70},   # Septiembre
-                            {'mes': datetime(anio_trabajador, 10, 1).date(), 'col': 74},  # Octubre
-                            {'mes': datetime(anio_trabajador, 11, 1).date(), 'col': 78},  # Noviembre
-                            {'mes': datetime(anio_trabajador, 12, 1).date(), 'col': 82},  # Diciembre
-                        ]
-
-                        for mes_info in meses_config:
-                            try:
-                                cronograma = trabajador.cronogramas.filter(mes=mes_info['mes']).first()
-                                if cronograma:
-                                    col_base = mes_info['col']
-                                    ws.cell(row=row_idx, column=col_base, value=cronograma.municipio_ejecucion or '')
-                                    ws.cell(row=row_idx, column=col_base + 1, value=float(cronograma.salario_cotizacion) if cronograma.salario_cotizacion else 0)
-                                    ws.cell(row=row_idx, column=col_base + 2, value=cronograma.dias_laborados or 0)
-                                    ws.cell(row=row_idx, column=col_base + 3, value=float(cronograma.sueldo_devengado) if cronograma.sueldo_devengado else 0)
-                            except Exception:
-                                # Si no existe el cronograma, dejar las celdas vacías
-                                pass
-
-                        count += 1
-                        row_idx += 1
-
-                    except Exception as e:
-                        # Continuar con el siguiente trabajador si hay error
-                        pass
-
-            # Filtrar trabajadores por año
-            trabajadores_2024 = Trabajador.objects.filter(anio=2024).order_by('id')
-            trabajadores_2025 = Trabajador.objects.filter(anio=2025).order_by('id')
-
-            # Escribir datos en cada hoja
-            escribir_trabajadores_en_hoja(ws_2024, trabajadores_2024)
-            escribir_trabajadores_en_hoja(ws_2025, trabajadores_2025)
-
-            # Crear la respuesta HTTP con el archivo Excel
-            response = HttpResponse(
+            # Una hoja por año: NOVEDADES 2024 y NOVEDADES 2025
+            anios = [2024, 2025]
+            clave = clave_exportacion(anios, template_path)
+            etag = quote_etag(clave)
+
+            no_modificado = get_conditional_response(request, etag=etag)
+            if no_modificado is not None:
+                return no_modificado
+
+            filename = f'RELACION_PERSONAL_EXPORT_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+            response = FileResponse(
+                abrir_exportacion(clave, anios, template_path),
+                as_attachment=True,
+                filename=filename,
                 content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             )
-            filename = f'RELACION_PERSONAL_EXPORT_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-            response['Content-Disposition'] = f'attachment; filename={filename}'
-
-            # Guardar el workbook en la respuesta
-            wb.save(response)
+            response['ETag'] = etag
+            # El navegador puede guardarlo, pero debe revalidar con el ETag
+            response['Cache-Control'] = 'no-cache'
             return response
 
         except Exception as e:
@@ -746,3 +804,31 @@ class TrabajadorViewSet(viewsets.ModelViewSet):
                 {'error': f'Error al exportar: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+    @action(detail=False, methods=['get'], url_path='exportar-csv')
+    def exportar_csv(self, request):
+        """
+        Exporta el formato NOVEDADES en CSV (COPY de PostgreSQL)
+        GET /api/trabajadores/exportar-csv/?anio=2024,2025 (anio opcional: todos los años)
+
+        PostgreSQL genera el CSV y sus bloques se envían a medida que
+        llegan, sin pasar las filas por el ORM ni esperar el archivo
+        completo. Un error de la base de datos a mitad de la copia corta
+        la descarga.
+        """
+        from datetime import datetime
+        from .csv_novedades import iterar_csv
+
+        try:
+            anios = self._lista_parametro('anio')
+            anios = [int(anio) for anio in anios] if anios else None
+        except ValueError:
+            return Response(
+                {'error': 'El parámetro anio debe ser una lista de años separada por comas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        filename = f'NOVEDADES_EXPORT_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        response = StreamingHttpResponse(iterar_csv(anios), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -21,13 +21,12 @@ import {
 import Link from "next/link";
 import { Button } from "@/components/ui/button";
 import { useAuthStore } from "@/lib/stores/authStore";
-import { getEmployees, type Employee } from "@/lib/api/employees";
+import { getEmployeeStats } from "@/lib/api/employees";
 
 export default function DashboardPage() {
   const router = useRouter();
   const clearAuth = useAuthStore((state) => state.clearAuth);
   const [sidebarOpen, setSidebarOpen] = useState(false);
-  const [employees, setEmployees] = useState<Employee[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [totalEmployees, setTotalEmployees] = useState(0);
   const [totalContracts, setTotalContracts] = useState(0);
@@ -79,26 +78,17 @@ export default function DashboardPage() {
       try {
         setIsLoading(true);
 
-        // Cargar empleados de 2024 y 2025
-        const employees2024 = await getEmployees(2024);
-        const employees2025 = await getEmployees(2025);
-        const allEmployees = [...employees2024, ...employees2025];
+        // Cifras agregadas en el backend (todos los años)
+        const stats = await getEmployeeStats();
 
-        setEmployees(allEmployees);
+        // Total de empleados únicos (por documento)
+        setTotalEmployees(stats.total_empleados);
 
-        // Calcular total de empleados únicos (por nombre)
-        const uniqueNames = new Set(allEmployees.map(emp => emp.nombre_completo));
-        setTotalEmployees(uniqueNames.size);
+        // Total de contratos (todos los registros por año)
+        setTotalContracts(stats.total_registros);
 
-        // Calcular total de contratos (todos los registros/empleados)
-        setTotalContracts(allEmployees.length);
-
-        // Generar actividades recientes basadas en los últimos empleados creados
-        const sortedEmployees = [...allEmployees].sort((a, b) =>
-          new Date(b.fecha_creacion).getTime() - new Date(a.fecha_creacion).getTime()
-        );
-
-        const activities = sortedEmployees.slice(0, 3).map(emp => {
+        // Actividades recientes basadas en los últimos empleados creados
+        const activities = stats.actividad_reciente.map(emp => {
           const createdDate = new Date(emp.fecha_creacion);
           const now = new Date();
           const diffTime = Math.abs(now.getTime() - createdDate.getTime());
@@ -0,0 +1,48 @@
+import apiClient from './client';
+
+// Matriz trabajador × mes del cronograma de un año
+export interface CronogramaMatrix {
+  anio: number;
+  meses: string[];
+  columnas: string[];
+  filas: Array<[
+    number, // id
+    string, // tipo
+    string, // numero
+    string, // nombre_completo
+    Array<string | null>, // municipio_ejecucion (12 meses)
+    Array<number | null>, // salario_cotizacion
+    Array<number | null>, // dias_laborados
+    Array<number | null>, // sueldo_devengado
+  ]>;
+}
+
+export const getCronogramaMatrix = async (year: number = 2025): Promise<CronogramaMatrix> => {
+  const response = await apiClient.get('/cronograma/matriz/', {
+    params: { anio: year }
+  });
+  return response.data;
+};
+
+// Carga masiva del cronograma (crea o actualiza por trabajador y mes)
+export interface CronogramaRecord {
+  trabajador: number;
+  mes: string;
+  municipio_ejecucion: string;
+  salario_cotizacion: string | number;
+  dias_laborados: number;
+  sueldo_devengado: string | number;
+}
+
+export interface CronogramaBulkResult {
+  procesados: number;
+  creados: number;
+  actualizados: number;
+}
+
+export const upsertCronogramaBulk = async (
+  records: CronogramaRecord[]
+): Promise<CronogramaBulkResult> => {
+  const response = await apiClient.post('/cronograma/lote/', records);
+  return response.data;
+};
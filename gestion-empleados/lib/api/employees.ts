@@ -105,8 +105,73 @@ export interface Employee {
   fecha_actualizacion: string;
 }
 
-export const getEmployees = async (year: number = 2025): Promise<Employee[]> => {
+// Página de trabajadores (paginación por cursor del backend)
+export interface EmployeePage {
+  next: string | null;
+  results: Employee[];
+}
+
+// Selección de campos (?fields=) y relaciones (?expand=) del backend
+export interface EmployeeFieldOptions {
+  fields?: string[];
+  expand?: Array<'contratacion' | 'ingreso' | 'retiro' | 'seguridad_social' | 'proyecto'>;
+}
+
+const fieldParams = (options: EmployeeFieldOptions = {}) => ({
+  fields: options.fields?.join(','),
+  expand: options.expand?.join(','),
+});
+
+export const getEmployeesPage = async (
+  year: number = 2025,
+  cursor?: string,
+  pageSize: number = 100,
+  options?: EmployeeFieldOptions
+): Promise<EmployeePage> => {
+  const response = await apiClient.get('/trabajadores/', {
+    params: { anio: year, cursor, page_size: pageSize, ...fieldParams(options) }
+  });
+  return response.data;
+};
+
+// Lista completa sin paginar (modo legado del backend)
+export const getEmployees = async (
+  year: number = 2025,
+  options?: EmployeeFieldOptions
+): Promise<Employee[]> => {
   const response = await apiClient.get('/trabajadores/', {
+    params: { anio: year, paginar: false, ...fieldParams(options) }
+  });
+  return response.data;
+};
+
+// Estadísticas del tablero (agregadas en el backend)
+export interface EmployeeStatsCount {
+  nombre: string;
+  total: number;
+  [campo: string]: string | number;
+}
+
+export interface EmployeeStats {
+  anio: number | null;
+  total_empleados: number;
+  total_registros: number;
+  por_anio: Array<{ anio: number; total: number }>;
+  contratos: { total: number; activos: number };
+  por_tipo_contrato: EmployeeStatsCount[];
+  por_municipio_base: EmployeeStatsCount[];
+  por_arl: EmployeeStatsCount[];
+  por_proyecto: Record<string, number>;
+  actividad_reciente: Array<{
+    id: number;
+    nombre_completo: string;
+    anio: number;
+    fecha_creacion: string;
+  }>;
+}
+
+export const getEmployeeStats = async (year?: number): Promise<EmployeeStats> => {
+  const response = await apiClient.get('/trabajadores/estadisticas/', {
     params: { anio: year }
   });
   return response.data;
@@ -117,9 +182,14 @@ export const getEmployeeById = async (id: number): Promise<Employee> => {
   return response.data;
 };
 
-export const searchEmployees = async (query: string): Promise<Employee[]> => {
-  const response = await apiClient.get('/trabajadores/', {
-    params: { search: query }
+// Búsqueda por nombre o documento (sin acentos, ordenada por relevancia)
+export const searchEmployees = async (
+  query: string,
+  year?: number,
+  options?: EmployeeFieldOptions
+): Promise<Employee[]> => {
+  const response = await apiClient.get('/trabajadores/buscar/', {
+    params: { q: query, anio: year, ...fieldParams(options) }
   });
   return response.data;
 };
@@ -129,6 +199,44 @@ export const createEmployee = async (employee: Partial<Employee>): Promise<Emplo
   return response.data;
 };
 
+// Documento completo del trabajador en un año (todas las tablas en una transacción)
+export interface CronogramaMes {
+  id?: number;
+  mes: string;
+  municipio_ejecucion: string;
+  salario_cotizacion: string;
+  dias_laborados: number;
+  sueldo_devengado: string;
+}
+
+export interface EmployeeDocument extends Omit<Employee, 'contratacion' | 'ingreso' | 'retiro' | 'seguridad_social' | 'proyecto'> {
+  anio: number;
+  contratacion?: Partial<Contratacion> | null;
+  ingreso?: Partial<Ingreso> | null;
+  retiro?: Partial<Retiro> | null;
+  seguridad_social?: Partial<SeguridadSocial> | null;
+  proyecto?: Partial<Proyecto> | null;
+  cronogramas?: CronogramaMes[];
+}
+
+export const createEmployeeDocument = async (document: Partial<EmployeeDocument>): Promise<EmployeeDocument> => {
+  const response = await apiClient.post('/trabajadores/documento/', document);
+  return response.data;
+};
+
+export const getEmployeeDocument = async (id: number): Promise<EmployeeDocument> => {
+  const response = await apiClient.get(`/trabajadores/${id}/documento/`);
+  return response.data;
+};
+
+export const replaceEmployeeDocument = async (
+  id: number,
+  document: Partial<EmployeeDocument>
+): Promise<EmployeeDocument> => {
+  const response = await apiClient.put(`/trabajadores/${id}/documento/`, document);
+  return response.data;
+};
+
 export const updateEmployee = async (id: number, employee: Partial<Employee>): Promise<Employee> => {
   const response = await apiClient.patch(`/trabajadores/${id}/`, employee);
   return response.data;
@@ -0,0 +1,64 @@
+import apiClient from './client';
+
+// Tareas en segundo plano (importación y exportación de Excel)
+export type TaskStatus = 'PENDIENTE' | 'EN_PROCESO' | 'COMPLETADA' | 'FALLIDA';
+
+export interface Task {
+  id: number;
+  tipo: 'IMPORTAR' | 'EXPORTAR';
+  tipo_display: string;
+  estado: TaskStatus;
+  estado_display: string;
+  parametros: Record<string, unknown>;
+  filas_procesadas: number;
+  filas_totales: number | null;
+  porcentaje: number | null;
+  filas_por_segundo: number | null;
+  eta_segundos: number | null;
+  segundos_transcurridos: number | null;
+  resultado: Record<string, unknown>;
+  mensaje: string;
+  url_descarga: string | null;
+  fecha_creacion: string;
+  fecha_inicio: string | null;
+  fecha_fin: string | null;
+  fecha_actualizacion: string;
+}
+
+export interface ImportTaskOptions {
+  year?: number;
+  sheet?: string;
+  batchSize?: number;
+  force?: boolean;
+}
+
+export const enqueueExcelImport = async (file: File, options: ImportTaskOptions = {}): Promise<Task> => {
+  const formData = new FormData();
+  formData.append('archivo', file);
+  if (options.year !== undefined) formData.append('anio', String(options.year));
+  if (options.sheet) formData.append('sheet', options.sheet);
+  if (options.batchSize !== undefined) formData.append('batch_size', String(options.batchSize));
+  if (options.force) formData.append('forzar', 'true');
+
+  const response = await apiClient.post('/tareas/importar/', formData, {
+    headers: { 'Content-Type': 'multipart/form-data' }
+  });
+  return response.data;
+};
+
+export const enqueueExcelExport = async (years: number[] = [2024, 2025]): Promise<Task> => {
+  const response = await apiClient.post('/tareas/exportar/', { anios: years });
+  return response.data;
+};
+
+export const getTask = async (id: number): Promise<Task> => {
+  const response = await apiClient.get(`/tareas/${id}/`);
+  return response.data;
+};
+
+export const downloadTaskResult = async (id: number): Promise<Blob> => {
+  const response = await apiClient.get(`/tareas/${id}/descargar/`, {
+    responseType: 'blob'
+  });
+  return response.data;
+};